@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark + parity check for the affinity kernels in helpers/affinity_helper.py.
+
+Builds synthetic AniList profiles, then times the scalar all-pairs loop against the
+NumPy all-pairs / one-vs-all kernel and checks every score agrees within VECTOR_TOLERANCE.
+
+Usage: python "Debugging Scripts/benchmark_affinity.py" [--users 300] [--seed 1]
+"""
+
+import argparse
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import helpers
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from helpers.affinity_helper import (
+    NUMPY_AVAILABLE,
+    VECTOR_TOLERANCE,
+    AffinityFeatureMatrix,
+    extract_affinity_features,
+    score_affinity_features,
+)
+
+logging.basicConfig(
+    level=logging.DEBUG,
+    format="[%(asctime)s] [%(levelname)s] %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S"
+)
+logger = logging.getLogger(__name__)
+
+GENRES = ["Action", "Adventure", "Comedy", "Drama", "Fantasy", "Horror", "Mystery", "Romance",
+          "Sci-Fi", "Slice of Life", "Sports", "Supernatural", "Thriller", "Psychological"]
+FORMATS = ["TV", "MOVIE", "OVA", "ONA", "SPECIAL", "MANGA", "NOVEL", "ONE_SHOT"]
+
+
+def random_profile(rng: random.Random, i: int) -> dict:
+    def stats(count_key, count_max):
+        count = rng.choice([0, rng.randint(1, 9), rng.randint(10, count_max)])
+        return {
+            "count": count,
+            count_key: count * rng.randint(1, 24) if count else 0,
+            "meanScore": round(rng.uniform(3, 10), 1) if count and rng.random() > 0.1 else 0,
+            "genres": [{"genre": g, "count": rng.randint(1, 80)} for g in rng.sample(GENRES, rng.randint(0, 8))],
+            "formats": [{"format": f, "count": rng.randint(1, 60)} for f in rng.sample(FORMATS, rng.randint(0, 4))],
+        }
+
+    def nodes(pool, k):
+        return {"nodes": [{"id": x} for x in rng.sample(range(pool), rng.randint(0, k))]}
+
+    anime = stats("episodesWatched", 900)
+    manga = stats("chaptersRead", 600)
+    return {
+        "name": f"user{i}",
+        "statistics": {"anime": anime, "manga": manga},
+        "favourites": {"anime": nodes(200, 25), "manga": nodes(200, 25), "characters": nodes(500, 25)},
+    }
+
+
+def bench_scalar(features: dict) -> dict:
+    names = list(features)
+    scores = {}
+    for i, a in enumerate(names):
+        for b in names[i + 1:]:
+            scores[(a, b)] = score_affinity_features(features[a], features[b])[0]
+    return scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Affinity kernel benchmark")
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    profiles = [random_profile(rng, i) for i in range(args.users)]
+    features = {p["name"]: extract_affinity_features(p) for p in profiles}
+    pairs = args.users * (args.users - 1) // 2
+    logger.info(f"{args.users} users, {pairs} pairs")
+
+    start = time.perf_counter()
+    scalar = bench_scalar(features)
+    scalar_time = time.perf_counter() - start
+    logger.info(f"Scalar all-pairs:    {scalar_time:.3f}s")
+
+    if not NUMPY_AVAILABLE:
+        logger.warning("NumPy not installed, skipping the vectorized kernel")
+        return
+
+    start = time.perf_counter()
+    matrix = AffinityFeatureMatrix(features)
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    scores, _ = matrix.score_block()
+    vector_time = time.perf_counter() - start
+    logger.info(f"Vectorized all-pairs: {vector_time:.3f}s (+{build_time:.3f}s to build) "
+                f"-> {scalar_time / max(vector_time + build_time, 1e-9):.1f}x")
+
+    start = time.perf_counter()
+    ranked = matrix.one_vs_all(profiles[0]["name"])
+    logger.info(f"Vectorized one-vs-all: {(time.perf_counter() - start) * 1000:.2f}ms ({len(ranked)} users)")
+
+    worst = 0.0
+    for (a, b), expected in scalar.items():
+        got = round(float(scores[matrix.index[a], matrix.index[b]]), 2)
+        worst = max(worst, abs(got - expected))
+    logger.info(f"Max score difference: {worst:.4f} (tolerance {VECTOR_TOLERANCE})")
+    if worst > VECTOR_TOLERANCE + 1e-9:
+        logger.error("❌ Vectorized kernel disagrees with the scalar path")
+        sys.exit(1)
+    logger.info("✅ Vectorized kernel matches the scalar path")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Parity check + benchmark for the timestamp detector in helpers/timestamp_helper.py.
+
+Runs a synthetic chat corpus (mostly messages without times, plus times, dates, durations
+and awkward edge cases) through the old multi-pass detector and the new single-pass one,
+asserts both produce identical output, and reports per-message timings.
+
+Usage: python "Debugging Scripts/benchmark_timestamp.py" [--messages 20000] [--seed 1]
+"""
+
+import argparse
+import logging
+import random
+import re
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+# Add parent directory to path to import helpers
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from helpers.timestamp_helper import convert_times
+
+logging.basicConfig(
+    level=logging.DEBUG,
+    format="[%(asctime)s] [%(levelname)s] %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S"
+)
+logger = logging.getLogger(__name__)
+
+
+class LegacyDetector:
+    """The pre-refactor detector from cogs/timestamp.py, kept verbatim for parity checks."""
+
+    def __init__(self):
+        self.time_patterns = [
+            # Date and time combinations first (most specific) - these should match first
+            r'\b(tomorrow|today)\s+at\s+(\d{1,2}):(\d{2})\s*(am|pm|AM|PM)\b',
+            r'\b(tomorrow|today)\s+at\s+(\d{1,2})\s*(am|pm|AM|PM)\b',
+            r'\b(\w{3,9}\s+\d{1,2})\s+at\s+(\d{1,2}):(\d{2})\s*(am|pm|AM|PM)\b',
+            r'\b(\w{3,9}\s+\d{1,2})\s+at\s+(\d{1,2})\s*(am|pm|AM|PM)\b',
+            # Standalone time formats (will be filtered out by overlap detection)
+            r'\b(\d{1,2}):(\d{2})\s*(am|pm|AM|PM)\b',
+            r'\b(\d{1,2})\s*(am|pm|AM|PM)\b',
+            # 24-hour format (very restrictive - must have colon and be valid time)
+            r'\b([01]?\d|2[0-3]):([0-5]\d)\b(?=\s|$|[^\d])',
+        ]
+
+    def convert_times_in_message(self, content: str) -> str:
+        """Convert all time mentions in a message to Discord timestamps."""
+        converted_content = content
+        
+        # Pre-filter: Skip entire message if it contains specific duration phrases
+        # Be more specific to avoid false positives
+        if re.search(r'\bin\s+\d+\s*(hours?|hrs?|minutes?|mins?|seconds?|secs?)\b', content, re.IGNORECASE):
+            return content  # Return unchanged if it contains "in X hours" patterns
+        
+        if re.search(r'\b\d+\s*(hours?|hrs?|minutes?|mins?|seconds?|secs?)\s+(ago|from\s+now|later)\b', content, re.IGNORECASE):
+            return content  # Return unchanged if it contains "X hours ago" or "X hours from now" patterns
+        
+        # Find all times and their positions, avoiding overlaps
+        replacements = []
+        processed_ranges = []  # Track which parts of the string have been processed
+        
+        for pattern in self.time_patterns:
+            matches = re.finditer(pattern, content, re.IGNORECASE)
+            for match in matches:
+                original_text = match.group(0)
+                start_pos = match.start()
+                end_pos = match.end()
+                
+                # Check if this match overlaps with any already processed range
+                overlaps = any(
+                    not (end_pos <= proc_start or start_pos >= proc_end)
+                    for proc_start, proc_end in processed_ranges
+                )
+                
+                if overlaps:
+                    continue  # Skip this match to avoid overlaps
+                
+                # Additional check: make sure this match isn't part of a duration phrase
+                context_start = max(0, start_pos - 15)
+                context_end = min(len(content), end_pos + 15)
+                context = content[context_start:context_end].lower()
+                
+                # Skip if this appears to be part of a duration statement
+                # But be more specific - don't just look for "in" anywhere
+                if re.search(r'\bin\s+\d+\s*(hours?|hrs?|minutes?|mins?)\b', context):
+                    continue
+                if re.search(r'\b(ago\b|from\s+now|later)\b', context):
+                    continue
+                
+                timestamp = self.parse_time_string(original_text)
+                if timestamp:
+                    unix_timestamp = int(timestamp.timestamp())
+                    # Use short time format for clean display that maintains grammar
+                    # :t shows "3:30 PM", :f shows "December 28, 2023 3:30 PM"
+                    # For better readability, use :f for dates with time, :t for just times
+                    if any(word in original_text.lower() for word in ['tomorrow', 'today', 'dec', 'jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov']):
+                        discord_timestamp = f"<t:{unix_timestamp}:f>"  # Full date and time
+                    else:
+                        discord_timestamp = f"<t:{unix_timestamp}:t>"  # Just time
+                    replacements.append((match.start(), match.end(), original_text, discord_timestamp))
+                    processed_ranges.append((start_pos, end_pos))
+        
+        # Sort replacements by position (reverse order to avoid index shifting)
+        replacements.sort(key=lambda x: x[0], reverse=True)
+        
+        # Apply replacements
+        for start, end, original, replacement in replacements:
+            converted_content = converted_content[:start] + replacement + converted_content[end:]
+        
+        return converted_content
+
+    def parse_time_string(self, time_str: str, date_str: Optional[str] = None) -> Optional[datetime]:
+        """Parse various time formats and return a datetime object."""
+        try:
+            # Skip if this looks like a duration/future statement
+            # Be more specific - only skip if it's clearly a duration
+            if re.search(r'\bin\s+\d+\s*(hours?|hrs?|minutes?|mins?|seconds?|secs?)\b', time_str, re.IGNORECASE):
+                return None
+            if re.search(r'\b\d+\s*(hours?|hrs?|minutes?|mins?|seconds?|secs?)\s+(ago|from\s+now|later)\b', time_str, re.IGNORECASE):
+                return None
+            
+            # Use local time for calculations - this will be the user's system timezone
+            now = datetime.now()
+            
+            # Combine time and date strings if provided
+            full_str = f"{date_str} {time_str}" if date_str else time_str
+            
+            # Clean up the string
+            full_str = full_str.strip().lower()
+            
+            # Handle "tomorrow at X" or "today at X"
+            if "tomorrow" in full_str:
+                base_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
+                base_date = base_date.replace(day=base_date.day + 1)
+                time_part = re.search(r'(\d{1,2}):?(\d{2})?\s*(am|pm)?', full_str)
+            elif "today" in full_str:
+                base_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
+                time_part = re.search(r'(\d{1,2}):?(\d{2})?\s*(am|pm)?', full_str)
+            elif re.search(r'\w{3,9}\s+\d{1,2}\s+at', full_str):
+                # Handle "Dec 25 at" type patterns
+                base_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
+                # For now, assume it's this year (could be enhanced later)
+                time_part = re.search(r'(\d{1,2}):?(\d{2})?\s*(am|pm)?', full_str)
+            else:
+                base_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
+                time_part = re.search(r'(\d{1,2}):?(\d{2})?\s*(am|pm)?', full_str)
+            
+            if not time_part:
+                return None
+                
+            hour = int(time_part.group(1))
+            minute = int(time_part.group(2)) if time_part.group(2) else 0
+            am_pm = time_part.group(3)
+            
+            # Handle AM/PM conversion
+            if am_pm:
+                if am_pm in ['pm'] and hour != 12:
+                    hour += 12
+                elif am_pm in ['am'] and hour == 12:
+                    hour = 0
+            
+            # If no AM/PM specified and hour is 1-12, assume next occurrence
+            elif hour <= 12:
+                # If the time has already passed today, assume tomorrow
+                test_time = base_date.replace(hour=hour, minute=minute)
+                if test_time < now:
+                    # Try PM version
+                    if hour != 12:
+                        test_time = base_date.replace(hour=hour + 12, minute=minute)
+                        if test_time < now:
+                            # Still in the past, use tomorrow
+                            base_date = base_date.replace(day=base_date.day + 1)
+                            hour = hour  # Keep original hour for tomorrow
+                    else:
+                        # For 12:xx, try tomorrow
+                        base_date = base_date.replace(day=base_date.day + 1)
+            
+            # Validate hour and minute
+            if hour > 23 or minute > 59:
+                return None
+            
+            # Create the final datetime in local time
+            result = base_date.replace(hour=hour, minute=minute)
+            
+            # Convert local time to UTC for Discord timestamps
+            # Use time.mktime to get local timestamp, then convert to UTC
+            local_timestamp = time.mktime(result.timetuple())
+            utc_result = datetime.fromtimestamp(local_timestamp, tz=timezone.utc)
+                
+            return utc_result
+            
+        except Exception as e:
+            logger.debug(f"Error parsing time string '{time_str}': {e}")
+            return None
+
+
+# -----------------------------
+# Corpus
+# -----------------------------
+PLAIN = [
+    "lol that episode was wild", "has anyone read the new chapter yet?", "gg", "I am so behind on my backlog",
+    "the pm said the release got pushed", "check https://anilist.co/anime/21/one-piece", "ok",
+    "what's everyone watching this season", "I rated it 8/10 honestly", "chapter 1092 was peak",
+    "season 2 when", "ratio 3:2 is fine for the banner", "my score went from 7 to 9", "im at ep 12",
+]
+TIMES = [
+    "3pm", "3 pm", "11:45 AM", "12am", "12:30pm", "7PM", "15:30", "23:45", "0:15", "9:05", "12:00",
+    "tomorrow at 3pm", "today at 10:30 AM", "Tomorrow at 12am", "Dec 25 at 2:30pm", "March 3 at 9pm",
+    "Friday 13 at 8pm", "dec 5 at 11am", "24:00", "99:99", "13pm", "25:61", "1:5pm",
+]
+TEMPLATES = [
+    "let's meet at {t}", "stream starts {t}!", "{t} works for me", "raid at {t} or {t2}?",
+    "see you {t}", "is {t} too late", "{t} {t2}", "ep drops at {t} jst",
+    "in 2 hours we start, around {t}", "posted 5 mins ago, next one at {t}", "it ended {t} later",
+    "we said {t} from now", "{t}ish", "({t})", "between {t}-{t2}", "at{t}", "{t}:30",
+]
+# A rejected higher-priority match must leave its span to the lower-priority formats
+EDGE_CASES = [
+    "23:59 pm", "no 10:30 pm later", "12:11:45am", "13:05pm", "meet 23:15 pm or 12:11:45 am",
+    "tomorrow at 13:30pm", "Dec 25 at 25:00pm then 7pm", "x 12:30 13:05pm",
+]
+
+
+def build_corpus(rng: random.Random, size: int) -> List[str]:
+    corpus = []
+    for _ in range(size):
+        if rng.random() < 0.85:
+            corpus.append(" ".join(rng.sample(PLAIN, rng.randint(1, 3))))
+        else:
+            template = rng.choice(TEMPLATES)
+            corpus.append(template.format(t=rng.choice(TIMES), t2=rng.choice(TIMES)))
+    # Every template/time combination at least once
+    for template in TEMPLATES:
+        for t in TIMES:
+            corpus.append(template.format(t=t, t2=rng.choice(TIMES)))
+    corpus.extend(EDGE_CASES)
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Timestamp detector parity + benchmark")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    corpus = build_corpus(random.Random(args.seed), args.messages)
+    legacy = LegacyDetector()
+    logger.info(f"Corpus: {len(corpus)} messages")
+
+    start = time.perf_counter()
+    old = [legacy.convert_times_in_message(m) for m in corpus]
+    old_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new = [convert_times(m) for m in corpus]
+    new_time = time.perf_counter() - start
+
+    mismatches = [(m, a, b) for m, a, b in zip(corpus, old, new) if a != b]
+    converted = sum(1 for m, a in zip(corpus, old) if a != m)
+
+    logger.info(f"Old detector: {old_time:.3f}s ({old_time / len(corpus) * 1e6:.1f}µs/message)")
+    logger.info(f"New detector: {new_time:.3f}s ({new_time / len(corpus) * 1e6:.1f}µs/message) "
+                f"-> {old_time / max(new_time, 1e-9):.1f}x")
+    logger.info(f"{converted} messages contained convertible times")
+
+    plain = [m for m in corpus if m in PLAIN or not re.search(r"\d", m)]
+    start = time.perf_counter()
+    for m in plain:
+        convert_times(m)
+    logger.info(f"New detector on messages without times: "
+                f"{(time.perf_counter() - start) / max(len(plain), 1) * 1e6:.2f}µs/message")
+
+    if mismatches:
+        for message, a, b in mismatches[:20]:
+            logger.error(f"❌ Mismatch for {message!r}:\n   old: {a!r}\n   new: {b!r}")
+        logger.error(f"❌ {len(mismatches)} mismatches")
+        sys.exit(1)
+    logger.info("✅ New detector output is identical to the old one")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Offline (re)build of the local Steam catalog from every cached appdetails payload.
+
+The bot indexes apps as it fetches them; run this after restoring an old database or
+to backfill apps cached before the catalog existed, then print the index sizes.
+
+Usage: python "Debugging Scripts/build_steam_catalog.py" [--batch 500]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import helpers
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database import init_steam_catalog_table, iter_steam_app_cache
+from helpers.steam_helper import steam_catalog
+
+logging.basicConfig(
+    level=logging.DEBUG,
+    format="[%(asctime)s] [%(levelname)s] %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S"
+)
+logger = logging.getLogger(__name__)
+
+
+async def build(batch: int):
+    await init_steam_catalog_table()
+    await steam_catalog.load()
+    before = len(steam_catalog)
+
+    start = time.perf_counter()
+    pending = {}
+    seen = 0
+    async for appid, details in iter_steam_app_cache(batch):
+        seen += 1
+        pending[appid] = details
+        if len(pending) >= batch:
+            await steam_catalog.add_many(pending)
+            pending = {}
+    await steam_catalog.add_many(pending)
+
+    logger.info(f"Read {seen} cached payloads in {time.perf_counter() - start:.2f}s")
+    logger.info(f"Catalog: {before} -> {len(steam_catalog)} apps")
+    logger.info(f"Index sizes: {len(steam_catalog.by_genre)} genres, "
+                f"{len(steam_catalog.by_developer)} developers, {len(steam_catalog.by_publisher)} publishers")
+    for genre, apps in sorted(steam_catalog.by_genre.items(), key=lambda kv: len(kv[1]), reverse=True)[:10]:
+        logger.debug(f"  {genre}: {len(apps)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the Steam catalog from the appdetails cache")
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(build(args.batch))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Fixture check for the Steam profile page parsers in cogs/steam.py.
+
+Steam marks up comments and groups with several classes per element
+(class="commentthread_comment responsive_body_text"); every parser must still find them.
+
+Usage: python "Debugging Scripts/check_steam_parsers.py"
+"""
+
+import logging
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import cogs
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cogs.steam import parse_comments, parse_groups, parse_screenshot_urls, parse_video_links
+
+logging.basicConfig(
+    level=logging.DEBUG,
+    format="[%(asctime)s] [%(levelname)s] %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S"
+)
+logger = logging.getLogger(__name__)
+
+COMMENTS_HTML = """
+<div class="commentthread_comments">
+  <div class="commentthread_comment responsive_body_text" id="comment_1">
+    <div class="commentthread_comment_avatar playerAvatar online"><img src="https://avatars.example/a.jpg"></div>
+    <div class="commentthread_comment_content">
+      <a class="hoverunderline commentthread_author_link" href="https://steamcommunity.com/id/alice">Alice</a>
+      <div class="commentthread_comment_text" id="comment_content_1">+rep great teammate</div>
+    </div>
+  </div>
+  <div class="commentthread_comment responsive_body_text  " id="comment_2">
+    <a class="commentthread_author_link" href="https://steamcommunity.com/id/bob">Bob</a>
+    <div class="commentthread_comment_text">gg</div>
+  </div>
+</div>
+"""
+
+PROFILE_COMMENT_HTML = '<div class="profile_comment extra"><a href="/id/carol">Carol</a><div class="comment_body">hi</div></div>'
+
+GROUPS_HTML = """
+<div class="group_block_list">
+  <div class="groupBlock online">
+    <a class="linkTitle" href="https://steamcommunity.com/groups/first">First Group</a>
+  </div>
+  <div class="groupBlock">
+    <a href="https://steamcommunity.com/groups/second">Second Group</a>
+  </div>
+</div>
+"""
+
+MEDIA_HTML = """
+<img class="screenshot_img" src="https://steamuserimages-a.akamaihd.net/cdn/1.jpg">
+<img src="https://community.cloudflare.steamstatic.com/public/images/x.png">
+<a class="video_link" href="https://www.youtube.com/watch?v=abc">video</a>
+<a href="https://steamcommunity.com/sharedfiles/filedetails/?id=1">shared</a>
+"""
+
+
+def main():
+    failures = []
+
+    comments = parse_comments(COMMENTS_HTML)
+    if [c["author"] for c in comments] != ["Alice", "Bob"] or comments[0]["text"] != "+rep great teammate":
+        failures.append(f"parse_comments (multi-class commentthread_comment): {comments}")
+
+    profile_comments = parse_comments(PROFILE_COMMENT_HTML)
+    if [c["author"] for c in profile_comments] != ["Carol"]:
+        failures.append(f"parse_comments (multi-class profile_comment): {profile_comments}")
+
+    # No /groups/ links outside the blocks, so the link fallback can't mask a strainer miss
+    groups = parse_groups(GROUPS_HTML.replace("/groups/", "/g/"))
+    if [g["name"] for g in groups] != ["First Group", "Second Group"]:
+        failures.append(f"parse_groups (multi-class groupBlock): {groups}")
+
+    screenshots = parse_screenshot_urls(MEDIA_HTML)
+    if screenshots != ["https://steamuserimages-a.akamaihd.net/cdn/1.jpg"]:
+        failures.append(f"parse_screenshot_urls: {screenshots}")
+
+    videos = parse_video_links(MEDIA_HTML)
+    if len(videos) != 2:
+        failures.append(f"parse_video_links: {videos}")
+
+    for failure in failures:
+        logger.error(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    logger.info("✅ All Steam parser fixtures matched")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Startup import-time regression check.
+
+Imports bot.py and every cog in a fresh interpreter under `python -X importtime`, prints the
+slowest top-level imports, and exits non-zero if the total exceeds the budget or if a heavy
+optional dependency (Pillow, bs4, NumPy) was imported eagerly instead of through
+helpers/lazy_import.py.
+
+Usage: python "Debugging Scripts/import_time_budget.py" [--budget-ms 1500] [--top 15]
+"""
+
+import argparse
+import logging
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Must only be imported on first use
+LAZY_MODULES = ("PIL", "bs4", "numpy")
+
+# What `python bot.py` imports before connecting: bot.py itself, then every cog in ./cogs
+STARTUP_CODE = """
+import importlib, pathlib
+import bot
+for path in sorted(pathlib.Path("cogs").glob("*.py")):
+    if path.stem != "__init__":
+        importlib.import_module(f"cogs.{path.stem}")
+"""
+
+# config.py int()s these at import; placeholders are enough to import, nothing connects
+PLACEHOLDER_ENV = {"DISCORD_TOKEN": "x", "GUILD_ID": "0", "BOT_ID": "0", "CHANNEL_ID": "0", "ADMIN_DISCORD_ID": "0"}
+
+# "import time: self [us] | cumulative | imported package"
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+logging.basicConfig(
+    level=logging.DEBUG,
+    format="[%(asctime)s] [%(levelname)s] %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S"
+)
+logger = logging.getLogger(__name__)
+
+
+def measure():
+    """Run the startup imports once; returns ({module: cumulative_us} for top-level imports, all modules seen)."""
+    env = dict(os.environ)
+    for key, value in PLACEHOLDER_ENV.items():
+        env.setdefault(key, value)
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_CODE],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        logger.error("❌ Startup imports failed:")
+        logger.error(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "no output")
+        sys.exit(2)
+
+    top_level = {}
+    seen = set()
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        _self_us, cumulative_us, indent, module = match.groups()
+        seen.add(module)
+        # Nested imports are indented under the module that triggered them
+        if len(indent) <= 1:
+            top_level[module] = top_level.get(module, 0) + int(cumulative_us)
+    return top_level, seen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if bot startup imports exceed a time budget")
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    top_level, seen = measure()
+    total_ms = sum(top_level.values()) / 1000
+
+    logger.info(f"Startup imports: {total_ms:.0f}ms across {len(seen)} modules (budget {args.budget_ms:.0f}ms)")
+    for module, cumulative_us in sorted(top_level.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        logger.info(f"  {cumulative_us / 1000:8.1f}ms  {module}")
+
+    failed = False
+    eager = sorted(name for name in seen if name.split(".")[0] in LAZY_MODULES)
+    if eager:
+        logger.error(f"❌ Heavy optional modules imported at startup: {', '.join(eager[:10])}")
+        failed = True
+    if total_ms > args.budget_ms:
+        logger.error(f"❌ Startup imports took {total_ms:.0f}ms, over the {args.budget_ms:.0f}ms budget")
+        failed = True
+
+    if failed:
+        sys.exit(1)
+    logger.info("✅ Startup import time within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Mock Prometheus scrape of the bot's /metrics endpoint.
+
+Starts helpers/metrics.py's endpoint on a free local port, records a sample of every metric
+kind (command, HTTP, DB, loop lag, cache and dispatcher collectors), scrapes it over HTTP and
+checks the exposition: every sample is well formed and declared by a TYPE line, series are
+unique, histogram buckets are cumulative and end in +Inf == _count, and the expected metric
+families are present. Exits non-zero on any problem.
+
+Usage: python "Debugging Scripts/scrape_metrics.py" [--show]
+"""
+
+import argparse
+import asyncio
+import logging
+import re
+import socket
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import helpers
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import aiohttp
+
+from helpers.metrics import (
+    COMMAND_DURATION,
+    COMMAND_ERRORS,
+    CONTENT_TYPE,
+    DB_QUERY_DURATION,
+    HTTP_DURATION,
+    HTTP_REQUESTS,
+    ANILIST_RATELIMIT_REMAINING,
+    LOOP_LAG,
+    LOOP_LAG_HISTOGRAM,
+    start_metrics_server,
+)
+import helpers.message_dispatch  # noqa: F401 - registers the dispatcher collector
+import helpers.steam_helper  # noqa: F401 - registers the Steam cache/limiter collector
+
+EXPECTED_FAMILIES = (
+    "lemegeton_command_duration_seconds",
+    "lemegeton_command_errors_total",
+    "lemegeton_http_requests_total",
+    "lemegeton_http_request_duration_seconds",
+    "lemegeton_anilist_ratelimit_remaining",
+    "lemegeton_db_query_duration_seconds",
+    "lemegeton_event_loop_lag_seconds",
+    "lemegeton_cache_hits_total",
+    "lemegeton_cache_misses_total",
+    "lemegeton_steam_store_tokens",
+    "lemegeton_messages_seen_total",
+)
+
+SAMPLE_RE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*",?)*\})? (\S+)$')
+LABEL_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+HISTOGRAM_SUFFIXES = ("_bucket", "_sum", "_count")
+
+logging.basicConfig(
+    level=logging.DEBUG,
+    format="[%(asctime)s] [%(levelname)s] %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S"
+)
+logger = logging.getLogger(__name__)
+
+
+def record_samples():
+    for seconds in (0.02, 0.3, 1.7):
+        COMMAND_DURATION.observe(seconds, command="anilist")
+    COMMAND_ERRORS.inc(command="steam")
+    HTTP_REQUESTS.inc(api="anilist", status="200")
+    HTTP_REQUESTS.inc(api="steam", status="429")
+    HTTP_DURATION.observe(0.12, api="anilist")
+    ANILIST_RATELIMIT_REMAINING.set(87)
+    DB_QUERY_DURATION.observe(0.003, operation='get "quoted" user')
+    LOOP_LAG.set(0.002)
+    LOOP_LAG_HISTOGRAM.observe(0.002)
+
+
+def parse(text: str):
+    """{family: type} and [(name, labels, value)]; raises ValueError on malformed exposition."""
+    types = {}
+    samples = []
+    for number, line in enumerate(text.splitlines(), 1):
+        if not line:
+            continue
+        if line.startswith("# TYPE "):
+            _, _, name, metric_type = line.split(" ", 3)
+            if name in types:
+                raise ValueError(f"line {number}: duplicate TYPE for {name}")
+            types[name] = metric_type
+            continue
+        if line.startswith("#"):
+            continue
+
+        match = SAMPLE_RE.match(line)
+        if not match:
+            raise ValueError(f"line {number}: malformed sample: {line!r}")
+        name, labels_text, value = match.group(1), match.group(2) or "", match.group(3)
+        family = name
+        for suffix in HISTOGRAM_SUFFIXES:
+            if name.endswith(suffix) and types.get(name[:-len(suffix)]) == "histogram":
+                family = name[:-len(suffix)]
+        if family not in types:
+            raise ValueError(f"line {number}: sample {name} has no TYPE line before it")
+        samples.append((name, dict(LABEL_RE.findall(labels_text)), float(value)))
+    return types, samples
+
+
+def check(types, samples):
+    problems = []
+
+    seen = set()
+    for name, labels, _value in samples:
+        key = (name, tuple(sorted(labels.items())))
+        if key in seen:
+            problems.append(f"duplicate series {name}{labels}")
+        seen.add(key)
+
+    for family, metric_type in types.items():
+        if metric_type != "histogram":
+            continue
+        series = {}
+        for name, labels, value in samples:
+            if not name.startswith(family + "_"):
+                continue
+            base = tuple(sorted((k, v) for k, v in labels.items() if k != "le"))
+            entry = series.setdefault(base, {"buckets": [], "count": None, "sum": None})
+            if name == family + "_bucket":
+                entry["buckets"].append((float(labels["le"].replace("+Inf", "inf")), value))
+            elif name == family + "_count":
+                entry["count"] = value
+            elif name == family + "_sum":
+                entry["sum"] = value
+        for base, entry in series.items():
+            bounds = [bound for bound, _ in entry["buckets"]]
+            counts = [count for _, count in entry["buckets"]]
+            if bounds != sorted(bounds) or not bounds or bounds[-1] != float("inf"):
+                problems.append(f"{family}{dict(base)}: buckets not ascending or missing +Inf")
+            if counts != sorted(counts):
+                problems.append(f"{family}{dict(base)}: bucket counts are not cumulative")
+            if entry["count"] is None or entry["sum"] is None:
+                problems.append(f"{family}{dict(base)}: missing _sum/_count")
+            elif counts and counts[-1] != entry["count"]:
+                problems.append(f"{family}{dict(base)}: +Inf bucket {counts[-1]} != _count {entry['count']}")
+
+    for family in EXPECTED_FAMILIES:
+        if family not in types:
+            problems.append(f"missing metric family {family}")
+    return problems
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def scrape(show: bool) -> int:
+    record_samples()
+    port = free_port()
+    runner = await start_metrics_server("127.0.0.1", port)
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{port}/metrics") as resp:
+                body = await resp.text()
+                content_type = resp.headers.get("Content-Type", "")
+                status = resp.status
+    finally:
+        await runner.cleanup()
+
+    if show:
+        print(body)
+
+    problems = []
+    if status != 200:
+        problems.append(f"HTTP {status}")
+    if content_type != CONTENT_TYPE:
+        problems.append(f"unexpected Content-Type {content_type!r}")
+    try:
+        types, samples = parse(body)
+        problems.extend(check(types, samples))
+    except ValueError as e:
+        problems.append(str(e))
+        types, samples = {}, []
+
+    logger.info(f"Scraped {len(body)} bytes: {len(types)} metric families, {len(samples)} samples")
+    for problem in problems:
+        logger.error(f"❌ {problem}")
+    if problems:
+        return 1
+    logger.info("✅ Metrics exposition is valid")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape and validate the metrics endpoint")
+    parser.add_argument("--show", action="store_true", help="print the scraped exposition")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(scrape(args.show)))
+
+
+if __name__ == "__main__":
+    main()
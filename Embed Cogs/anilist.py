@@ -4,21 +4,25 @@ import re
 import aiohttp
 import asyncio
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import ui
 import math
 import logging
 from typing import Optional, Dict, Any, List, Tuple
 from database import (
     get_all_users,
-    get_all_paginator_states,
     set_paginator_state,
     delete_paginator_state,
-    get_paginator_state
+    get_paginator_state,
+    prune_paginator_states
 )
 from datetime import datetime, timedelta
 from enum import Enum
 import json
+import time
+from collections import OrderedDict
+from helpers.message_dispatch import message_dispatcher
+from helpers.metrics import http_trace_configs
 
 logger = logging.getLogger("AniListCog")
 logger.setLevel(logging.INFO)
@@ -31,9 +35,33 @@ MANGA_URL_RE = re.compile(r"https?://anilist\.co/manga/(\d+)(?:/[^/\s]+)?/?", re
 REVIEW_URL_RE = re.compile(r"https?://anilist\.co/review/(\d+)", re.IGNORECASE)
 CHARACTER_URL_RE = re.compile(r"https?://anilist\.co/character/(\d+)(?:/[^/\s]+)?/?", re.IGNORECASE)
 STAFF_URL_RE = re.compile(r"https?://anilist\.co/staff/(\d+)(?:/[^/\s]+)?/?", re.IGNORECASE)
+# Activity/anime/manga links in one pass (on_message picks activity > anime > manga)
+LINK_URL_RE = re.compile(r"https?://anilist\.co/(activity|anime|manga)/(\d+)", re.IGNORECASE)
+
+# Prefilters for the message dispatcher
+LINK_PREFILTER = r"anilist\.co/(?:activity|anime|manga)/\d"
+REVIEW_PREFILTER = r"anilist\.co/review/\d"
 
 REPLIES_PER_PAGE = 5
 HTML_TIMEOUT = 20  # seconds for parsing fallback HTTP requests
+HTML_CHUNK_SIZE = 16 * 1024    # bytes read per chunk while streaming a fallback page
+HTML_MAX_BYTES = 512 * 1024    # stop reading a fallback page after this much, head complete or not
+FALLBACK_CACHE_TTL = 1800      # seconds a parsed fallback result is reused
+HEAD_END_RE = re.compile(rb"</head\s*>", re.IGNORECASE)
+
+MEDIA_CACHE_TTL = 600      # seconds a fetched media payload / rendered page is reused
+MEDIA_CACHE_SIZE = 256     # entries kept per cache (least recently used are dropped)
+LINK_DEDUP_WINDOW = 120    # seconds in which the same link in the same channel is embedded only once
+
+PROGRESS_BATCH_SIZE = 15        # users per aliased User + MediaList request
+PROGRESS_CONCURRENCY = 3        # progress requests in flight at once
+PROGRESS_CACHE_TTL = 120        # seconds a media's user-progress results are reused
+PROGRESS_UPDATE_INTERVAL = 1.0  # minimum seconds between partial embed edits
+
+REPLY_CACHE_TTL = 300   # seconds a fetched page of activity replies is reused
+REPLY_CACHE_SIZE = 128  # reply pages kept across all activities
+
+PAGINATOR_PRUNE_HOURS = 6  # how often expired paginator state is deleted
 
 DEFAULT_EMBED_COLOR = 0x0F1720
 
@@ -64,6 +92,34 @@ IMG_HTML_RE = re.compile(r'<img[^>]+src=["\'](https?://[^"\']+)["\'][^>]*>', re.
 IMG_CUSTOM_RE = re.compile(r'imgx\(\s*(https?://[^\s)]+)\s*\)', re.I)
 URL_RE = re.compile(r'(https?://[^\s)>\]]+)')
 
+class TTLCache:
+    """Small LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
 def _split_into_segments(text: Optional[str]) -> List[Dict[str, str]]:
     if not text:
         return []
@@ -129,19 +185,125 @@ def _chunk_text(text: str, limit: int = 2000) -> List[str]:
 class AniListCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.session = aiohttp.ClientSession()
-        self._views_restored = False
+        self.session = aiohttp.ClientSession(trace_configs=http_trace_configs())
+        self._media_cache = TTLCache(MEDIA_CACHE_TTL, MEDIA_CACHE_SIZE)   # (media_type, media_id) -> media dict
+        self._embed_cache = TTLCache(MEDIA_CACHE_TTL, MEDIA_CACHE_SIZE)   # (media_id, page) -> [embed dicts]
+        self._recent_links: Dict[Tuple[int, str, int], float] = {}       # (channel_id, kind, id) -> last embed time
+        self._progress_cache = TTLCache(PROGRESS_CACHE_TTL, MEDIA_CACHE_SIZE)  # (media_type, media_id) -> user entries
+        self._activity_cache = TTLCache(REPLY_CACHE_TTL, MEDIA_CACHE_SIZE)     # activity_id -> activity (without replies)
+        self._reply_cache = TTLCache(REPLY_CACHE_TTL, REPLY_CACHE_SIZE)        # (activity_id, page) -> replies on that page
+        self._reply_fetches: Dict[Tuple[int, int], asyncio.Task] = {}         # in-flight reply page requests
+        self._fallback_cache = TTLCache(FALLBACK_CACHE_TTL, MEDIA_CACHE_SIZE)  # ("media"|"review", ...) -> parsed HTML result
+
+    async def cog_load(self):
+        message_dispatcher.register("anilist_links", self.on_message, pattern=LINK_PREFILTER)
+        message_dispatcher.register("anilist_review", self.on_message_review, pattern=REVIEW_PREFILTER)
+        # Paginator buttons are routed by custom_id; state is read from the database on click
+        self.bot.add_dynamic_items(ActivityPageButton, MediaButton, MediaSelect)
+        self.prune_paginators.start()
 
     async def cog_unload(self):
+        message_dispatcher.unregister("anilist_links")
+        message_dispatcher.unregister("anilist_review")
+        self.bot.remove_dynamic_items(ActivityPageButton, MediaButton, MediaSelect)
+        self.prune_paginators.cancel()
+        for task in self._reply_fetches.values():
+            task.cancel()
         await self.session.close()
 
+    @tasks.loop(hours=PAGINATOR_PRUNE_HOURS)
+    async def prune_paginators(self):
+        try:
+            await prune_paginator_states()
+        except Exception:
+            logger.exception("Failed to prune expired paginator state")
+
 
     # ---------------------
     # Enhanced User Progress System
     # ---------------------
-    async def build_user_progress_embed(self, media: dict, media_type: str, filter_type: ProgressFilter = ProgressFilter.ACTIVE_ONLY) -> Optional[discord.Embed]:
-        """Build embed showing registered users' progress for a given media with enhanced filtering"""
-        import time
+    async def _fetch_progress_batch(self, session: aiohttp.ClientSession, media_id: int, media_type: str,
+                                    usernames: List[str]) -> Dict[str, Optional[dict]]:
+        """One aliased request for several users' list entry on a media. Keys are lowercase usernames."""
+        var_defs = ", ".join(f"$n{i}: String" for i in range(len(usernames)))
+        fields = "\n".join(
+            f"u{i}: User(name: $n{i}) {{ mediaListOptions {{ scoreFormat }} }}\n"
+            f"l{i}: MediaList(userName: $n{i}, mediaId: $mediaId, type: $type) {{ ...Entry }}"
+            for i in range(len(usernames))
+        )
+        query = (
+            f"query($mediaId: Int, $type: MediaType, {var_defs}) {{\n{fields}\n}}\n"
+            "fragment Entry on MediaList { progress score status updatedAt }"
+        )
+        variables = {"mediaId": media_id, "type": media_type, **{f"n{i}": name for i, name in enumerate(usernames)}}
+
+        async with session.post(ANILIST_API, json={"query": query, "variables": variables}) as resp:
+            # Users without an entry make AniList answer 404 while still returning the other aliases
+            payload = await resp.json(content_type=None)
+        data = (payload or {}).get("data")
+        if data is None:
+            raise RuntimeError(f"AniList returned HTTP {resp.status} without data")
+
+        results = {}
+        for i, name in enumerate(usernames):
+            user_data = data.get(f"u{i}")
+            if not user_data:
+                results[name.lower()] = None
+                continue
+            entry = data.get(f"l{i}") or {}
+            results[name.lower()] = {
+                "score_format": (user_data.get("mediaListOptions") or {}).get("scoreFormat", "POINT_10"),
+                "progress": entry.get("progress", 0) or 0,
+                "score": entry.get("score", 0) or 0,
+                "status": entry.get("status"),
+                "updated_at": entry.get("updatedAt"),
+            }
+        return results
+
+    async def fetch_users_media_progress(self, media_id: int, media_type: str, usernames: List[str],
+                                         on_batch=None) -> Dict[str, Optional[dict]]:
+        """
+        Every given user's entry for one media, fetched PROGRESS_BATCH_SIZE users per request with
+        PROGRESS_CONCURRENCY requests in flight. `on_batch(results_so_far)` is awaited as batches land.
+        Complete results are cached per media for PROGRESS_CACHE_TTL seconds (filter changes reuse them).
+        """
+        cache_key = (media_type.upper(), int(media_id))
+        cached = self._progress_cache.get(cache_key)
+        if cached is not None and all(u.lower() in cached for u in usernames):
+            return cached
+
+        results: Dict[str, Optional[dict]] = {}
+        batches = [usernames[i:i + PROGRESS_BATCH_SIZE] for i in range(0, len(usernames), PROGRESS_BATCH_SIZE)]
+        semaphore = asyncio.Semaphore(PROGRESS_CONCURRENCY)
+        failed = 0
+
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15), trace_configs=http_trace_configs()) as session:
+            async def run(batch):
+                nonlocal failed
+                try:
+                    async with semaphore:
+                        results.update(await self._fetch_progress_batch(session, media_id, media_type, batch))
+                except Exception as e:
+                    failed += 1
+                    logger.debug(f"Progress batch of {len(batch)} users failed: {e}")
+                    return
+                if on_batch:
+                    await on_batch(results)
+
+            await asyncio.gather(*(run(b) for b in batches))
+
+        if not failed:
+            self._progress_cache.set(cache_key, results)
+        else:
+            logger.warning(f"{failed}/{len(batches)} progress batches failed for media {media_id}")
+        return results
+
+    async def build_user_progress_embed(self, media: dict, media_type: str, filter_type: ProgressFilter = ProgressFilter.ACTIVE_ONLY,
+                                        on_update=None) -> Optional[discord.Embed]:
+        """
+        Build embed showing registered users' progress for a given media with enhanced filtering.
+        If `on_update(embed)` is given it receives partial embeds (throttled) while batches are still arriving.
+        """
         start_time = time.time()
         logger.info(f"Building user progress embed for media ID: {media.get('id')}, type: {media_type}, filter: {filter_type.value}")
         
@@ -157,101 +319,73 @@ class AniListCog(commands.Cog):
                 )
 
             col_name = "Episodes" if media_type.upper() == "ANIME" else "Chapters"
-            
-            # Enhanced filtering with progress insights
-            filtered_users_data = []
-            total_users_checked = 0
-            
-            # Use a single session for all requests to improve performance
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
-                for user in users:
-                    discord_name = user[3]  # Discord username (from username column)
-                    anilist_username = user[4] if len(user) > 4 else None  # AniList username
-                    
-                    if not anilist_username:
-                        logger.debug(f"Skipping user {discord_name} - no AniList username")
-                        continue
-                    
-                    total_users_checked += 1
-                    logger.debug(f"Fetching progress for {discord_name} (AniList: {anilist_username})")
-                    
-                    # Enhanced query to get more progress details for filtering
-                    query = """
-                    query($userName: String, $mediaId: Int, $type: MediaType) {
-                        User(name: $userName) {
-                            mediaListOptions { scoreFormat }
-                        }
-                        MediaList(userName: $userName, mediaId: $mediaId, type: $type) {
-                            progress
-                            score
-                            status
-                            updatedAt
-                            startedAt { year month day }
-                            completedAt { year month day }
-                        }
-                    }
-                    """
-                    variables = {"userName": anilist_username, "mediaId": media.get("id", 0), "type": media_type}
 
-                    try:
-                        async with session.post(ANILIST_API, 
-                                              json={"query": query, "variables": variables},
-                                              timeout=10) as resp:
-                            if resp.status != 200:
-                                logger.debug(f"API error {resp.status} for user {anilist_username}")
-                                continue
-                            payload = await resp.json()
-                    except asyncio.TimeoutError:
-                        logger.debug(f"Timeout fetching progress for {anilist_username}")
-                        continue
-                    except Exception as e:
-                        logger.debug(f"Error fetching progress for {anilist_username}: {e}")
+            # (discord name, AniList username) in display order; users without AniList are skipped
+            linked = [(user[3], user[4]) for user in users if len(user) > 4 and user[4]]
+
+            def build(results: Dict[str, Optional[dict]], done: bool) -> discord.Embed:
+                filtered_users_data = []
+                total_users_checked = 0
+                for discord_name, anilist_username in linked:
+                    key = anilist_username.lower()
+                    if key not in results:
                         continue
-                    
-                    user_data = payload.get("data", {}).get("User")
-                    media_list = payload.get("data", {}).get("MediaList")
-                    
-                    if not user_data:
-                        logger.debug(f"No user data found for {anilist_username}")
+                    total_users_checked += 1
+                    entry = results[key]
+                    if not entry:
                         continue
-                    
-                    # Collect comprehensive user progress data
-                    progress = media_list.get("progress", 0) if media_list else 0
-                    score = media_list.get("score", 0) if media_list else 0
-                    status = media_list.get("status") if media_list else None
-                    updated_at = media_list.get("updatedAt") if media_list else None
-                    
+
                     # Calculate if user is recently active (within 30 days)
                     is_recent = False
-                    if updated_at:
+                    if entry["updated_at"]:
                         try:
-                            updated_time = datetime.fromtimestamp(updated_at)
+                            updated_time = datetime.fromtimestamp(entry["updated_at"])
                             is_recent = (datetime.now() - updated_time) <= timedelta(days=30)
                         except:
                             is_recent = False
-                    
-                    # Create user data object for filtering
+
                     user_progress_data = {
                         "discord_name": discord_name,
                         "anilist_username": anilist_username,
-                        "progress": progress,
-                        "score": score,
-                        "status": status,
+                        "progress": entry["progress"],
+                        "score": entry["score"],
+                        "status": entry["status"],
                         "is_recent": is_recent,
-                        "score_format": user_data.get("mediaListOptions", {}).get("scoreFormat", "POINT_10")
+                        "score_format": entry["score_format"]
                     }
-                    
-                    # Apply filtering logic
-                    should_include = self._apply_progress_filter(user_progress_data, filter_type, media)
-                    
-                    if should_include:
+                    if self._apply_progress_filter(user_progress_data, filter_type, media):
                         filtered_users_data.append(user_progress_data)
-                    
                     if len(filtered_users_data) >= 20:  # Limit display to avoid embed size issues
                         break
+
+                embed = self._build_filtered_progress_embed(filtered_users_data, media, media_type, filter_type, col_name,
+                                                            total_users_checked, time.time() - start_time)
+                if not done:
+                    loading = f"⏳ Loaded {len(results)}/{len(linked)} users…"
+                    embed.set_footer(text=f"{embed.footer.text} | {loading}" if embed.footer and embed.footer.text else loading)
+                return embed
+
+            last_update = 0.0
+
+            async def on_batch(results):
+                nonlocal last_update
+                if not on_update or len(results) >= len(linked):
+                    return
+                now = time.monotonic()
+                if now - last_update < PROGRESS_UPDATE_INTERVAL:
+                    return
+                last_update = now
+                try:
+                    await on_update(build(results, done=False))
+                except Exception as e:
+                    logger.debug(f"Partial progress update failed: {e}")
+
+            results = await self.fetch_users_media_progress(
+                media.get("id", 0), media_type, [name for _, name in linked], on_batch=on_batch
+            )
             
             # Build the progress display with insights
-            return self._build_filtered_progress_embed(filtered_users_data, media, media_type, filter_type, col_name, total_users_checked, time.time() - start_time)
+            return build(results, done=True)
             
         except Exception as e:
             logger.error(f"Error building user progress embed: {e}", exc_info=True)
@@ -363,20 +497,11 @@ class AniListCog(commands.Cog):
     # ---------------------
     # Persistence helpers (using database)
     # ---------------------
-    async def _load_state(self) -> Dict[str, Any]:
-        """Load paginator state from database."""
-        try:
-            return await get_all_paginator_states()
-        except Exception:
-            logger.exception("Failed to load paginator state from database, starting fresh.")
-            return {"messages": {}, "media_messages": {}}
-
-    async def _save_state(self, state: Dict[str, Any]):
-        """Save state is now handled by individual set_paginator_state calls."""
-        pass  # No longer needed - state is saved per-message in database
+    # Nothing is registered per message: ActivityPageButton / MediaButton / MediaSelect match the
+    # custom_ids of every paginator ever sent and resolve their state when clicked.
 
     # Activity persistence (messages)
-    async def _add_paginator_persistence(self, message_id: int, channel_id: int, activity_id: int, total_pages: int, current_page: int = 1):
+    async def _add_paginator_persistence(self, message_id: int, channel_id: int, activity_id: int, total_pages: int, current_page: int = 1, view: "AniListCog.Paginator" = None):
         """Add activity paginator persistence to database."""
         guild_id = str(channel_id)  # We'll need to get guild_id properly in production
         await set_paginator_state(
@@ -388,11 +513,9 @@ class AniListCog(commands.Cog):
             current_page=current_page,
             activity_id=activity_id
         )
-        view = self.Paginator(self, message_id, channel_id, activity_id, total_pages, current_page)
-        try:
-            self.bot.add_view(view, message_id=message_id)
-        except Exception:
-            logger.exception("Failed to add_view for activity paginator (non-fatal).")
+        if view is None:
+            view = self.Paginator(self, message_id, channel_id, activity_id, total_pages, current_page)
+        view.message_id = str(message_id)
         return view
 
     async def _remove_paginator_persistence(self, message_id: int):
@@ -400,7 +523,7 @@ class AniListCog(commands.Cog):
         await delete_paginator_state(str(message_id))
 
     # Media persistence
-    async def _add_media_persistence(self, message_id: int, channel_id: int, media_id: int, media_type: str, total_pages: int, current_page: int = 1):
+    async def _add_media_persistence(self, message_id: int, channel_id: int, media_id: int, media_type: str, total_pages: int, current_page: int = 1, view: "AniListCog.MediaPaginator" = None):
         """Add media paginator persistence to database."""
         guild_id = str(channel_id)  # We'll need to get guild_id properly in production
         await set_paginator_state(
@@ -413,57 +536,15 @@ class AniListCog(commands.Cog):
             media_id=media_id,
             media_type=media_type
         )
-        view = self.MediaPaginator(self, message_id, channel_id, media_id, media_type, total_pages, current_page)
-        try:
-            self.bot.add_view(view, message_id=message_id)
-        except Exception:
-            logger.exception("Failed to add_view for media paginator (non-fatal).")
+        if view is None:
+            view = self.MediaPaginator(self, message_id, channel_id, media_id, media_type, total_pages, current_page)
+        view.message_id = str(message_id)
         return view
 
     async def _remove_media_persistence(self, message_id: int):
         """Remove media paginator persistence from database."""
         await delete_paginator_state(str(message_id))
 
-    async def restore_persistent_views(self):
-        """Restore paginator views from database on bot startup."""
-        state = await self._load_state()
-        # Restore activity paginators
-        for mid, info in list(state.get("messages", {}).items()):
-            try:
-                view = self.Paginator(
-                    self,
-                    int(mid),
-                    int(info.get("channel_id", 0)),
-                    int(info.get("activity_id", 0)),
-                    int(info.get("total_pages", 1)),
-                    int(info.get("current_page", 1)),
-                )
-                self.bot.add_view(view, message_id=int(mid))
-            except Exception:
-                logger.exception("Failed to restore persistent paginator for message %s", mid)
-
-        # Restore media paginators
-        for mid, info in list(state.get("media_messages", {}).items()):
-            try:
-                view = self.MediaPaginator(
-                    self,
-                    int(mid),
-                    int(info.get("channel_id", 0)),
-                    int(info.get("media_id", 0)),
-                    info.get("media_type", "ANIME"),
-                    int(info.get("total_pages", 1)),
-                    int(info.get("current_page", 1)),
-                )
-                self.bot.add_view(view, message_id=int(mid))
-            except Exception:
-                logger.exception("Failed to restore persistent media paginator for message %s", mid)
-
-    @commands.Cog.listener()
-    async def on_ready(self):
-        if not self._views_restored:
-            await self.restore_persistent_views()
-            self._views_restored = True
-
     # ---------------------
     # Text cleaning / media extraction
     # ---------------------
@@ -588,6 +669,10 @@ class AniListCog(commands.Cog):
         return embed
 
     async def fetch_activity(self, activity_id: int) -> Optional[dict]:
+        """Fetch the activity itself; replies are fetched a page at a time by get_reply_page."""
+        cached = self._activity_cache.get(activity_id)
+        if cached is not None:
+            return cached
         query = """
         query($id: Int) {
           Activity(id: $id) {
@@ -599,7 +684,6 @@ class AniListCog(commands.Cog):
               replyCount
               siteUrl
               user { id name siteUrl avatar { large } }
-              replies { id text likeCount user { id name siteUrl avatar { large } } }
             }
             ... on MessageActivity {
               id
@@ -609,7 +693,6 @@ class AniListCog(commands.Cog):
               siteUrl
               messenger { id name siteUrl avatar { large } }
               recipient { id name siteUrl avatar { large } }
-              replies { id text likeCount user { id name siteUrl avatar { large } } }
             }
             ... on ListActivity {
               id
@@ -620,7 +703,6 @@ class AniListCog(commands.Cog):
               siteUrl
               user { id name siteUrl avatar { large } }
               media { id siteUrl title { romaji } coverImage { large } bannerImage }
-              replies { id text likeCount user { id name siteUrl avatar { large } } }
             }
           }
         }
@@ -641,11 +723,68 @@ class AniListCog(commands.Cog):
                     logger.warning("AniList returned no Activity for id %s. Response: %s", activity_id, text)
                     return None
 
-                return js["data"]["Activity"]
+                activity = js["data"]["Activity"]
+                self._activity_cache.set(activity_id, activity)
+                return activity
         except Exception:
             logger.exception("AniList API fetch failed.")
             return None
 
+    # ---------------------
+    # Activity replies (paged on demand)
+    # ---------------------
+    @staticmethod
+    def activity_total_pages(activity: dict) -> int:
+        """Page 1 is the activity, then REPLIES_PER_PAGE replies per page."""
+        return 1 + math.ceil(max(0, activity.get("replyCount") or 0) / REPLIES_PER_PAGE)
+
+    async def _fetch_reply_page(self, activity_id: int, page: int) -> Optional[List[dict]]:
+        # Paginator page 2 holds the first REPLIES_PER_PAGE replies, i.e. API page 1
+        query = """
+        query($id: Int, $page: Int, $perPage: Int) {
+          Page(page: $page, perPage: $perPage) {
+            activityReplies(activityId: $id) { id text likeCount user { id name siteUrl avatar { large } } }
+          }
+        }
+        """
+        variables = {"id": activity_id, "page": page - 1, "perPage": REPLIES_PER_PAGE}
+        try:
+            async with self.session.post(ANILIST_API, json={"query": query, "variables": variables}) as resp:
+                if resp.status != 200:
+                    logger.error("AniList API error %s fetching replies page %s of activity %s", resp.status, page, activity_id)
+                    return None
+                js = await resp.json()
+            replies = ((js or {}).get("data") or {}).get("Page", {}).get("activityReplies") or []
+            self._reply_cache.set((activity_id, page), replies)
+            return replies
+        except Exception:
+            logger.exception("Failed to fetch replies page %s of activity %s", page, activity_id)
+            return None
+
+    def _reply_fetch(self, activity_id: int, page: int) -> asyncio.Task:
+        """One in-flight request per (activity, page), shared by clicks and background prefetches."""
+        key = (activity_id, page)
+        task = self._reply_fetches.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_reply_page(activity_id, page))
+            self._reply_fetches[key] = task
+            task.add_done_callback(lambda _: self._reply_fetches.pop(key, None))
+        return task
+
+    async def get_reply_page(self, activity_id: int, page: int) -> Optional[List[dict]]:
+        cached = self._reply_cache.get((activity_id, page))
+        if cached is not None:
+            return cached
+        return await asyncio.shield(self._reply_fetch(activity_id, page))
+
+    def prefetch_reply_page(self, activity: dict, page: int):
+        """Warm the cache for `page` in the background so the next click renders without waiting."""
+        activity_id = activity.get("id")
+        if not activity_id or page < 2 or page > self.activity_total_pages(activity):
+            return
+        if self._reply_cache.get((activity_id, page)) is None:
+            self._reply_fetch(activity_id, page)
+
     async def render_page(self, activity: Optional[dict], page: int):
         embeds: List[discord.Embed] = []
         if not activity:
@@ -674,11 +813,11 @@ class AniListCog(commands.Cog):
             embeds.append(embed)
             return embeds
 
-        # Page >= 2 -> replies
-        replies = activity.get("replies") or []
-        start = (page - 2) * REPLIES_PER_PAGE
-        end = start + REPLIES_PER_PAGE
-        sliced = replies[start:end]
+        # Page >= 2 -> replies, fetched for this page only; the following page is prefetched
+        sliced = await self.get_reply_page(activity["id"], page)
+        if sliced is None:
+            return [discord.Embed(description="⚠️ Could not fetch replies for this page.", color=discord.Color.red())]
+        self.prefetch_reply_page(activity, page + 1)
         for reply in sliced:
             r_user = reply.get("user") or {}
             r_text = reply.get("text") or ""
@@ -695,20 +834,17 @@ class AniListCog(commands.Cog):
         def __init__(self, cog: "AniListCog", message_id: int, channel_id: int, activity_id: int, total_pages: int, current_page: int = 1):
             super().__init__(timeout=None)
             self.cog = cog
-            self.message_id = str(message_id)
+            # None until the message is sent; custom ids are keyed by activity so the view can go out with the send
+            self.message_id = str(message_id) if message_id else None
             self.channel_id = int(channel_id)
             self.activity_id = int(activity_id)
             self.total_pages = max(1, int(total_pages))
             self.current_page = max(1, int(current_page))
 
-            self.prev_btn = ui.Button(label="⬅ Prev", style=discord.ButtonStyle.primary, custom_id=f"anilist:prev:{self.message_id}")
-            self.next_btn = ui.Button(label="Next ➡", style=discord.ButtonStyle.primary, custom_id=f"anilist:next:{self.message_id}")
-
-            self.prev_btn.disabled = (self.current_page <= 1)
-            self.next_btn.disabled = (self.current_page >= self.total_pages)
-
-            self.prev_btn.callback = self.prev_page
-            self.next_btn.callback = self.next_page
+            # Clicks are routed to prev_page/next_page by ActivityPageButton
+            self.prev_btn = ActivityPageButton("prev", self.activity_id)
+            self.next_btn = ActivityPageButton("next", self.activity_id)
+            self._update_buttons_disabled()
 
             self.add_item(self.prev_btn)
             self.add_item(self.next_btn)
@@ -731,15 +867,16 @@ class AniListCog(commands.Cog):
             )
 
         def _update_buttons_disabled(self):
-            self.prev_btn.disabled = (self.current_page <= 1)
-            self.next_btn.disabled = (self.current_page >= self.total_pages)
+            self.prev_btn.item.disabled = (self.current_page <= 1)
+            self.next_btn.item.disabled = (self.current_page >= self.total_pages)
 
         async def prev_page(self, interaction: discord.Interaction):
             try:
                 msg_state = await self._load_message_state()
                 if not msg_state:
-                    await interaction.response.send_message("⚠️ Paginator state missing.", ephemeral=True)
+                    await interaction.response.send_message(PAGINATOR_EXPIRED_MESSAGE, ephemeral=True)
                     return
+                self.total_pages = max(1, int(msg_state.get("total_pages", self.total_pages)))
                 current = int(msg_state.get("current_page", self.current_page))
                 if current <= 1:
                     await interaction.response.send_message("You are already on the first page.", ephemeral=True)
@@ -770,10 +907,11 @@ class AniListCog(commands.Cog):
             try:
                 msg_state = await self._load_message_state()
                 if not msg_state:
-                    await interaction.response.send_message("⚠️ Paginator state missing.", ephemeral=True)
+                    await interaction.response.send_message(PAGINATOR_EXPIRED_MESSAGE, ephemeral=True)
                     return
+                self.total_pages = max(1, int(msg_state.get("total_pages", self.total_pages)))
                 current = int(msg_state.get("current_page", self.current_page))
-                if current >= int(msg_state.get("total_pages", self.total_pages)):
+                if current >= self.total_pages:
                     await interaction.response.send_message("You are already on the last page.", ephemeral=True)
                     return
                 new_page = current + 1
@@ -853,28 +991,56 @@ class AniListCog(commands.Cog):
             logger.exception("AniList media API fetch failed.")
             return None
 
+    # ---------------------
+    # HTML fallback helpers
+    # ---------------------
+    async def _fetch_html_head(self, url: str, markers: Tuple[str, ...]) -> str:
+        """
+        Stream a page and stop once </head> has arrived and contains one of `markers`
+        (otherwise keep reading into the body, up to HTML_MAX_BYTES).
+        """
+        buf = bytearray()
+        async with self.session.get(url, timeout=HTML_TIMEOUT, headers={"User-Agent": "AniListBot/1.0"}) as resp:
+            charset = resp.charset or "utf-8"
+            async for chunk in resp.content.iter_chunked(HTML_CHUNK_SIZE):
+                # Only the new chunk (plus a tag's worth of overlap) needs searching
+                search_from = max(0, len(buf) - 8)
+                buf.extend(chunk)
+                if len(buf) >= HTML_MAX_BYTES:
+                    break
+                if HEAD_END_RE.search(buf, search_from) and any(m.encode() in buf for m in markers):
+                    break
+        logger.debug("Read %d bytes of %s", len(buf), url)
+        return buf.decode(charset, errors="replace")
+
     async def fetch_media_parse_fallback(self, media_id: int, media_type: str) -> Optional[dict]:
         """
         Parsing fallback: attempt to fetch the AniList HTML page and extract key fields.
-        This is a best-effort fallback and logs progress percentages.
+        Only the page head is read when it carries the og:* tags; parsing runs in a worker thread.
         """
         base = "anime" if media_type.upper().startswith("ANIME") else "manga"
         url = f"https://anilist.co/{base}/{media_id}"
+        cache_key = ("media", base, int(media_id))
+        cached = self._fallback_cache.get(cache_key)
+        if cached is not None:
+            return cached
         logger.info("Parsing mode started: 0% — attempting HTML fallback for %s", url)
-        progress = 0
 
         try:
             # Step 1: fetch HTML
-            progress = 10
-            logger.info("Parsing mode: %d%% — fetching HTML...", progress)
-            async with self.session.get(url, timeout=HTML_TIMEOUT, headers={"User-Agent": "AniListBot/1.0"}) as resp:
-                html = await resp.text()
+            logger.info("Parsing mode: 10% — fetching HTML...")
+            html = await self._fetch_html_head(url, ("og:title",))
         except Exception as e:
             logger.exception("Parsing fetch failed at 10%%")
             return None
-        progress = 30
-        logger.info("Parsing mode: %d%% — HTML fetched, extracting meta...", progress)
+        logger.info("Parsing mode: 30% — HTML fetched, extracting meta...")
+
+        media = await asyncio.to_thread(self._parse_media_html, html, int(media_id), url)
+        self._fallback_cache.set(cache_key, media)
+        return media
 
+    def _parse_media_html(self, html: str, media_id: int, url: str) -> dict:
+        """Extract a media dict shaped like the API response from AniList page HTML (runs off the event loop)."""
         try:
             # Step 2: extract Open Graph tags (og:title, og:description, og:image)
             og_title = re.search(r'<meta\s+property=["\']og:title["\']\s+content=["\']([^"\']+)["\']', html)
@@ -997,15 +1163,23 @@ class AniListCog(commands.Cog):
         """
         Primary: try GraphQL API. If that fails or returns None, fall back to parse fallback.
         Logs errors and announces parsing mode start in logs with percent progress.
+        Results are reused for MEDIA_CACHE_TTL seconds.
         """
+        cache_key = (media_type.upper(), int(media_id))
+        cached = self._media_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         api_resp = await self.fetch_media_api(media_id, media_type)
         if api_resp:
+            self._media_cache.set(cache_key, api_resp)
             return api_resp
         # API failed — log and start parsing fallback
         logger.warning("AniList API failed for media %s %s — starting parsing fallback", media_type, media_id)
         parsed = await self.fetch_media_parse_fallback(media_id, media_type)
         if parsed:
             logger.info("Parsing fallback succeeded for media %s %s", media_type, media_id)
+            self._media_cache.set(cache_key, parsed)
         else:
             logger.error("Parsing fallback failed for media %s %s", media_type, media_id)
         return parsed
@@ -1152,6 +1326,34 @@ class AniListCog(commands.Cog):
         embed.set_footer(text="AniList Media")
         return embed
 
+    async def get_media_page_embeds(self, media_id: int, media_type: str, page: int) -> Optional[List[discord.Embed]]:
+        """Rendered media page, served from the (media_id, page) embed cache when fresh."""
+        cache_key = (int(media_id), page)
+        payloads = self._embed_cache.get(cache_key)
+        if payloads is not None:
+            return [discord.Embed.from_dict(p) for p in payloads]
+
+        media = await self.fetch_media(media_id, media_type)
+        if not media:
+            return None
+        embeds = self.render_media_pages(media, page=page, total_pages=2)
+        self._embed_cache.set(cache_key, [e.to_dict() for e in embeds])
+        return embeds
+
+    def _is_duplicate_link(self, key: Tuple[int, str, int]) -> bool:
+        """True if this (channel_id, kind, id) link was embedded (or is being embedded) within LINK_DEDUP_WINDOW."""
+        last = self._recent_links.get(key)
+        return last is not None and time.monotonic() - last < LINK_DEDUP_WINDOW
+
+    def _record_link(self, key: Tuple[int, str, int]):
+        now = time.monotonic()
+        if len(self._recent_links) > 1000:
+            self._recent_links = {k: t for k, t in self._recent_links.items() if now - t < LINK_DEDUP_WINDOW}
+        self._recent_links[key] = now
+
+    def _forget_link(self, key: Tuple[int, str, int]):
+        self._recent_links.pop(key, None)
+
     def render_media_pages(self, media: dict, page: int, total_pages: int) -> List[discord.Embed]:
         embeds: List[discord.Embed] = []
         if not media:
@@ -1317,64 +1519,28 @@ class AniListCog(commands.Cog):
         def __init__(self, cog: "AniListCog", message_id: int, channel_id: int, media_id: int, media_type: str, total_pages: int, current_page: int = 1):
             super().__init__(timeout=None)
             self.cog = cog
-            self.message_id = str(message_id)
+            # None until the message is sent; custom ids are keyed by media so the view can go out with the send
+            self.message_id = str(message_id) if message_id else None
             self.channel_id = int(channel_id)
             self.media_id = int(media_id)
             self.media_type = media_type
             self.total_pages = max(1, int(total_pages))
             self.current_page = max(1, int(current_page))
 
-            # Buttons
-            self.main_button = ui.Button(
-                label="📖 Description",
-                style=discord.ButtonStyle.primary,
-                custom_id=f"media_next:{self.message_id}"
-            )
-            self.back_button = ui.Button(
-                label="⬅ Back to Main Page",
-                style=discord.ButtonStyle.secondary,
-                custom_id=f"media_prev:{self.message_id}"
-            )
-            self.rec_button = ui.Button(
-                label="🎯 Recommendations",
-                style=discord.ButtonStyle.success,
-                custom_id=f"media_rec:{self.message_id}"
-            )
-
-            self.main_button.callback = self.show_description
-            self.back_button.callback = self.show_main
-            self.rec_button.callback = self.show_recommendations
+            # Buttons and dropdown; clicks are routed back here by MediaButton / MediaSelect
+            self.main_button = MediaButton("next", self.media_type, self.media_id)
+            self.back_button = MediaButton("prev", self.media_type, self.media_id)
+            self.rec_button = MediaButton("rec", self.media_type, self.media_id)
             self.add_item(self.main_button)
             self.add_item(self.rec_button)
-
-            # Dropdown options
-            options = [
-                discord.SelectOption(label="🔗 Relations", value="relations", description="Show related media"),
-                discord.SelectOption(label="🎭 Characters (Main)", value="characters_main", description="Main characters"),
-                discord.SelectOption(label="🌟 Support Cast", value="characters_support", description="Support characters"),
-                discord.SelectOption(label="🛡️ Staff", value="staff", description="All staff"),
-                discord.SelectOption(label="📊 Stats Distribution", value="stats", description="Status & score distribution"),
-                discord.SelectOption(label="🎯 Recommendations", value="recommendations", description="Top recommendations"),
-                discord.SelectOption(label="🗂️ Tags", value="tags", description="All tags"),
-                discord.SelectOption(label="👥 User Progress", value="user_progress", description="See registered users' progress"),
-            ]
-            select = ui.Select(
-                placeholder="Choose details...",
-                min_values=1,
-                max_values=1,
-                options=options,
-                custom_id=f"media_select:{self.message_id}"
-            )
-            select.callback = self.select_callback
-            self.add_item(select)
+            self.add_item(MediaSelect(self.media_type, self.media_id))
 
         async def show_description(self, interaction: discord.Interaction):
             try:
-                media = await self.cog.fetch_media(self.media_id, self.media_type)
-                if not media:
+                embeds = await self.cog.get_media_page_embeds(self.media_id, self.media_type, page=2)
+                if not embeds:
                     await interaction.response.send_message("❌ Could not fetch description.", ephemeral=True)
                     return
-                embeds = self.cog.render_media_pages(media, page=2, total_pages=2)
                 self.clear_items()
                 self.add_item(self.back_button)
                 self.add_item(self.rec_button)
@@ -1391,11 +1557,10 @@ class AniListCog(commands.Cog):
 
         async def show_main(self, interaction: discord.Interaction):
             try:
-                media = await self.cog.fetch_media(self.media_id, self.media_type)
-                if not media:
+                embeds = await self.cog.get_media_page_embeds(self.media_id, self.media_type, page=1)
+                if not embeds:
                     await interaction.response.send_message("❌ Could not fetch main page.", ephemeral=True)
                     return
-                embeds = self.cog.render_media_pages(media, page=1, total_pages=2)
                 self.clear_items()
                 self.add_item(self.main_button)
                 self.add_item(self.rec_button)
@@ -1443,7 +1608,13 @@ class AniListCog(commands.Cog):
                     
                     # Create enhanced user progress view with filtering
                     progress_view = self.UserProgressView(self.cog, media, self.media_type, self.message_id)
-                    embed = await self.cog.build_user_progress_embed(media, self.media_type, ProgressFilter.ACTIVE_ONLY)
+
+                    async def show_partial(partial):
+                        await interaction.followup.edit_message(interaction.message.id, embeds=[partial], view=progress_view)
+
+                    embed = await self.cog.build_user_progress_embed(
+                        media, self.media_type, ProgressFilter.ACTIVE_ONLY, on_update=show_partial
+                    )
                     
                     if embed:
                         await interaction.followup.edit_message(interaction.message.id, embeds=[embed], view=progress_view)
@@ -1554,8 +1725,11 @@ class AniListCog(commands.Cog):
                         self.current_filter = ProgressFilter(selected_filter)
                         
                         # Generate new embed with selected filter
+                        async def show_partial(partial):
+                            await interaction.followup.edit_message(interaction.message.id, embeds=[partial], view=self)
+
                         embed = await self.cog.build_user_progress_embed(
-                            self.media, self.media_type, self.current_filter
+                            self.media, self.media_type, self.current_filter, on_update=show_partial
                         )
                         
                         if embed:
@@ -1602,89 +1776,104 @@ class AniListCog(commands.Cog):
 
 
     # ---------------------
-    # Listener (integrates activity + anime + manga handling)
+    # Message handler (activity + anime + manga links, routed by the message dispatcher)
     # ---------------------
-    @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
         # ignore bots
         if message.author.bot:
             return
 
+        # One scan for every link kind; the first link of each kind is used
+        links = {}
+        for m in LINK_URL_RE.finditer(message.content):
+            links.setdefault(m.group(1).lower(), int(m.group(2)))
+
+        # The same link reposted in the same channel shortly after is not embedded again.
+        # It is recorded before the fetch so a quick repost doesn't embed twice, and forgotten
+        # again if nothing was sent, so a repost after a failed fetch is retried.
+        link_key = None
+        for kind in ("activity", "anime", "manga"):
+            if kind in links:
+                link_key = (message.channel.id, kind, links[kind])
+                if self._is_duplicate_link(link_key):
+                    logger.debug("Skipping duplicate %s link %s in channel %s", kind, links[kind], message.channel.id)
+                    return
+                self._record_link(link_key)
+                break
+        if link_key is None:
+            return
+
+        sent = False
+        try:
+            sent = await self._send_link_embed(message, links)
+        finally:
+            if not sent:
+                self._forget_link(link_key)
+
+    async def _send_link_embed(self, message: discord.Message, links: Dict[str, int]) -> bool:
+        """Embed the message's activity, anime or manga link. True once the embed was sent."""
         # Activity link handling
-        m = ACTIVITY_URL_RE.search(message.content)
-        if m:
-            activity_id = int(m.group(1))
+        if "activity" in links:
+            activity_id = links["activity"]
             activity = await self.fetch_activity(activity_id)
             if not activity:
                 await message.channel.send("❌ Failed to fetch activity.")
-                return
-            total_replies = len(activity.get("replies") or [])
-            total_pages = 1 + math.ceil(max(0, total_replies) / REPLIES_PER_PAGE)
+                return False
+            total_pages = self.activity_total_pages(activity)
             embeds = await self.render_page(activity, page=1)
+            self.prefetch_reply_page(activity, 2)
+            view = self.Paginator(self, None, message.channel.id, activity_id, total_pages, current_page=1)
             try:
-                sent = await message.channel.send(embeds=embeds)
+                sent = await message.channel.send(embeds=embeds, view=view)
             except Exception:
                 logger.exception("Failed to send activity message")
-                return
+                return False
             try:
-                view = await self._add_paginator_persistence(sent.id, sent.channel.id, activity_id, total_pages, current_page=1)
-                try:
-                    await sent.edit(view=view)
-                except Exception:
-                    logger.exception("Failed to attach paginator view to activity message (message.edit failed).")
+                await self._add_paginator_persistence(sent.id, sent.channel.id, activity_id, total_pages, current_page=1, view=view)
             except Exception:
                 logger.exception("Failed to persist activity paginator.")
-            return
+            return True
 
         # Anime link
-        m = ANIME_URL_RE.search(message.content)
-        if m:
-            media_id = int(m.group(1))
-            media = await self.fetch_media(media_id, "ANIME")
-            if not media:
-                await message.channel.send("❌ Failed to fetch anime info.")
-                return
+        if "anime" in links:
+            media_id = links["anime"]
             total_pages = 2
-            embeds = self.render_media_pages(media, page=1, total_pages=total_pages)
+            embeds = await self.get_media_page_embeds(media_id, "ANIME", page=1)
+            if not embeds:
+                await message.channel.send("❌ Failed to fetch anime info.")
+                return False
+            view = self.MediaPaginator(self, None, message.channel.id, media_id, "ANIME", total_pages, current_page=1)
             try:
-                sent = await message.channel.send(embeds=embeds)
+                sent = await message.channel.send(embeds=embeds, view=view)
             except Exception:
                 logger.exception("Failed to send anime message")
-                return
+                return False
             try:
-                view = await self._add_media_persistence(sent.id, sent.channel.id, media_id, "ANIME", total_pages, current_page=1)
-                try:
-                    await sent.edit(view=view)
-                except Exception:
-                    logger.exception("Failed to attach media view to anime message (message.edit failed).")
+                await self._add_media_persistence(sent.id, sent.channel.id, media_id, "ANIME", total_pages, current_page=1, view=view)
             except Exception:
                 logger.exception("Failed to persist media paginator for anime.")
-            return
+            return True
 
         # Manga link
-        m = MANGA_URL_RE.search(message.content)
-        if m:
-            media_id = int(m.group(1))
-            media = await self.fetch_media(media_id, "MANGA")
-            if not media:
-                await message.channel.send("❌ Failed to fetch manga info.")
-                return
+        if "manga" in links:
+            media_id = links["manga"]
             total_pages = 2
-            embeds = self.render_media_pages(media, page=1, total_pages=total_pages)
+            embeds = await self.get_media_page_embeds(media_id, "MANGA", page=1)
+            if not embeds:
+                await message.channel.send("❌ Failed to fetch manga info.")
+                return False
+            view = self.MediaPaginator(self, None, message.channel.id, media_id, "MANGA", total_pages, current_page=1)
             try:
-                sent = await message.channel.send(embeds=embeds)
+                sent = await message.channel.send(embeds=embeds, view=view)
             except Exception:
                 logger.exception("Failed to send manga message")
-                return
+                return False
             try:
-                view = await self._add_media_persistence(sent.id, sent.channel.id, media_id, "MANGA", total_pages, current_page=1)
-                try:
-                    await sent.edit(view=view)
-                except Exception:
-                    logger.exception("Failed to attach media view to manga message (message.edit failed).")
+                await self._add_media_persistence(sent.id, sent.channel.id, media_id, "MANGA", total_pages, current_page=1, view=view)
             except Exception:
                 logger.exception("Failed to persist media paginator for manga.")
-            return
+            return True
+        return False
 
     # ---------------------
     # NEW: REVIEW fetching + parsing + embed + pagination
@@ -1748,17 +1937,25 @@ class AniListCog(commands.Cog):
     async def fetch_review_parse_fallback(self, review_id: int) -> Optional[dict]:
         """
         Robust multilayered fallback: fetch the review HTML and parse out content, images, rating and votes.
-        This function is intentionally defensive and attempts multiple heuristics.
+        Reading stops at </head> once the JSON-LD or og:description is in; parsing runs in a worker thread.
         """
+        cached = self._fallback_cache.get(("review", int(review_id)))
+        if cached is not None:
+            return cached
         url = f"https://anilist.co/review/{review_id}"
         logger.info("Review parsing fallback started for %s", url)
         try:
-            async with self.session.get(url, timeout=HTML_TIMEOUT, headers={"User-Agent": "AniListBot/1.0"}) as resp:
-                html = await resp.text()
+            html = await self._fetch_html_head(url, ("application/ld+json", "og:description"))
         except Exception:
             logger.exception("Failed to fetch review page HTML")
             return None
 
+        review = await asyncio.to_thread(self._parse_review_html, html, int(review_id), url)
+        self._fallback_cache.set(("review", int(review_id)), review)
+        return review
+
+    def _parse_review_html(self, html: str, review_id: int, url: str) -> dict:
+        """Pull content, images, rating, votes and author out of review page HTML (runs off the event loop)."""
         # Attempt to find JSON blobs first (data-react-props / ld+json)
         body_text = None
         images = []
@@ -1811,6 +2008,11 @@ class AniListCog(commands.Cog):
                     if src and src not in images:
                         images.append(src)
                 body_text = re.sub(r'<[^>]+>', '', b).strip()
+        # Head-only read: the og:description summary is better than nothing
+        if not body_text:
+            m_og = re.search(r'<meta\s+property=["\']og:description["\']\s+content=["\']([^"\']+)["\']', html)
+            if m_og:
+                body_text = m_og.group(1).strip()
 
         # Parse rating (various possible formats)
         try:
@@ -2036,11 +2238,10 @@ class AniListCog(commands.Cog):
                 except:
                     pass
 
-    @commands.Cog.listener()
     async def on_message_review(self, message: discord.Message):
         """
-        New listener that handles AniList review URLs like https://anilist.co/review/12345
-        This is separate from on_message to avoid touching existing handler code.
+        Handles AniList review URLs like https://anilist.co/review/12345
+        Registered with the message dispatcher separately from on_message.
         """
         # ignore bots
         if message.author.bot:
@@ -2086,6 +2287,118 @@ class AniListCog(commands.Cog):
     # ---------------------
     # Cog setup
     # ---------------------
+# ---------------------
+# Paginator routing (one handler per custom_id shape instead of one stored view per message)
+# ---------------------
+PAGINATOR_EXPIRED_MESSAGE = "⌛ This paginator has expired. Post the link again for a fresh one."
+
+MEDIA_BUTTONS = {
+    "next": ("📖 Description", discord.ButtonStyle.primary),
+    "prev": ("⬅ Back to Main Page", discord.ButtonStyle.secondary),
+    "rec": ("🎯 Recommendations", discord.ButtonStyle.success),
+}
+
+MEDIA_SELECT_OPTIONS = [
+    ("🔗 Relations", "relations", "Show related media"),
+    ("🎭 Characters (Main)", "characters_main", "Main characters"),
+    ("🌟 Support Cast", "characters_support", "Support characters"),
+    ("🛡️ Staff", "staff", "All staff"),
+    ("📊 Stats Distribution", "stats", "Status & score distribution"),
+    ("🎯 Recommendations", "recommendations", "Top recommendations"),
+    ("🗂️ Tags", "tags", "All tags"),
+    ("👥 User Progress", "user_progress", "See registered users' progress"),
+]
+
+
+async def _get_anilist_cog(interaction: discord.Interaction) -> Optional[AniListCog]:
+    cog = interaction.client.get_cog("AniListCog")
+    if cog is None:
+        await interaction.response.send_message("⚠️ AniList embeds are currently unavailable.", ephemeral=True)
+    return cog
+
+
+class ActivityPageButton(ui.DynamicItem[ui.Button], template=r"anilist:(?P<action>prev|next):(?P<activity_id>\d+)"):
+    """Prev/Next on an activity embed; the current page is loaded from paginator_state when clicked."""
+
+    def __init__(self, action: str, activity_id: int):
+        super().__init__(ui.Button(
+            label="⬅ Prev" if action == "prev" else "Next ➡",
+            style=discord.ButtonStyle.primary,
+            custom_id=f"anilist:{action}:{activity_id}"
+        ))
+        self.action = action
+        self.activity_id = int(activity_id)
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Button, match: re.Match):
+        return cls(match["action"], int(match["activity_id"]))
+
+    async def callback(self, interaction: discord.Interaction):
+        cog = await _get_anilist_cog(interaction)
+        if cog is None:
+            return
+        # total/current pages are filled in from the stored state by prev_page/next_page
+        view = cog.Paginator(cog, interaction.message.id, interaction.channel_id, self.activity_id, total_pages=1)
+        if self.action == "prev":
+            await view.prev_page(interaction)
+        else:
+            await view.next_page(interaction)
+
+
+class MediaButton(ui.DynamicItem[ui.Button], template=r"media_(?P<action>next|prev|rec):(?P<media_type>ANIME|MANGA):(?P<media_id>\d+)"):
+    """Description / main page / recommendations buttons on a media embed; the custom_id carries the media."""
+
+    def __init__(self, action: str, media_type: str, media_id: int):
+        label, style = MEDIA_BUTTONS[action]
+        super().__init__(ui.Button(label=label, style=style, custom_id=f"media_{action}:{media_type}:{media_id}"))
+        self.action = action
+        self.media_type = media_type
+        self.media_id = int(media_id)
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Button, match: re.Match):
+        return cls(match["action"], match["media_type"], int(match["media_id"]))
+
+    async def callback(self, interaction: discord.Interaction):
+        cog = await _get_anilist_cog(interaction)
+        if cog is None:
+            return
+        view = cog.MediaPaginator(cog, interaction.message.id, interaction.channel_id, self.media_id, self.media_type, total_pages=2)
+        if self.action == "next":
+            await view.show_description(interaction)
+        elif self.action == "prev":
+            await view.show_main(interaction)
+        else:
+            await view.show_recommendations(interaction)
+
+
+class MediaSelect(ui.DynamicItem[ui.Select], template=r"media_select:(?P<media_type>ANIME|MANGA):(?P<media_id>\d+)"):
+    """Details dropdown on a media embed."""
+
+    def __init__(self, media_type: str, media_id: int):
+        super().__init__(ui.Select(
+            placeholder="Choose details...",
+            min_values=1,
+            max_values=1,
+            options=[discord.SelectOption(label=label, value=value, description=description)
+                     for label, value, description in MEDIA_SELECT_OPTIONS],
+            custom_id=f"media_select:{media_type}:{media_id}"
+        ))
+        self.media_type = media_type
+        self.media_id = int(media_id)
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Select, match: re.Match):
+        return cls(match["media_type"], int(match["media_id"]))
+
+    async def callback(self, interaction: discord.Interaction):
+        cog = await _get_anilist_cog(interaction)
+        if cog is None:
+            return
+        view = cog.MediaPaginator(cog, interaction.message.id, interaction.channel_id, self.media_id, self.media_type, total_pages=2)
+        await view.select_callback(interaction)
+
+
 async def setup(bot: commands.Bot):
     cog = AniListCog(bot)
     await bot.add_cog(cog)
@@ -3,6 +3,8 @@ from discord.ext import commands
 from discord.ui import View, Button
 import re
 
+from helpers.message_dispatch import message_dispatcher
+
 # ------------------------------
 # Platforms (rewrites)
 # ------------------------------
@@ -29,6 +31,10 @@ def rewrite_url(url: str):
     return url
 
 
+# Prefilter for the dispatcher: only messages mentioning a rewritten platform reach on_message
+PLATFORM_PREFILTER = "|".join(re.escape(base) for base in ["vm.tiktok.com", *PLATFORM_MAP])
+
+
 # ------------------------------
 # Buttons
 # ------------------------------
@@ -68,7 +74,12 @@ class EmbedCog(commands.Cog):
         self.bot = bot
         self.url_pattern = re.compile(r"(https?://[^\s]+)")
 
-    @commands.Cog.listener()
+    async def cog_load(self):
+        message_dispatcher.register("embed_rewrite", self.on_message, pattern=PLATFORM_PREFILTER)
+
+    async def cog_unload(self):
+        message_dispatcher.unregister("embed_rewrite")
+
     async def on_message(self, message: discord.Message):
         if message.author.bot:
             return
@@ -9,6 +9,9 @@ import logging
 import aiohttp
 
 from config import CHANNEL_ID, MOD_ROLE_ID
+from helpers.job_helper import job_manager, JobContext
+from helpers.logging_helper import queued_file_handler
+from helpers.metrics import http_trace_configs
 ANILIST_URL = "https://graphql.anilist.co"
 SAVE_FILE = "data/manga_scan.json"
 CHANNEL_SAVE_FILE = "data/manga_channel.json"  # stores mapping {guild_id: channel_id}
@@ -23,9 +26,8 @@ logger = logging.getLogger("Finisher")
 logger.setLevel(logging.INFO)
 
 # Avoid duplicate file handlers on reload
-if not any(isinstance(h, logging.FileHandler) and getattr(h, "baseFilename", None) == os.path.abspath(LOG_FILE)
-           for h in logger.handlers):
-    file_handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
+if not any(getattr(h, "baseFilename", None) == os.path.abspath(LOG_FILE) for h in logger.handlers):
+    file_handler = queued_file_handler(LOG_FILE)
     file_handler.setFormatter(logging.Formatter("[%(asctime)s] [%(levelname)s] %(message)s"))
     logger.addHandler(file_handler)
 
@@ -91,6 +93,7 @@ class Finisher(commands.Cog):
         # Ensure data directory exists when saving
         os.makedirs(os.path.dirname(SAVE_FILE) or '.', exist_ok=True)
         os.makedirs(os.path.dirname(CHANNEL_SAVE_FILE) or '.', exist_ok=True)
+        job_manager.register("finisher_forceupdate", self._run_forceupdate)
 
     def cog_unload(self):
         self.daily_check.cancel()
@@ -101,7 +104,7 @@ class Finisher(commands.Cog):
         timeout = aiohttp.ClientTimeout(total=15)
         try:
             self.logger.info("Fetching manga list from AniList")
-            async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with aiohttp.ClientSession(timeout=timeout, trace_configs=http_trace_configs()) as session:
                 async with session.post(ANILIST_URL, json={"query": query}) as resp:
                     if resp.status != 200:
                         self.logger.warning(f"AniList returned status {resp.status}")
@@ -489,25 +492,37 @@ class Finisher(commands.Cog):
             return
 
         await interaction.response.defer(ephemeral=True)
+        await job_manager.submit(
+            "finisher_forceupdate",
+            {"guild_id": interaction.guild.id},
+            created_by=interaction.user.id,
+            interaction=interaction,
+            description="⏳ Manga completion update"
+        )
+
+    async def _run_forceupdate(self, ctx: JobContext) -> str:
+        """Job handler for /forceupdate: fetch, compare, filter and post manga completion updates."""
         try:
-            await interaction.edit_original_response(content="⏳ (1) **Starting Update** → `[0%]` Preparing request to AniList...")
+            await ctx.progress(0, 5, "⏳ (1) **Starting Update** → `[0%]` Preparing request to AniList...", force=True)
 
             # Step 2: Fetch Data
             manga_list = await self.fetch_manga()
-            await interaction.edit_original_response(content=f"📡 (2) **Fetching Data** → `[25%]` Retrieved **{len(manga_list)}** manga entries from AniList.")
+            await ctx.progress(1, 5, f"📡 (2) **Fetching Data** → `[25%]` Retrieved **{len(manga_list)}** manga entries from AniList.", force=True)
 
             # Step 3: Load Previous
             prev_ids = await self.load_previous()
-            await interaction.edit_original_response(content=f"🗂 (3) **Comparing Data** → `[50%]` Found **{len(prev_ids)}** previously tracked manga.")
+            await ctx.progress(2, 5, f"🗂 (3) **Comparing Data** → `[50%]` Found **{len(prev_ids)}** previously tracked manga.", force=True)
 
             # Step 4: Filter
             new_manga = self.filter_new_manga(manga_list, prev_ids)
-            await interaction.edit_original_response(content=f"⚖️ (4) **Filtering Results** → `[75%]` After filtering ➝ **{len(new_manga)}** new manga updates.")
+            await ctx.progress(3, 5, f"⚖️ (4) **Filtering Results** → `[75%]` After filtering ➝ **{len(new_manga)}** new manga updates.", force=True)
 
             # Step 5: Post Updates (prefer configured channel)
-            cid = await self.load_defined_channel(interaction.guild.id)
+            await self.bot.wait_until_ready()
+            cid = await self.load_defined_channel(ctx.params.get("guild_id"))
             channel = self.bot.get_channel(cid) if cid else self.bot.get_channel(CHANNEL_ID)
             await self.post_updates(channel)
+            await ctx.progress(4, 5)
 
             # Record that we just ran a manual/forced update
             try:
@@ -517,19 +532,11 @@ class Finisher(commands.Cog):
 
             if new_manga:
                 target = channel.mention if channel else f"<#{CHANNEL_ID}>"
-                await interaction.edit_original_response(content=f"✅ (5) **Completed!** → `[100%]` Successfully posted **{len(new_manga)}** manga updates to {target} 🎉")
-            else:
-                await interaction.edit_original_response(content=f"📭 (5) **Completed!** → `[100%]` No new manga updates to post today.")
-
-            await interaction.followup.send("✅ Update posted!", ephemeral=True)
+                return f"✅ (5) **Completed!** → `[100%]` Successfully posted **{len(new_manga)}** manga updates to {target} 🎉"
+            return "📭 (5) **Completed!** → `[100%]` No new manga updates to post today."
 
-        except Exception as e:
-            self.logger.exception("Error running forceupdate command")
-            # Try to inform the user if possible
-            try:
-                await interaction.followup.send("❌ An error occurred while running the update.", ephemeral=True)
-            except Exception:
-                pass
+        except Exception:
+            self.logger.exception("Error running forceupdate job")
             raise
 
 
@@ -21,6 +21,7 @@ except ImportError:
 # Import database functions
 import database
 from helpers.command_logger import log_command
+from helpers.metrics import http_trace_configs
 
 
 # ---------------------- Scraping ----------------------
@@ -37,7 +38,7 @@ async def fetch_tweets(username: str, limit: int = 5):
     for base in NITTER_INSTANCES:
         url = f"{base}/{username}/rss"  # RSS feed gives structured data
         try:
-            async with aiohttp.ClientSession() as session:
+            async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
                 async with session.get(url, timeout=10) as resp:
                     if resp.status != 200:
                         continue
@@ -1,18 +1,38 @@
 # bot.py
 import sys
 import os
+import ast
 import asyncio
+import importlib
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
 import aiohttp
 import discord
+from discord import app_commands
 from discord.ext import commands
 from database import init_db
 
 # Add project root to sys.path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from config import TOKEN, GUILD_ID, BOT_ID, ADMIN_DISCORD_ID
+from config import TOKEN, GUILD_ID, BOT_ID, ADMIN_DISCORD_ID, COG_HOT_RELOAD, METRICS_HOST, METRICS_PORT
+from helpers.logging_helper import queued_file_handler, queued_handler
+from helpers.metrics import (
+    COMMAND_DURATION,
+    COMMAND_ERRORS,
+    http_trace_configs,
+    monitor_loop_lag,
+    start_metrics_server,
+)
+
+try:
+    from watchfiles import awatch, PythonFilter
+    WATCHFILES_AVAILABLE = True
+except ImportError:
+    WATCHFILES_AVAILABLE = False
 
 # ------------------------------------------------------
 # Logging Setup
@@ -20,12 +40,16 @@ from config import TOKEN, GUILD_ID, BOT_ID, ADMIN_DISCORD_ID
 # Configuration constants
 LOG_DIR = "logs"
 LOG_FILE = "bot.log"
-LOG_MAX_SIZE = 50 * 1024 * 1024  # 50MB max log file size
 TRENDING_REFRESH_INTERVAL = 3 * 60 * 60  
 STATUS_UPDATE_INTERVAL = 60 
-COG_WATCH_INTERVAL = 2 
+COG_WATCH_INTERVAL = 2  # polling fallback, only used when watchfiles is missing
+COG_RELOAD_DEBOUNCE_MS = 500  # editors write a file several times per save; group those into one reload
 ANILIST_API_TIMEOUT = 10 
 DEFAULT_TRENDING_FALLBACK = ["AniList API ❤️"]
+COG_IMPORT_WORKERS = 8  # threads used to pre-import cog dependencies at startup
+SERIAL_COGS = set()  # extensions whose setup must not overlap others (e.g. "cogs.foo"); loaded last, one at a time
+
+PROCESS_START = time.perf_counter()
 
 # Ensure logs directory exists
 os.makedirs(LOG_DIR, exist_ok=True)
@@ -33,16 +57,13 @@ os.makedirs(LOG_DIR, exist_ok=True)
 # Configure comprehensive file-based logging
 log_file_path = os.path.join(LOG_DIR, LOG_FILE)
 
-# Clear existing log file if it's too large
-if os.path.exists(log_file_path) and os.path.getsize(log_file_path) > LOG_MAX_SIZE:
-    open(log_file_path, 'w').close()
-
-# Setup file handler with detailed formatting
-file_handler = logging.FileHandler(log_file_path, encoding='utf-8')
+# Both handlers hand records to a background writer thread (rotating at LOG_MAX_BYTES),
+# so neither disk nor console latency lands on the event loop
+file_handler = queued_file_handler(log_file_path)
 file_handler.setLevel(logging.DEBUG)
 
 # Setup console handler
-console_handler = logging.StreamHandler()
+console_handler = queued_handler(logging.StreamHandler())
 console_handler.setLevel(logging.INFO)
 
 # Create formatter
@@ -75,7 +96,34 @@ intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
-bot = commands.Bot(command_prefix="!", intents=intents, application_id=BOT_ID)
+@dataclass
+class CogTiming:
+    """Startup cost of one extension, in seconds."""
+    name: str
+    deps: float = 0.0  # pre-importing its top-level imports in a worker thread
+    # load_extension: module body + setup() -> add_cog -> cog_load. Wall time: cogs load
+    # concurrently, so it also covers other cogs' steps that ran while this one awaited
+    load: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def total(self) -> float:
+        return self.deps + self.load
+
+
+# Filled in by main()/load_cogs()/on_ready and shown by /startup_report
+startup_timings: Dict[str, float] = {}
+cog_timings: Dict[str, CogTiming] = {}
+
+
+class LemegetonTree(app_commands.CommandTree):
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        command = interaction.command.qualified_name if interaction.command else "unknown"
+        COMMAND_ERRORS.inc(command=command)
+        await super().on_error(interaction, error)
+
+
+bot = commands.Bot(command_prefix="!", intents=intents, application_id=BOT_ID, tree_cls=LemegetonTree)
 
 # ------------------------------------------------------
 # AniList API Function
@@ -106,7 +154,7 @@ async def fetch_trending_anime_list():
         logger.debug(f"Making request to AniList API: {ANILIST_API_URL}")
         
         timeout = aiohttp.ClientTimeout(total=ANILIST_API_TIMEOUT)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with aiohttp.ClientSession(timeout=timeout, trace_configs=http_trace_configs()) as session:
             start_time = time.time()
             
             async with session.post(
@@ -326,6 +374,7 @@ async def _load_cogs_impl():
         loaded_count = 0
         reloaded_count = 0
         failed_count = 0
+        new_cogs = {}
         
         for filename in cog_files:
             cog_name = f"cogs.{filename[:-3]}"
@@ -374,39 +423,8 @@ async def _load_cogs_impl():
                     else:
                         logger.debug(f"Cog {cog_name} is up to date")
                 else:
-                    # Load new cog
-                    logger.debug(f"Loading new cog: {cog_name}")
-                    
-                    try:
-                        logger.debug(f"About to load extension: {cog_name}")
-                        
-                        # Check if cog is already loaded before attempting to load
-                        cog_class_name = cog_name.split('.')[-1].capitalize()  # e.g., "steam" -> "Steam"
-                        existing_cog = bot.get_cog(cog_class_name)
-                        if existing_cog:
-                            logger.warning(f"Cog {cog_class_name} is already loaded, attempting to unload first")
-                            try:
-                                await bot.remove_cog(cog_class_name)
-                                logger.debug(f"Successfully unloaded existing cog: {cog_class_name}")
-                            except Exception as unload_error:
-                                logger.error(f"Failed to unload existing cog {cog_class_name}: {unload_error}")
-                        
-                        await bot.load_extension(cog_name)
-                        cog_timestamps[cog_name] = last_mod
-                        logger.info(f"✅ Successfully loaded cog: {cog_name}")
-                        loaded_count += 1
-                    except Exception as load_error:
-                        logger.error(f"❌ Failed to load cog {cog_name}: {load_error}", exc_info=True)
-                        
-                        # If the extension was partially loaded but failed, try to unload it
-                        if cog_name in bot.extensions:
-                            try:
-                                await bot.unload_extension(cog_name)
-                                logger.debug(f"Cleaned up partially loaded extension: {cog_name}")
-                            except Exception as cleanup_error:
-                                logger.error(f"Failed to cleanup extension {cog_name}: {cleanup_error}")
-                        
-                        failed_count += 1
+                    # New cogs are loaded together after the scan
+                    new_cogs[cog_name] = last_mod
                         
             except OSError as file_error:
                 logger.error(f"File system error accessing {file_path}: {file_error}")
@@ -415,6 +433,11 @@ async def _load_cogs_impl():
                 logger.error(f"Unexpected error processing cog {cog_name}: {cog_error}", exc_info=True)
                 failed_count += 1
         
+        if new_cogs:
+            loaded, failed = await _load_new_cogs(new_cogs)
+            loaded_count += loaded
+            failed_count += failed
+        
         # Summary logging
         total_operations = loaded_count + reloaded_count + failed_count
         if total_operations > 0:
@@ -427,38 +450,206 @@ async def _load_cogs_impl():
     except Exception as e:
         logger.error(f"Fatal error in load_cogs: {e}", exc_info=True)
 
+def _cog_dependencies(file_path: str) -> List[str]:
+    """Absolute modules imported at the top level of a cog file (what its import will spend time on)."""
+    with open(file_path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=file_path)
+
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+            # `from PIL import Image` - the submodule is the expensive part
+            modules.extend(f"{node.module}.{alias.name}" for alias in node.names if alias.name != "*")
+    return modules
+
+def _import_dependencies(file_path: str) -> float:
+    """Worker thread: import a cog's dependencies so the cog module itself executes quickly on the loop."""
+    start = time.perf_counter()
+    for module in _cog_dependencies(file_path):
+        parent, _, attr = module.rpartition(".")
+        if module in sys.modules or (parent in sys.modules and hasattr(sys.modules[parent], attr)):
+            continue
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            # Usually `from x import name` where name is not a submodule; real failures surface in load_extension
+            pass
+        except Exception as import_error:
+            logger.debug(f"Pre-import of {module} for {file_path} failed: {import_error}")
+    return time.perf_counter() - start
+
+async def _load_one_cog(cog_name: str, last_mod: float) -> bool:
+    timing = cog_timings[cog_name]
+    try:
+        # Check if cog is already loaded before attempting to load
+        cog_class_name = cog_name.split('.')[-1].capitalize()  # e.g., "steam" -> "Steam"
+        existing_cog = bot.get_cog(cog_class_name)
+        if existing_cog:
+            logger.warning(f"Cog {cog_class_name} is already loaded, attempting to unload first")
+            try:
+                await bot.remove_cog(cog_class_name)
+                logger.debug(f"Successfully unloaded existing cog: {cog_class_name}")
+            except Exception as unload_error:
+                logger.error(f"Failed to unload existing cog {cog_class_name}: {unload_error}")
+
+        start = time.perf_counter()
+        try:
+            await bot.load_extension(cog_name)
+        finally:
+            # Only startup loads go through here, so hot reloads never touch the report
+            timing.load = time.perf_counter() - start
+        cog_timestamps[cog_name] = last_mod
+        logger.info(f"✅ Successfully loaded cog: {cog_name} ({timing.total * 1000:.0f}ms)")
+        return True
+
+    except Exception as load_error:
+        timing.error = str(load_error)
+        logger.error(f"❌ Failed to load cog {cog_name}: {load_error}", exc_info=True)
+
+        # If the extension was partially loaded but failed, try to unload it
+        if cog_name in bot.extensions:
+            try:
+                await bot.unload_extension(cog_name)
+                logger.debug(f"Cleaned up partially loaded extension: {cog_name}")
+            except Exception as cleanup_error:
+                logger.error(f"Failed to cleanup extension {cog_name}: {cleanup_error}")
+        return False
+
+async def _load_new_cogs(new_cogs: Dict[str, float]):
+    """
+    Load several extensions at once. Their third-party/helper imports are warmed concurrently
+    in worker threads, then the extensions load on the loop with their setup()/cog_load awaits
+    overlapping. Module bodies still execute one at a time on the loop thread.
+    Returns (loaded, failed).
+    """
+    wall_start = time.perf_counter()
+    for cog_name in new_cogs:
+        cog_timings[cog_name] = CogTiming(cog_name)
+
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=COG_IMPORT_WORKERS, thread_name_prefix="cog-import") as pool:
+        async def warm(cog_name: str):
+            file_path = os.path.join("./cogs", f"{cog_name[5:]}.py")
+            try:
+                cog_timings[cog_name].deps = await loop.run_in_executor(pool, _import_dependencies, file_path)
+            except Exception as warm_error:
+                logger.debug(f"Dependency warm-up failed for {cog_name}: {warm_error}")
+
+        await asyncio.gather(*(warm(name) for name in new_cogs))
+
+    parallel = [name for name in new_cogs if name not in SERIAL_COGS]
+    results = await asyncio.gather(*(_load_one_cog(name, new_cogs[name]) for name in parallel))
+    for name in new_cogs:
+        if name in SERIAL_COGS:
+            results.append(await _load_one_cog(name, new_cogs[name]))
+
+    startup_timings.setdefault("cogs", time.perf_counter() - wall_start)
+    loaded = sum(1 for ok in results if ok)
+    return loaded, len(results) - loaded
+
+def format_startup_report(limit: int = None) -> List[str]:
+    """Human-readable startup breakdown, slowest cogs first."""
+    lines = []
+    for phase in ("init_db", "cogs", "ready"):
+        if phase in startup_timings:
+            lines.append(f"{phase}: {startup_timings[phase] * 1000:.0f}ms")
+
+    ordered = sorted(cog_timings.values(), key=lambda t: t.total, reverse=True)
+    for timing in ordered[:limit]:
+        line = (f"{timing.name}: {timing.total * 1000:.0f}ms "
+                f"(deps {timing.deps * 1000:.0f} / load {timing.load * 1000:.0f})")
+        if timing.error:
+            line += " ❌ failed"
+        lines.append(line)
+    return lines
+
+async def reload_changed_cogs(cog_names):
+    """
+    Bring the given extensions in line with the files on disk: load new files,
+    reload modified ones and unload deleted ones. Other cogs are left alone.
+    """
+    async with cog_loading_semaphore:
+        for cog_name in sorted(cog_names):
+            file_path = os.path.join("./cogs", f"{cog_name[5:]}.py")
+            try:
+                if not os.path.exists(file_path):
+                    # Deleted (or mid-rename); editors that save via delete+create show up as modified later
+                    if cog_name in bot.extensions:
+                        await bot.unload_extension(cog_name)
+                        logger.info(f"🗑️ Unloaded cog for deleted file: {cog_name}")
+                    cog_timestamps.pop(cog_name, None)
+                    continue
+
+                last_mod = os.path.getmtime(file_path)
+                if cog_name in bot.extensions:
+                    await bot.reload_extension(cog_name)
+                    logger.info(f"🔄 Successfully reloaded cog: {cog_name}")
+                else:
+                    await bot.load_extension(cog_name)
+                    logger.info(f"✅ Successfully loaded cog: {cog_name}")
+                cog_timestamps[cog_name] = last_mod
+
+            except Exception as reload_error:
+                logger.error(f"❌ Failed to reload cog {cog_name}: {reload_error}", exc_info=True)
+                # Same policy as load_cogs: don't leave a half-loaded extension around
+                if cog_name in bot.extensions:
+                    try:
+                        await bot.unload_extension(cog_name)
+                        logger.debug(f"Unloaded broken extension: {cog_name}")
+                    except Exception as unload_error:
+                        logger.error(f"Failed to unload broken extension {cog_name}: {unload_error}")
+                cog_timestamps.pop(cog_name, None)
+
 async def watch_cogs():
     """
-    Continuously monitor cogs directory for changes with comprehensive logging.
+    Reload cogs as their files change, driven by filesystem events (inotify and friends via watchfiles).
+    Nothing runs between changes; bursts of writes are debounced into a single reload per cog.
+    Disabled entirely with COG_HOT_RELOAD=0 (production).
     """
+    if not COG_HOT_RELOAD:
+        logger.info("Cog hot reload disabled (COG_HOT_RELOAD=0)")
+        return
+
     logger.info("Starting cog file watcher")
     
     # Wait for bot to be ready to avoid race conditions during initial startup
     logger.debug("Waiting for bot to be ready before starting cog monitoring...")
     await bot.wait_until_ready()
     logger.debug("Bot is ready, starting cog file monitoring")
-    
-    # Additional delay to ensure initial loading is completely finished
-    await asyncio.sleep(5)
-    logger.debug("Initial delay completed, beginning cog watch cycles")
-    
-    watch_cycle = 0
-    
-    try:
+
+    if not WATCHFILES_AVAILABLE:
+        logger.warning(f"watchfiles not installed, falling back to polling ./cogs every {COG_WATCH_INTERVAL}s")
         while True:
             try:
-                watch_cycle += 1
-                logger.debug(f"Cog watch cycle {watch_cycle}")
-                
                 await load_cogs()
-                
-                logger.debug(f"Waiting {COG_WATCH_INTERVAL}s before next cog check")
-                await asyncio.sleep(COG_WATCH_INTERVAL)
-                
             except Exception as watch_error:
-                logger.error(f"Error in cog watch cycle {watch_cycle}: {watch_error}", exc_info=True)
-                await asyncio.sleep(COG_WATCH_INTERVAL * 2)  # Wait longer on errors
-                
+                logger.error(f"Error in cog watch cycle: {watch_error}", exc_info=True)
+            await asyncio.sleep(COG_WATCH_INTERVAL)
+
+    # Pick up anything edited while the bot was connecting
+    await load_cogs()
+
+    try:
+        async for changes in awatch(
+            "./cogs",
+            watch_filter=PythonFilter(),
+            debounce=COG_RELOAD_DEBOUNCE_MS,
+            recursive=False,
+        ):
+            cog_names = set()
+            for _change, path in changes:
+                filename = os.path.basename(path)
+                if filename.endswith(".py") and filename != "__init__.py":
+                    cog_names.add(f"cogs.{filename[:-3]}")
+            if not cog_names:
+                continue
+
+            logger.debug(f"Cog files changed: {', '.join(sorted(cog_names))}")
+            await reload_changed_cogs(cog_names)
+
     except Exception as e:
         logger.error(f"Fatal error in cog watcher: {e}", exc_info=True)
         # Attempt to restart watcher
@@ -563,6 +754,12 @@ async def on_ready():
     logger.info(f"Connected to {len(bot.guilds)} guilds")
     logger.info(f"Bot latency: {bot.latency*1000:.2f}ms")
     logger.info("="*60)
+
+    if "ready" not in startup_timings:
+        startup_timings["ready"] = time.perf_counter() - PROCESS_START
+        logger.info("Startup timing report (cog load = module + setup, overlapped wall time):")
+        for line in format_startup_report():
+            logger.info(f"  {line}")
     
     try:
         # Log guild information with detailed server logging
@@ -620,6 +817,12 @@ async def on_ready():
     except Exception as e:
         logger.error(f"Error in on_ready event: {e}", exc_info=True)
 
+@bot.event
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    """Record how long the command took, measured from when Discord created the interaction."""
+    elapsed = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+    COMMAND_DURATION.observe(max(0.0, elapsed), command=command.qualified_name)
+
 @bot.event
 async def on_disconnect():
     """Log bot disconnection events."""
@@ -693,6 +896,28 @@ async def manual_server_log(interaction: discord.Interaction):
         logger.error(f"Error in manual server log command: {e}")
         await interaction.followup.send("❌ Error occurred while logging server information.", ephemeral=True)
 
+@bot.tree.command(name="startup_report", description="⏱️ Show where startup time went (Owner only)")
+async def startup_report(interaction: discord.Interaction):
+    """Show the startup timing breakdown recorded by load_cogs (restricted to bot owner)."""
+    if interaction.user.id != ADMIN_DISCORD_ID:
+        await interaction.response.send_message("❌ This command is restricted to the bot owner.", ephemeral=True)
+        return
+
+    lines = format_startup_report(limit=15)
+    if not lines:
+        await interaction.response.send_message("📭 No startup timings recorded.", ephemeral=True)
+        return
+
+    embed = discord.Embed(
+        title="⏱️ Startup Report",
+        description="```\n" + "\n".join(lines) + "\n```",
+        color=0x00BFFF
+    )
+    embed.set_footer(text=f"{len(cog_timings)} cogs timed • deps are pre-imported in parallel threads • "
+                          f"load (module + setup) is wall time overlapped with other cogs")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+    logger.info(f"Startup report requested by {interaction.user}")
+
 # ------------------------------------------------------
 # Main Function with Comprehensive Logging
 # ------------------------------------------------------
@@ -703,12 +928,15 @@ async def main():
     logger.info("="*60)
     logger.info("STARTING BOT INITIALIZATION")
     logger.info("="*60)
+    metrics_runner = None
     
     try:
         # Initialize database with logging
         logger.info("Initializing database...")
         try:
+            db_start = time.perf_counter()
             await init_db()
+            startup_timings["init_db"] = time.perf_counter() - db_start
             logger.info("✅ Database initialization completed")
         except Exception as db_error:
             logger.error(f"❌ Database initialization failed: {db_error}", exc_info=True)
@@ -723,6 +951,15 @@ async def main():
             logger.error(f"❌ Cog loading failed: {cog_error}", exc_info=True)
             # Continue anyway - some cogs might have loaded successfully
         
+        # Optional metrics endpoint (METRICS_PORT) plus the event loop lag probe
+        if METRICS_PORT:
+            try:
+                metrics_runner = await start_metrics_server(METRICS_HOST, METRICS_PORT)
+                asyncio.create_task(monitor_loop_lag())
+                logger.info("✅ Metrics endpoint started")
+            except Exception as metrics_error:
+                logger.error(f"❌ Metrics endpoint failed to start: {metrics_error}", exc_info=True)
+        
         # Start cog watcher with logging
         logger.info("Starting cog file watcher...")
         try:
@@ -774,6 +1011,8 @@ async def main():
         if not bot.is_closed():
             logger.debug("Closing bot connection...")
             await bot.close()
+        if metrics_runner:
+            await metrics_runner.cleanup()
         logger.info("Bot shutdown completed")
         logger.info("="*60)
 
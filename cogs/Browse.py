@@ -6,6 +6,7 @@ import logging
 from typing import List, Dict, Optional
 from discord.ui import View, Button
 from config import GUILD_ID
+from helpers.metrics import http_trace_configs
 from database import get_all_users
 
 logger = logging.getLogger("BrowseCog")
@@ -49,7 +50,7 @@ class BrowseCog(commands.Cog):
             "variables": {"search": query, "type": media_type}
         }
 
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
             async with session.post(API_URL, json=graphql_query) as response:
                 if response.status != 200:
                     logger.error(f"Failed AniList request: {response.status}")
@@ -80,7 +81,7 @@ class BrowseCog(commands.Cog):
         variables = {"userName": anilist_username, "mediaId": media_id, "type": media_type}
 
         try:
-            async with aiohttp.ClientSession() as session:
+            async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
                 async with session.post(API_URL, json={"query": query, "variables": variables}) as resp:
                     if resp.status != 200:
                         logger.warning(f"AniList fetch failed ({resp.status}) for {anilist_username=} {media_id=}")
@@ -148,7 +149,7 @@ class BrowseCog(commands.Cog):
 
         if chosen_type == "BOOK":
             # 📚 Google Books Fetch
-            async with aiohttp.ClientSession() as session:
+            async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
                 async with session.get(GOOGLE_BOOKS_URL + title) as response:
                     if response.status != 200:
                         await interaction.followup.send("❌ No results found.", ephemeral=True)
@@ -352,7 +353,7 @@ class BrowseCog(commands.Cog):
         choices = []
 
         if media_type == "BOOK":
-            async with aiohttp.ClientSession() as session:
+            async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
                 async with session.get(GOOGLE_BOOKS_URL + current) as response:
                     if response.status != 200:
                         return []
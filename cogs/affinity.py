@@ -1,14 +1,41 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 import aiohttp
 import aiosqlite
 import asyncio
 import logging
 import os
-import math
+import time
 from pathlib import Path
+from typing import Dict, List, Optional
 from config import GUILD_ID
+from database import (
+    get_cached_anilist_profiles,
+    save_anilist_profiles,
+    get_anilist_profile_misses,
+    save_anilist_profile_misses,
+    get_affinity_sync_state,
+    save_affinity_pairs,
+    remove_affinity_users,
+    get_top_affinity_matches,
+    save_anilist_list_entries,
+    get_anilist_list_state,
+    get_anilist_list_entries,
+    save_list_affinity_pairs,
+    remove_list_affinity_users,
+    get_top_list_affinity_matches,
+)
+from helpers.affinity_helper import (
+    calculate_affinity,
+    compute_affinity_rows,
+    profile_fingerprint,
+    compute_list_affinity_rows,
+    list_fingerprint,
+)
+from helpers.job_helper import job_manager, JobContext
+from helpers.logging_helper import queued_file_handler
+from helpers.metrics import http_trace_configs
 
 # ------------------------------------------------------
 # Logging Setup - Auto-clearing
@@ -17,16 +44,12 @@ LOG_DIR = Path("logs")
 LOG_DIR.mkdir(exist_ok=True)
 LOG_FILE = LOG_DIR / "affinity.log"
 
-# Clear the log file on startup
-if LOG_FILE.exists():
-    LOG_FILE.unlink()
-
 # Setup logger
 logger = logging.getLogger("affinity")
 logger.setLevel(logging.INFO)
 
 # File handler
-file_handler = logging.FileHandler(LOG_FILE, encoding='utf-8')
+file_handler = queued_file_handler(LOG_FILE, mode="w")
 file_handler.setLevel(logging.INFO)
 
 # Formatter
@@ -51,40 +74,74 @@ MAX_RETRIES = 3
 RETRY_DELAY = 2
 REQUEST_TIMEOUT = 10
 
+PROFILE_CACHE_TTL = 6 * 3600    # cached profiles older than this are refreshed in the background
+PROFILE_MISS_TTL = 30 * 60      # usernames AniList didn't return are not looked up again for this long
+PROFILE_BATCH_SIZE = 10         # aliased User lookups per GraphQL request
+FETCH_CONCURRENCY = 3           # batches in flight at once
+PROFILE_REFRESH_HOURS = 6
+LIST_CACHE_TTL = 24 * 3600      # stored MediaListCollections older than this are re-fetched
+LIST_REFRESH_HOURS = 24
+
+USER_PROFILE_FIELDS = """
+    id
+    name
+    avatar { large }
+    statistics {
+      anime { count meanScore episodesWatched genres { genre count } formats { format count } }
+      manga { count meanScore chaptersRead genres { genre count } formats { format count } }
+    }
+    favourites {
+      anime { nodes { id } }
+      manga { nodes { id } }
+      characters { nodes { id } }
+    }
+"""
+
+# Planning entries are excluded: a shared title only counts once someone has actually started it
+USER_LISTS_QUERY = """
+query ($name: String) {
+  anime: MediaListCollection(userName: $name, type: ANIME, status_not_in: [PLANNING]) {
+    lists { entries { mediaId status score(format: POINT_100) } }
+  }
+  manga: MediaListCollection(userName: $name, type: MANGA, status_not_in: [PLANNING]) {
+    lists { entries { mediaId status score(format: POINT_100) } }
+  }
+}
+"""
+
 
 class Affinity(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self._matrix_lock = asyncio.Lock()
+        self._list_lock = asyncio.Lock()
+        job_manager.register("affinity_profile_refresh", self._run_profile_refresh)
+        job_manager.register("affinity_list_refresh", self._run_list_refresh)
+
+    async def cog_load(self):
+        self.refresh_profiles.start()
+        self.refresh_lists.start()
+
+    async def cog_unload(self):
+        self.refresh_profiles.cancel()
+        self.refresh_lists.cancel()
 
     # ---------------------------------------------------------
     # Fetch AniList user data with retries
     # ---------------------------------------------------------
     async def fetch_user(self, username: str):
         """Fetch user data from AniList API with retry logic."""
-        query = """
-        query ($name: String) {
-          User(name: $name) {
-            id
-            name
-            avatar { large }
-            statistics {
-              anime { count meanScore episodesWatched genres { genre count } formats { format count } }
-              manga { count meanScore chaptersRead genres { genre count } formats { format count } }
-            }
-            favourites {
-              anime { nodes { id } }
-              manga { nodes { id } }
-              characters { nodes { id } }
-            }
-          }
-        }
+        query = f"""
+        query ($name: String) {{
+          User(name: $name) {{ {USER_PROFILE_FIELDS} }}
+        }}
         """
         
         logger.info(f"Fetching AniList data for user: {username}")
         
         for attempt in range(1, MAX_RETRIES + 1):
             try:
-                async with aiohttp.ClientSession() as session:
+                async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
                     async with session.post(
                         API_URL, 
                         json={"query": query, "variables": {"name": username}}, 
@@ -114,317 +171,335 @@ class Affinity(commands.Cog):
         logger.error(f"Failed to fetch data for {username} after {MAX_RETRIES} attempts")
         return None
 
+    async def fetch_users_batch(self, session: aiohttp.ClientSession, usernames: List[str]) -> Optional[Dict[str, dict]]:
+        """
+        Fetch several profiles in one request using aliased User fields. Keys are lowercase usernames;
+        users AniList doesn't know are left out. None when the request itself failed.
+        """
+        var_defs = ", ".join(f"$n{i}: String" for i in range(len(usernames)))
+        aliases = "\n".join(f"u{i}: User(name: $n{i}) {{ ...Profile }}" for i in range(len(usernames)))
+        query = f"query ({var_defs}) {{\n{aliases}\n}}\nfragment Profile on User {{ {USER_PROFILE_FIELDS} }}"
+        variables = {f"n{i}": name for i, name in enumerate(usernames)}
+
+        for attempt in range(1, MAX_RETRIES + 1):
+            try:
+                async with session.post(
+                    API_URL,
+                    json={"query": query, "variables": variables},
+                    timeout=REQUEST_TIMEOUT
+                ) as resp:
+                    if resp.status == 429:
+                        retry_after = int(resp.headers.get("Retry-After", RETRY_DELAY))
+                        logger.warning(f"Rate limited fetching {len(usernames)} profiles, waiting {retry_after}s")
+                        await asyncio.sleep(retry_after)
+                        continue
+
+                    data = await resp.json(content_type=None)
+                    # A missing/private user makes AniList answer 404 but still return the other aliases
+                    payload = (data or {}).get("data") or {}
+                    if payload:
+                        profiles = {
+                            name.lower(): payload[f"u{i}"]
+                            for i, name in enumerate(usernames)
+                            if payload.get(f"u{i}")
+                        }
+                        if len(profiles) < len(usernames):
+                            logger.warning(f"Batch returned {len(profiles)}/{len(usernames)} profiles (HTTP {resp.status})")
+                        return profiles
+
+                    logger.warning(f"HTTP {resp.status} with no data for batch of {len(usernames)} (attempt {attempt})")
+
+            except asyncio.TimeoutError:
+                logger.error(f"Timeout fetching batch of {len(usernames)} profiles (attempt {attempt})")
+            except Exception as e:
+                logger.error(f"Error fetching batch of {len(usernames)} profiles (attempt {attempt}): {e}")
+
+            if attempt < MAX_RETRIES:
+                await asyncio.sleep(RETRY_DELAY)
+
+        logger.error(f"Failed to fetch batch {usernames} after {MAX_RETRIES} attempts")
+        return None
+
+    async def fetch_profiles(self, usernames: List[str], ctx: Optional[JobContext] = None) -> Dict[str, dict]:
+        """Fetch profiles in aliased batches with bounded concurrency and store them in the profile cache."""
+        unique = list(dict.fromkeys(u for u in usernames if u))
+        if not unique:
+            return {}
+
+        batches = [unique[i:i + PROFILE_BATCH_SIZE] for i in range(0, len(unique), PROFILE_BATCH_SIZE)]
+        semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+        profiles: Dict[str, dict] = {}
+        not_found: List[str] = []
+        done = 0
+        start = time.monotonic()
+
+        async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
+            async def run(batch):
+                nonlocal done
+                async with semaphore:
+                    result = await self.fetch_users_batch(session, batch)
+                if result is not None:
+                    profiles.update(result)
+                    not_found.extend(u for u in batch if u.lower() not in result)
+                done += len(batch)
+                if ctx:
+                    await ctx.progress(done, len(unique), f"🔄 Refreshed {done}/{len(unique)} AniList profiles")
+
+            results = await asyncio.gather(*(run(b) for b in batches), return_exceptions=True)
+
+        if ctx:
+            ctx.check_cancelled()
+        for r in results:
+            if isinstance(r, Exception):
+                logger.error(f"Profile batch failed: {r}")
+
+        await save_anilist_profiles(profiles)
+        await save_anilist_profile_misses(not_found)
+        logger.info(f"Fetched {len(profiles)}/{len(unique)} profiles in {len(batches)} request(s) "
+                    f"in {time.monotonic() - start:.2f}s")
+        return profiles
+
+    async def get_profiles(self, usernames: List[str]) -> Dict[str, dict]:
+        """
+        Return profiles for the given usernames (keyed lowercase), served from the DB cache.
+        Only users never seen before are fetched inline; stale entries are refreshed by a background job.
+        Usernames AniList recently had no profile for are skipped until PROFILE_MISS_TTL passes.
+        """
+        cached = await get_cached_anilist_profiles(usernames)
+        now = time.time()
+        profiles = {name: profile for name, (profile, _) in cached.items()}
+
+        missing = [u for u in usernames if u and u.lower() not in cached]
+        if missing:
+            known_misses = await get_anilist_profile_misses(missing, PROFILE_MISS_TTL)
+            missing = [u for u in missing if u.lower() not in known_misses]
+        stale = [u for u in usernames if u and u.lower() in cached and now - cached[u.lower()][1] > PROFILE_CACHE_TTL]
+
+        if missing:
+            logger.info(f"Fetching {len(missing)} uncached profiles inline")
+            profiles.update(await self.fetch_profiles(missing))
+        if stale:
+            logger.info(f"{len(stale)} cached profiles are stale, scheduling background refresh")
+            await job_manager.submit("affinity_profile_refresh", dedupe=True)
+
+        return profiles
+
+    async def _registered_usernames(self) -> List[str]:
+        async with aiosqlite.connect(DB_PATH) as db:
+            cursor = await db.execute("SELECT anilist_username FROM users WHERE anilist_username IS NOT NULL")
+            rows = await cursor.fetchall()
+            await cursor.close()
+        return [r[0] for r in rows if r[0]]
+
+    async def _run_profile_refresh(self, ctx: JobContext) -> str:
+        """Job handler: re-fetch every registered profile that is missing or older than the TTL."""
+        usernames = await self._registered_usernames()
+        cached = await get_cached_anilist_profiles(usernames)
+        now = time.time()
+        due = [u for u in usernames if u.lower() not in cached or now - cached[u.lower()][1] > PROFILE_CACHE_TTL]
+
+        await ctx.progress(0, len(due), f"🔄 Refreshing {len(due)} AniList profiles", force=True)
+        profiles = await self.fetch_profiles(due, ctx)
+        pairs = await self.sync_affinity_matrix(ctx)
+        return f"✅ Refreshed {len(profiles)}/{len(due)} AniList profiles, updated {pairs} affinity pairs."
+
+    @tasks.loop(hours=PROFILE_REFRESH_HOURS)
+    async def refresh_profiles(self):
+        try:
+            await job_manager.submit("affinity_profile_refresh", dedupe=True)
+        except Exception as e:
+            logger.error(f"Failed to schedule profile refresh: {e}", exc_info=True)
+
+    @refresh_profiles.before_loop
+    async def before_refresh_profiles(self):
+        await self.bot.wait_until_ready()
+
+    # ---------------------------------------------------------
+    # Stored MediaListCollections (list-overlap mode)
+    # ---------------------------------------------------------
+    async def fetch_user_lists(self, session: aiohttp.ClientSession, username: str) -> Optional[List[tuple]]:
+        """Fetch a user's anime + manga list as [(media_id, media_type, status, score)]. None on failure."""
+        for attempt in range(1, MAX_RETRIES + 1):
+            try:
+                async with session.post(
+                    API_URL,
+                    json={"query": USER_LISTS_QUERY, "variables": {"name": username}},
+                    timeout=REQUEST_TIMEOUT
+                ) as resp:
+                    if resp.status == 429:
+                        retry_after = int(resp.headers.get("Retry-After", RETRY_DELAY))
+                        logger.warning(f"Rate limited fetching lists for {username}, waiting {retry_after}s")
+                        await asyncio.sleep(retry_after)
+                        continue
+                    if resp.status != 200:
+                        logger.warning(f"HTTP {resp.status} fetching lists for {username} (attempt {attempt})")
+                        if resp.status == 404:
+                            return None
+                    else:
+                        data = (await resp.json()).get("data") or {}
+                        entries = {}
+                        for media_type in ("anime", "manga"):
+                            for group in (data.get(media_type) or {}).get("lists") or []:
+                                # Custom lists repeat entries; keyed by media id they collapse to one
+                                for entry in group.get("entries") or []:
+                                    entries[entry["mediaId"]] = (
+                                        entry["mediaId"], media_type.upper(), entry.get("status"), entry.get("score") or 0
+                                    )
+                        return list(entries.values())
+
+            except asyncio.TimeoutError:
+                logger.error(f"Timeout fetching lists for {username} (attempt {attempt})")
+            except Exception as e:
+                logger.error(f"Error fetching lists for {username} (attempt {attempt}): {e}")
+
+            if attempt < MAX_RETRIES:
+                await asyncio.sleep(RETRY_DELAY)
+
+        logger.error(f"Failed to fetch lists for {username} after {MAX_RETRIES} attempts")
+        return None
+
+    async def refresh_user_lists(self, usernames: List[str], ctx: Optional[JobContext] = None) -> int:
+        """Fetch and store the given users' lists with bounded concurrency. Returns how many were stored."""
+        unique = list(dict.fromkeys(u for u in usernames if u))
+        semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+        stored = 0
+        done = 0
+        start = time.monotonic()
+
+        async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
+            async def run(username):
+                nonlocal stored, done
+                async with semaphore:
+                    entries = await self.fetch_user_lists(session, username)
+                if entries is not None:
+                    fingerprint = list_fingerprint((media_id, score) for media_id, _, _, score in entries)
+                    await save_anilist_list_entries(username, entries, fingerprint)
+                    stored += 1
+                done += 1
+                if ctx:
+                    await ctx.progress(done, len(unique), f"📚 Fetched {done}/{len(unique)} AniList lists")
+
+            results = await asyncio.gather(*(run(u) for u in unique), return_exceptions=True)
+
+        if ctx:
+            ctx.check_cancelled()
+        for r in results:
+            if isinstance(r, Exception):
+                logger.error(f"List fetch failed: {r}")
+
+        logger.info(f"Stored {stored}/{len(unique)} AniList lists in {time.monotonic() - start:.2f}s")
+        return stored
+
+    async def _run_list_refresh(self, ctx: JobContext) -> str:
+        """Job handler: re-fetch registered users' lists that are missing or older than the TTL, then rescore."""
+        usernames = await self._registered_usernames()
+        state = await get_anilist_list_state()
+        now = time.time()
+        due = [u for u in usernames if u.lower() not in state or now - state[u.lower()][1] > LIST_CACHE_TTL]
+
+        await ctx.progress(0, len(due), f"📚 Fetching {len(due)} AniList lists", force=True)
+        stored = await self.refresh_user_lists(due, ctx)
+        pairs = await self.sync_list_affinity(ctx)
+        return f"✅ Refreshed {stored}/{len(due)} AniList lists, updated {pairs} list affinity pairs."
+
+    @tasks.loop(hours=LIST_REFRESH_HOURS)
+    async def refresh_lists(self):
+        try:
+            await job_manager.submit("affinity_list_refresh", dedupe=True)
+        except Exception as e:
+            logger.error(f"Failed to schedule list refresh: {e}", exc_info=True)
+
+    @refresh_lists.before_loop
+    async def before_refresh_lists(self):
+        await self.bot.wait_until_ready()
+
+    async def sync_list_affinity(self, ctx: Optional[JobContext] = None) -> int:
+        """Rescore list-overlap pairs for users whose stored list changed since the last sync."""
+        async with self._list_lock:
+            start = time.monotonic()
+            registered = {u.lower() for u in await self._registered_usernames()}
+            state = await get_anilist_list_state()
+
+            removed = [name for name in state if name not in registered]
+            changed = [name for name, (entries_hash, _, synced_hash) in state.items()
+                       if name in registered and entries_hash != synced_hash]
+
+            if removed:
+                await remove_list_affinity_users(removed)
+            if not changed:
+                logger.debug("List affinity matrix up to date")
+                return 0
+
+            if ctx:
+                await ctx.progress(message=f"🧮 Comparing lists for {len(changed)} changed users", force=True)
+            entries = {name: items for name, items in (await get_anilist_list_entries()).items() if name in registered}
+            rows = await asyncio.to_thread(compute_list_affinity_rows, entries, changed)
+            await save_list_affinity_pairs(rows, {name: state[name][0] for name in changed})
+
+            logger.info(f"List affinity sync: {len(changed)} changed, {len(removed)} removed, "
+                        f"{len(rows)} pairs in {time.monotonic() - start:.2f}s")
+            return len(rows)
+
     # ---------------------------------------------------------
     # Advanced Affinity Calculation System
     # ---------------------------------------------------------
     def calculate_affinity(self, user1: dict, user2: dict, return_breakdown=False) -> float:
         """Calculate ultra-comprehensive affinity score using advanced weighting systems."""
         logger.debug(f"Calculating advanced affinity between {user1.get('name')} and {user2.get('name')}")
-        
-        # ===== UTILITY FUNCTIONS =====
-        def weighted_jaccard(set1, set2, rarity_weights=None):
-            """Advanced Jaccard similarity with rarity weighting."""
-            if not set1 or not set2:
-                return 0.0
-            
-            intersection = set1 & set2
-            union = set1 | set2
-            
-            if not intersection:
-                return 0.0
-            
-            if rarity_weights:
-                # Weight by inverse rarity (rare items count more)
-                intersection_weight = sum(rarity_weights.get(item, 1.0) for item in intersection)
-                union_weight = sum(rarity_weights.get(item, 1.0) for item in union)
-                return intersection_weight / max(union_weight, 1)
-            
-            return len(intersection) / len(union)
-
-        def gaussian_similarity(a, b, sigma=1.0):
-            """Gaussian similarity function for numeric values."""
-            if a == 0 and b == 0:
-                return 1.0
-            diff = abs(a - b)
-            max_val = max(abs(a), abs(b), 1)
-            normalized_diff = diff / max_val
-            return math.exp(-(normalized_diff ** 2) / (2 * sigma ** 2))
-
-        def log_similarity(a, b):
-            """Logarithmic similarity for highly variable numeric data."""
-            if a == 0 and b == 0:
-                return 1.0
-            log_a = math.log(max(a, 1))
-            log_b = math.log(max(b, 1))
-            return 1 / (1 + abs(log_a - log_b))
-
-        def experience_weight(count):
-            """Weight based on user experience level."""
-            if count == 0:
-                return 0.1
-            elif count < 10:
-                return 0.3
-            elif count < 50:
-                return 0.6
-            elif count < 100:
-                return 0.8
-            elif count < 500:
-                return 1.0
-            else:
-                return 1.2  # Bonus for very experienced users
-
-        def diversity_score(genres_list, formats_list):
-            """Calculate diversity bonus based on genre/format variety."""
-            total_items = len(genres_list) + len(formats_list)
-            if total_items == 0:
-                return 0.0
-            unique_genres = len(set(g.get("genre", "") for g in genres_list))
-            unique_formats = len(set(f.get("format", "") for f in formats_list))
-            return (unique_genres + unique_formats) / max(total_items, 1) * 0.5
-
-        def scoring_pattern_similarity(stats1, stats2):
-            """Analyze scoring patterns and tendencies."""
-            score1 = stats1.get("meanScore", 0)
-            score2 = stats2.get("meanScore", 0)
-            
-            # Classify scoring tendencies
-            def score_tendency(score):
-                if score == 0:
-                    return "unrated"
-                elif score < 4:
-                    return "harsh"
-                elif score < 6:
-                    return "critical"
-                elif score < 7.5:
-                    return "moderate"
-                elif score < 8.5:
-                    return "generous"
-                else:
-                    return "very_generous"
-            
-            tendency1 = score_tendency(score1)
-            tendency2 = score_tendency(score2)
-            
-            # Award points for similar scoring patterns
-            if tendency1 == tendency2:
-                return 1.0
-            elif abs(score1 - score2) <= 0.5:
-                return 0.8
-            elif abs(score1 - score2) <= 1.0:
-                return 0.6
-            elif abs(score1 - score2) <= 1.5:
-                return 0.4
-            else:
-                return 0.2
-
-        # ===== DATA EXTRACTION =====
-        # Extract favorites with enhanced structure
-        fav_anime1 = {a["id"] for a in user1.get("favourites", {}).get("anime", {}).get("nodes", [])}
-        fav_anime2 = {a["id"] for a in user2.get("favourites", {}).get("anime", {}).get("nodes", [])}
-        fav_manga1 = {m["id"] for m in user1.get("favourites", {}).get("manga", {}).get("nodes", [])}
-        fav_manga2 = {m["id"] for m in user2.get("favourites", {}).get("manga", {}).get("nodes", [])}
-        fav_char1 = {c["id"] for c in user1.get("favourites", {}).get("characters", {}).get("nodes", [])}
-        fav_char2 = {c["id"] for c in user2.get("favourites", {}).get("characters", {}).get("nodes", [])}
-
-        # Extract comprehensive statistics
-        anime_stats1 = user1.get("statistics", {}).get("anime", {})
-        anime_stats2 = user2.get("statistics", {}).get("anime", {})
-        manga_stats1 = user1.get("statistics", {}).get("manga", {})
-        manga_stats2 = user2.get("statistics", {}).get("manga", {})
-
-        # ===== SCORING COMPONENTS =====
-        
-        # 1. FAVORITES AFFINITY (25% weight)
-        anime_fav_score = weighted_jaccard(fav_anime1, fav_anime2) * 2.0  # High weight for anime favorites
-        manga_fav_score = weighted_jaccard(fav_manga1, fav_manga2) * 1.8  # High weight for manga favorites
-        char_fav_score = weighted_jaccard(fav_char1, fav_char2) * 1.5   # Character favorites
-        
-        # Bonus for having any shared favorites at all
-        shared_favorites_bonus = 0
-        if fav_anime1 & fav_anime2 or fav_manga1 & fav_manga2 or fav_char1 & fav_char2:
-            shared_favorites_bonus = 0.3
-        
-        favorites_score = (anime_fav_score + manga_fav_score + char_fav_score + shared_favorites_bonus) * 6.25
-
-        # 2. CONSUMPTION PATTERNS (20% weight)
-        anime_count1 = anime_stats1.get("count", 0)
-        anime_count2 = anime_stats2.get("count", 0)
-        manga_count1 = manga_stats1.get("count", 0)  
-        manga_count2 = manga_stats2.get("count", 0)
-        
-        # Experience-weighted consumption similarity
-        anime_exp_weight1 = experience_weight(anime_count1)
-        anime_exp_weight2 = experience_weight(anime_count2)
-        manga_exp_weight1 = experience_weight(manga_count1)
-        manga_exp_weight2 = experience_weight(manga_count2)
-        
-        avg_anime_weight = (anime_exp_weight1 + anime_exp_weight2) / 2
-        avg_manga_weight = (manga_exp_weight1 + manga_exp_weight2) / 2
-        
-        anime_count_sim = gaussian_similarity(anime_count1, anime_count2, sigma=0.8) * avg_anime_weight
-        manga_count_sim = gaussian_similarity(manga_count1, manga_count2, sigma=0.8) * avg_manga_weight
-        
-        # Episode/Chapter consumption patterns
-        episodes1 = anime_stats1.get("episodesWatched", 0)
-        episodes2 = anime_stats2.get("episodesWatched", 0)
-        chapters1 = manga_stats1.get("chaptersRead", 0)
-        chapters2 = manga_stats2.get("chaptersRead", 0)
-        
-        episode_sim = log_similarity(episodes1, episodes2)
-        chapter_sim = log_similarity(chapters1, chapters2)
-        
-        consumption_score = (anime_count_sim * 0.3 + manga_count_sim * 0.25 + 
-                           episode_sim * 0.25 + chapter_sim * 0.2) * 20
 
-        # 3. SCORING COMPATIBILITY (15% weight)
-        anime_scoring_sim = scoring_pattern_similarity(anime_stats1, anime_stats2)
-        manga_scoring_sim = scoring_pattern_similarity(manga_stats1, manga_stats2)
-        
-        # Additional scoring analysis
-        anime_score_sim = gaussian_similarity(anime_stats1.get("meanScore", 0), 
-                                            anime_stats2.get("meanScore", 0), sigma=0.6)
-        manga_score_sim = gaussian_similarity(manga_stats1.get("meanScore", 0), 
-                                            manga_stats2.get("meanScore", 0), sigma=0.6)
-        
-        scoring_score = (anime_scoring_sim * 0.4 + manga_scoring_sim * 0.35 + 
-                        anime_score_sim * 0.15 + manga_score_sim * 0.1) * 15
-
-        # 4. GENRE AFFINITY WITH WEIGHTED PREFERENCES (15% weight)
-        anime_genres1 = anime_stats1.get("genres", [])
-        anime_genres2 = anime_stats2.get("genres", [])
-        manga_genres1 = manga_stats1.get("genres", [])
-        manga_genres2 = manga_stats2.get("genres", [])
-        
-        # Create weighted genre sets (weight by count)
-        def create_weighted_genre_dict(genre_list):
-            return {g["genre"]: g["count"] for g in genre_list if g.get("genre") and g.get("count", 0) > 0}
-        
-        anime_genre_weights1 = create_weighted_genre_dict(anime_genres1)
-        anime_genre_weights2 = create_weighted_genre_dict(anime_genres2)
-        manga_genre_weights1 = create_weighted_genre_dict(manga_genres1)
-        manga_genre_weights2 = create_weighted_genre_dict(manga_genres2)
-        
-        def weighted_genre_similarity(weights1, weights2):
-            if not weights1 or not weights2:
-                return 0.0
-            
-            common_genres = set(weights1.keys()) & set(weights2.keys())
-            if not common_genres:
-                return 0.0
-            
-            # Calculate weighted cosine similarity
-            dot_product = sum(weights1[g] * weights2[g] for g in common_genres)
-            norm1 = math.sqrt(sum(w**2 for w in weights1.values()))
-            norm2 = math.sqrt(sum(w**2 for w in weights2.values()))
-            
-            if norm1 == 0 or norm2 == 0:
-                return 0.0
-                
-            return dot_product / (norm1 * norm2)
-        
-        anime_genre_sim = weighted_genre_similarity(anime_genre_weights1, anime_genre_weights2)
-        manga_genre_sim = weighted_genre_similarity(manga_genre_weights1, manga_genre_weights2)
-        
-        # Diversity bonus
-        diversity1 = diversity_score(anime_genres1 + manga_genres1, [])
-        diversity2 = diversity_score(anime_genres2 + manga_genres2, [])
-        diversity_bonus = gaussian_similarity(diversity1, diversity2, sigma=0.5) * 0.3
-        
-        genre_score = (anime_genre_sim * 0.5 + manga_genre_sim * 0.4 + diversity_bonus * 0.1) * 15
+        final_score, breakdown = calculate_affinity(user1, user2)
 
-        # 5. FORMAT PREFERENCES (10% weight)
-        anime_formats1 = anime_stats1.get("formats", [])
-        anime_formats2 = anime_stats2.get("formats", [])
-        manga_formats1 = manga_stats1.get("formats", [])
-        manga_formats2 = manga_stats2.get("formats", [])
-        
-        anime_format_weights1 = {f["format"]: f["count"] for f in anime_formats1 if f.get("format") and f.get("count", 0) > 0}
-        anime_format_weights2 = {f["format"]: f["count"] for f in anime_formats2 if f.get("format") and f.get("count", 0) > 0}
-        manga_format_weights1 = {f["format"]: f["count"] for f in manga_formats1 if f.get("format") and f.get("count", 0) > 0}
-        manga_format_weights2 = {f["format"]: f["count"] for f in manga_formats2 if f.get("format") and f.get("count", 0) > 0}
-        
-        anime_format_sim = weighted_genre_similarity(anime_format_weights1, anime_format_weights2)
-        manga_format_sim = weighted_genre_similarity(manga_format_weights1, manga_format_weights2)
-        
-        format_score = (anime_format_sim * 0.6 + manga_format_sim * 0.4) * 10
-
-        # 6. ACTIVITY LEVEL COMPATIBILITY (8% weight)
-        total_anime1 = anime_count1 + episodes1 / 12  # Normalize episodes to "series equivalent"
-        total_anime2 = anime_count2 + episodes2 / 12
-        total_manga1 = manga_count1 + chapters1 / 50   # Normalize chapters to "series equivalent"  
-        total_manga2 = manga_count2 + chapters2 / 50
-        
-        total_activity1 = total_anime1 + total_manga1
-        total_activity2 = total_anime2 + total_manga2
-        
-        activity_sim = gaussian_similarity(total_activity1, total_activity2, sigma=1.0)
-        
-        # Bonus for both being active users
-        if total_activity1 > 10 and total_activity2 > 10:
-            activity_sim *= 1.2
-            
-        activity_score = activity_sim * 8
-
-        # 7. BALANCE FACTOR (7% weight) - Anime vs Manga preference balance
-        def media_balance(anime_count, manga_count):
-            total = anime_count + manga_count
-            if total == 0:
-                return 0.5  # Neutral
-            return anime_count / total
-        
-        balance1 = media_balance(anime_count1, manga_count1)
-        balance2 = media_balance(anime_count2, manga_count2)
-        
-        balance_sim = gaussian_similarity(balance1, balance2, sigma=0.4)
-        balance_score = balance_sim * 7
-
-        # ===== FINAL CALCULATION =====
-        raw_score = (
-            favorites_score +      # 25%
-            consumption_score +    # 20%
-            scoring_score +        # 15%
-            genre_score +          # 15%
-            format_score +         # 10%
-            activity_score +       # 8%
-            balance_score          # 7%
-        )
-        
-        # Apply experience multiplier (bonus for comparing experienced users)
-        min_experience = min(avg_anime_weight, avg_manga_weight)
-        experience_multiplier = 0.9 + (min_experience * 0.2)  # 0.9 to 1.1 multiplier
-        
-        # Apply completion bonus (users who complete series vs droppers)
-        # This would need additional data, so we'll use a placeholder
-        completion_bonus = 1.0
-        
-        final_score = min(raw_score * experience_multiplier * completion_bonus, 100.0)
-        
-        logger.debug(f"Advanced affinity breakdown - Favorites: {favorites_score:.2f}, "
-                    f"Consumption: {consumption_score:.2f}, Scoring: {scoring_score:.2f}, "
-                    f"Genres: {genre_score:.2f}, Formats: {format_score:.2f}, "
-                    f"Activity: {activity_score:.2f}, Balance: {balance_score:.2f}")
+        logger.debug(f"Advanced affinity breakdown - Favorites: {breakdown['favorites']:.2f}, "
+                    f"Consumption: {breakdown['consumption']:.2f}, Scoring: {breakdown['scoring']:.2f}, "
+                    f"Genres: {breakdown['genres']:.2f}, Formats: {breakdown['formats']:.2f}, "
+                    f"Activity: {breakdown['activity']:.2f}, Balance: {breakdown['balance']:.2f}")
         logger.debug(f"Final affinity calculated: {final_score:.2f}%")
-        
+
         if return_breakdown:
-            breakdown = {
-                'favorites': favorites_score,
-                'consumption': consumption_score,
-                'scoring': scoring_score,
-                'genres': genre_score,
-                'formats': format_score,
-                'activity': activity_score,
-                'balance': balance_score
-            }
-            return round(final_score, 2), breakdown
-        
-        return round(final_score, 2)
+            return final_score, breakdown
+        return final_score
+
+    # ---------------------------------------------------------
+    # Stored affinity matrix (incremental)
+    # ---------------------------------------------------------
+    async def sync_affinity_matrix(self, ctx: Optional[JobContext] = None) -> int:
+        """
+        Recompute stored pairs only for users whose cached profile changed since the last sync.
+        Returns the number of pairs written.
+        """
+        async with self._matrix_lock:
+            start = time.monotonic()
+            usernames = await self._registered_usernames()
+            cached = await get_cached_anilist_profiles(usernames)
+            profiles = {name: profile for name, (profile, _) in cached.items()}
+            state = await get_affinity_sync_state()
+
+            hashes = {name: profile_fingerprint(profile) for name, profile in profiles.items()}
+            changed = [name for name, profile_hash in hashes.items() if state.get(name) != profile_hash]
+            removed = [name for name in state if name not in hashes]
+
+            if removed:
+                await remove_affinity_users(removed)
+            if not changed:
+                logger.debug("Affinity matrix up to date")
+                return 0
+
+            if ctx:
+                await ctx.progress(message=f"🧮 Scoring affinity for {len(changed)} changed profiles", force=True)
+            rows = await asyncio.to_thread(compute_affinity_rows, profiles, changed)
+            await save_affinity_pairs(rows, {name: hashes[name] for name in changed})
+
+            logger.info(f"Affinity matrix sync: {len(changed)} changed, {len(removed)} removed, "
+                        f"{len(rows)} pairs in {time.monotonic() - start:.2f}s")
+            return len(rows)
 
     # ---------------------------------------------------------
     # Enhanced Paginated Embed View with Detailed Breakdowns
     # ---------------------------------------------------------
     class AffinityView(discord.ui.View):
-        def __init__(self, entries, user_name, detailed_data=None):
+        def __init__(self, entries, user_name, detailed_data=None, mode="profile"):
             super().__init__(timeout=300)  # 5 minute timeout
+            self.mode = mode
             self.entries = entries
             self.page = 0
             self.user_name = user_name
@@ -447,7 +522,13 @@ class Affinity(commands.Cog):
                     base_info = f"{i}. `{score}%` — <@{discord_id}>"
                     
                     # Add breakdown if available
-                    if discord_id in self.detailed_data:
+                    if discord_id in self.detailed_data and self.mode == "lists":
+                        breakdown = self.detailed_data[discord_id]
+                        detail = (f"\n   └ *Shared: {breakdown.get('shared', 0)} titles | "
+                                f"Co-rated: {breakdown.get('co_rated', 0)} | "
+                                f"Correlation: {breakdown.get('correlation') or 0:+.2f}*")
+                        base_info += detail
+                    elif discord_id in self.detailed_data:
                         breakdown = self.detailed_data[discord_id]
                         detail = (f"\n   └ *Fav: {breakdown.get('favorites', 0):.1f}% | "
                                 f"Usage: {breakdown.get('consumption', 0):.1f}% | "
@@ -466,6 +547,8 @@ class Affinity(commands.Cog):
                     for i, (discord_id, score) in enumerate(current_entries, start=start + 1)
                 )
                 embed_title = f"💞 Affinity Ranking for {self.user_name}"
+            if self.mode == "lists":
+                embed_title += " (shared lists)"
 
             if not description:
                 description = "No users found."
@@ -555,14 +638,19 @@ class Affinity(commands.Cog):
         name="affinity",
         description="Compare your affinity with all registered AniList users"
     )
-    async def affinity(self, interaction: discord.Interaction):
+    @app_commands.describe(mode="What to compare (default: profile statistics)")
+    @app_commands.choices(mode=[
+        app_commands.Choice(name="Profile statistics", value="profile"),
+        app_commands.Choice(name="Shared titles & scores", value="lists"),
+    ])
+    async def affinity(self, interaction: discord.Interaction, mode: str = "profile"):
         """Calculate and display affinity rankings for the requesting user."""
         await interaction.response.defer()
         
         discord_id = interaction.user.id
         user_display = interaction.user.display_name
         
-        logger.info(f"Affinity command started by {user_display} (ID: {discord_id})")
+        logger.info(f"Affinity command ({mode}) started by {user_display} (ID: {discord_id})")
         
         try:
             # Get user's AniList username
@@ -600,8 +688,14 @@ class Affinity(commands.Cog):
                 )
                 return
 
-            # Fetch requesting user's data
-            me = await self.fetch_user(anilist_username)
+            if mode == "lists":
+                await self._send_list_affinity(interaction, anilist_username, all_users, user_display)
+                return
+
+            # Load every profile at once (DB cache first, missing ones in aliased batches)
+            profiles = await self.get_profiles([anilist_username] + [u for _, u in all_users])
+
+            me = profiles.get(anilist_username.lower()) if anilist_username else None
             if not me:
                 logger.error(f"Failed to fetch AniList data for {anilist_username}")
                 await interaction.followup.send(
@@ -610,22 +704,23 @@ class Affinity(commands.Cog):
                 )
                 return
 
-            # Calculate affinities with detailed breakdowns
-            logger.info(f"Starting advanced affinity calculations for {anilist_username}")
+            # Bring the stored matrix up to date (only changed profiles are rescored), then read it
+            logger.info(f"Loading stored affinity matches for {anilist_username}")
+            await self.sync_affinity_matrix()
+            matches = await get_top_affinity_matches(anilist_username.lower())
+
+            discord_ids = {other_anilist.lower(): other_discord_id for other_discord_id, other_anilist in all_users}
             results = []
             detailed_data = {}
             successful_comparisons = 0
-            
-            for other_discord_id, other_anilist in all_users:
-                other_user = await self.fetch_user(other_anilist)
-                if other_user:
-                    score, breakdown = self.calculate_affinity(me, other_user, return_breakdown=True)
-                    results.append((other_discord_id, score))
-                    detailed_data[other_discord_id] = breakdown
-                    successful_comparisons += 1
-                    logger.debug(f"Calculated advanced affinity with {other_anilist}: {score}%")
-                else:
-                    logger.warning(f"Failed to fetch data for {other_anilist}")
+
+            for other_anilist, score, breakdown in matches:
+                other_discord_id = discord_ids.get(other_anilist)
+                if other_discord_id is None:
+                    continue
+                results.append((other_discord_id, score))
+                detailed_data[other_discord_id] = breakdown
+                successful_comparisons += 1
 
             if not results:
                 logger.warning("No successful affinity calculations")
@@ -635,9 +730,7 @@ class Affinity(commands.Cog):
                 )
                 return
 
-            # Sort results by affinity score (highest first)
-            results.sort(key=lambda x: x[1], reverse=True)
-            
+            # Matches come back sorted by affinity score (highest first)
             logger.info(f"Advanced affinity calculation completed: {successful_comparisons}/{len(all_users)} successful comparisons")
 
             # Create and send enhanced paginated view with detailed breakdowns
@@ -652,6 +745,50 @@ class Affinity(commands.Cog):
                 ephemeral=True
             )
 
+    async def _send_list_affinity(self, interaction: discord.Interaction, anilist_username: str,
+                                  all_users: list, user_display: str):
+        """/affinity mode=lists: ranking straight from the stored list-overlap matrix."""
+        state = await get_anilist_list_state()
+        if anilist_username.lower() not in state:
+            # First use: fetch the caller's own list inline so they get a result right away
+            logger.info(f"No stored list for {anilist_username}, fetching inline")
+            if not await self.refresh_user_lists([anilist_username]):
+                await interaction.followup.send(
+                    "❌ Could not fetch your AniList lists. Make sure your profile is public and try again.",
+                    ephemeral=True
+                )
+                return
+            await self.sync_list_affinity()
+
+        now = time.time()
+        pending = [u for _, u in all_users if u.lower() not in state or now - state[u.lower()][1] > LIST_CACHE_TTL]
+        note = None
+        if pending:
+            job_id = await job_manager.submit("affinity_list_refresh", dedupe=True)
+            note = f"📚 {len(pending)} members' lists are being refreshed in the background (job #{job_id})."
+
+        matches = await get_top_list_affinity_matches(anilist_username.lower())
+        discord_ids = {other_anilist.lower(): other_discord_id for other_discord_id, other_anilist in all_users}
+        results = []
+        detailed_data = {}
+        for other_anilist, score, breakdown in matches:
+            other_discord_id = discord_ids.get(other_anilist)
+            if other_discord_id is None:
+                continue
+            results.append((other_discord_id, score))
+            detailed_data[other_discord_id] = breakdown
+
+        if not results:
+            await interaction.followup.send(
+                note or "❌ You don't share any titles with other registered users yet.",
+                ephemeral=True
+            )
+            return
+
+        logger.info(f"List affinity: {len(results)} matches for {anilist_username}, {len(pending)} lists pending")
+        view = self.AffinityView(results, user_display, detailed_data, mode="lists")
+        await interaction.followup.send(content=note, embed=view.get_embed(), view=view)
+
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(Affinity(bot))
\ No newline at end of file
@@ -11,10 +11,12 @@ import os
 import logging
 from datetime import datetime
 from helpers.challenge_helper import assign_challenge_role, get_manga_difficulty, get_challenge_difficulty, calculate_manga_points, calculate_challenge_completion_bonus
+from helpers.logging_helper import queued_file_handler
+from helpers.metrics import http_trace_configs
 
 
 logger = logging.getLogger("ChallengeProgress")
-file_handler = logging.FileHandler("logs/challenge_update.log")
+file_handler = queued_file_handler("logs/challenge_update.log")
 file_handler.setFormatter(logging.Formatter("%(asctime)s | %(levelname)s | %(message)s"))
 logger.addHandler(file_handler)
 logger.setLevel(logging.INFO)
@@ -38,7 +40,7 @@ async def fetch_anilist_progress(anilist_id: int, manga_id: int):
     variables = {"userId": anilist_id, "mediaId": manga_id}
 
     try:
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
             async with session.post(ANILIST_API, json={"query": query, "variables": variables}) as resp:
                 if resp.status != 200:
                     logger.error(f"AniList API returned status {resp.status} for user {anilist_id}, manga {manga_id}")
@@ -100,7 +102,7 @@ async def fetch_user_manga_progress(anilist_username: str, manga_id: int, db=Non
     }
     """
     try:
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
             async with session.post(
                 "https://graphql.anilist.co",
                 json={"query": query, "variables": {"username": anilist_username, "mediaId": manga_id}},
@@ -7,6 +7,8 @@ import logging
 import os
 from pathlib import Path
 from config import GUILD_ID
+from helpers.logging_helper import queued_file_handler
+from helpers.metrics import http_trace_configs
 from database import DB_PATH
 
 # Configuration constants
@@ -25,7 +27,7 @@ logger.setLevel(logging.DEBUG)
 logger.handlers.clear()
 
 # Create file handler that clears on startup
-file_handler = logging.FileHandler(LOG_FILE, mode='w', encoding='utf-8')
+file_handler = queued_file_handler(LOG_FILE, mode="w")
 file_handler.setLevel(logging.DEBUG)
 
 # Create formatter
@@ -135,7 +137,7 @@ class ChallengeChange(commands.Cog):
         try:
             logger.debug(f"Fetching manga info from AniList for ID {manga_id}")
             
-            async with aiohttp.ClientSession() as session:
+            async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
                 async with session.post(
                     ANILIST_API_URL,
                     json={"query": query, "variables": {"id": manga_id}},
@@ -16,6 +16,9 @@ from helpers.challenge_helper import (
     get_manga_difficulty,
     assign_challenge_role
 )
+from helpers.job_helper import job_manager, JobContext
+from helpers.logging_helper import queued_file_handler, roll_over_file
+from helpers.metrics import http_trace_configs
 
 # ------------------------------------------------------
 # Logging setup
@@ -27,7 +30,7 @@ LOG_FILE = os.path.join(LOG_DIR, "challenge_update.log")
 logger = logging.getLogger("ChallengeUpdate")
 logger.setLevel(logging.INFO)
 if not logger.handlers:
-    file_handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
+    file_handler = queued_file_handler(LOG_FILE)
     formatter = logging.Formatter("[%(asctime)s] [%(levelname)s] %(message)s")
     file_handler.setFormatter(formatter)
     logger.addHandler(file_handler)
@@ -51,7 +54,7 @@ async def fetch_anilist_progress(anilist_id: int, manga_id: int):
     variables = {"userId": anilist_id, "mediaId": manga_id}
 
     try:
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
             async with session.post(ANILIST_API, json={"query": query, "variables": variables}) as resp:
                 if resp.status != 200:
                     logger.error(f"AniList API returned status {resp.status} for user {anilist_id}, manga {manga_id}")
@@ -85,7 +88,7 @@ class ChallengeUpdate(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.cancel_flags = {}
+        job_manager.register("challenge_update", self._run_challenge_update)
 
     @app_commands.guilds(discord.Object(id=GUILD_ID))
     @commands.has_permissions(administrator=True)
@@ -95,48 +98,24 @@ class ChallengeUpdate(commands.Cog):
     )
     @app_commands.describe(user="Discord member to update")
     async def challenge_update(self, interaction: discord.Interaction, user: discord.Member):
-        await interaction.response.send_message(f"🔄 Challenge update started for {user.mention}. You will receive a summary once complete.", ephemeral=True)
-        user_id = user.id
-        self.cancel_flags[user_id] = False
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        await job_manager.submit(
+            "challenge_update",
+            {"user_id": user.id},
+            created_by=interaction.user.id,
+            interaction=interaction,
+            description=f"🔄 Challenge update for {user.mention}"
+        )
+
+    async def _run_challenge_update(self, ctx: JobContext) -> str:
+        """Job handler: recompute challenge progress, points and roles for one user."""
+        user_id = ctx.params["user_id"]
+        user = self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
         updated_count = 0
         skipped_count = 0
 
-        # --- Clear and re-create log file/handler for this command run ---
-        try:
-            # Remove and close existing handlers
-            for h in list(logger.handlers):
-                logger.removeHandler(h)
-                try:
-                    h.close()
-                except Exception:
-                    pass
-
-            # Truncate the log file
-            open(LOG_FILE, "w", encoding="utf-8").close()
-
-            # Recreate file handler so new session writes to a fresh file
-            file_handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
-            formatter = logging.Formatter("[%(asctime)s] [%(levelname)s] %(message)s")
-            file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
-        except Exception:
-            # If clearing logs fails, continue without raising (logging will still work if possible)
-            pass
-
-        # Helper to update the ephemeral progress message (throttled)
-        last_update = 0.0
-        async def _edit_progress(text: str, force: bool = False):
-            nonlocal last_update
-            now = asyncio.get_event_loop().time()
-            # Throttle updates to avoid spamming edits (0.5s default)
-            if not force and now - last_update < 0.5:
-                return
-            last_update = now
-            try:
-                await interaction.edit_original_response(content=text)
-            except Exception:
-                # ignore editing errors (user might have closed interaction or rate limit)
-                pass
+        # Each run starts a fresh log file; the previous run is kept as .1
+        roll_over_file(LOG_FILE)
 
         async with aiosqlite.connect(DB_PATH) as db:
             db.row_factory = aiosqlite.Row
@@ -150,9 +129,8 @@ class ChallengeUpdate(commands.Cog):
             await cursor.close()
 
             if not row or not row['anilist_id']:
-                await interaction.followup.send(f"⚠️ No AniList ID found for {user.mention}.", ephemeral=True)
                 logger.warning(f"No AniList ID for user {user}")
-                return
+                raise RuntimeError(f"No AniList ID found for {user.mention}.")
 
             anilist_id = row['anilist_id']
             anilist_username = row['anilist_username'] or str(user)
@@ -161,9 +139,8 @@ class ChallengeUpdate(commands.Cog):
             # Fetch challenges
             challenges = await db.execute_fetchall("SELECT challenge_id, title, start_date FROM global_challenges")
             if not challenges:
-                await interaction.followup.send("⚠️ No challenges found in the database.", ephemeral=True)
                 logger.warning("No challenges found in the database")
-                return
+                return "⚠️ No challenges found in the database."
 
             # --- Main loop over challenges ---
             final_summary = []  # Collect data for embed at the end
@@ -187,11 +164,10 @@ class ChallengeUpdate(commands.Cog):
                 for row in manga_rows:
                     processed_manga += 1
 
-                    # allow cancellation from elsewhere
-                    if self.cancel_flags.get(user_id):
-                        await _edit_progress("❌ Challenge update cancelled.", force=True)
-                        logger.info("Challenge update cancelled by user")
-                        return
+                    # allow cancellation from /jobs
+                    if ctx.cancelled:
+                        logger.info("Challenge update cancelled via /jobs")
+                        ctx.check_cancelled()
 
                     manga_id = row['manga_id']
                     title = row['title']
@@ -353,7 +329,8 @@ class ChallengeUpdate(commands.Cog):
                     })
 
                     # Log per-manga
-                    logger.info(f"{anilist_username} | {title} | Chapters: {ani_progress}/{total_chapters} | Status: {status} | Points: {points}")
+                    logger.info("%s | %s | Chapters: %s/%s | Status: %s | Points: %s",
+                                anilist_username, title, ani_progress, total_chapters, status, points)
 
                     # Upsert into DB
                     await db.execute(
@@ -381,7 +358,7 @@ class ChallengeUpdate(commands.Cog):
                         f"Manga {processed_manga}/{total_manga} — {manga_id}\n"
                         f"Processed: {updated_count} updated, {skipped_count} skipped"
                     )
-                    await _edit_progress(progress_text)
+                    await ctx.progress(processed_challenges - 1, total_challenges, progress_text)
 
                 # End manga loop -> per-challenge summary calculations
                 bonus_points = calculate_challenge_completion_bonus(user_progress)
@@ -419,7 +396,7 @@ class ChallengeUpdate(commands.Cog):
                 })
 
             # Final progress update (force)
-            await _edit_progress("✅ Challenge update complete. Preparing summary...", force=True)
+            await ctx.progress(total_challenges, total_challenges, "✅ Challenge update complete. Preparing summary...", force=True)
 
             # Send final summary as a followup (ephemeral)
             summary_lines = []
@@ -430,8 +407,6 @@ class ChallengeUpdate(commands.Cog):
                     f"Points {s['total_points']} | Roles assigned: {roles_part}"
                 )
             summary_text = "Challenge update finished.\n\n" + "\n".join(summary_lines)
-            # Send ephemeral summary to the command user
-            await interaction.followup.send(summary_text, ephemeral=True)
             # Send detailed summary via DM instead of public message
             try:
                 dm_embed = discord.Embed(
@@ -456,5 +431,8 @@ class ChallengeUpdate(commands.Cog):
                 # Log any other DM sending errors but don't crash
                 logger.error(f"Failed to send DM summary to {user}: {e}")
 
+            # Shown to the command user (and stored on the job) by the job runner
+            return summary_text
+
 async def setup(bot: commands.Bot):
     await bot.add_cog(ChallengeUpdate(bot))
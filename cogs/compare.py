@@ -3,6 +3,7 @@ from discord.ext import commands
 from discord import app_commands
 import aiohttp
 from config import GUILD_ID
+from helpers.metrics import http_trace_configs
 
 API_URL = "https://graphql.anilist.co"
 
@@ -39,7 +40,7 @@ class Compare(commands.Cog):
             "variables": {"search": query, "type": media_type.upper()},
         }
 
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
             async with session.post(API_URL, json=graphql_query) as resp:
                 if resp.status != 200:
                     return None
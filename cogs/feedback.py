@@ -5,6 +5,8 @@ from discord.ui import View, Button
 import logging
 from pathlib import Path
 from config import CHANNEL_ID
+from helpers.message_dispatch import message_dispatcher
+from helpers.logging_helper import queued_file_handler
 
 # ------------------------------------------------------
 # Logging Setup - Safe handling
@@ -20,7 +22,7 @@ logger.setLevel(logging.INFO)
 # Only add handler if not already present
 if not logger.handlers:
     # File handler with safe file access
-    file_handler = logging.FileHandler(LOG_FILE, encoding='utf-8')
+    file_handler = queued_file_handler(LOG_FILE)
     file_handler.setLevel(logging.INFO)
     
     # Formatter
@@ -52,6 +54,10 @@ class Feedback(commands.Cog):
         self.bot.add_view(CloseThreadView(self.bot, user=None, thread=None))
         self.bot.add_view(ConfirmCloseView(self.bot, user=None, thread=None, mod=None))
         logger.info("✅ Persistent views re-registered: FeedbackView, CloseThreadView, ConfirmCloseView")
+        message_dispatcher.register("feedback", self.on_message, check=self._is_feedback_message)
+
+    async def cog_unload(self):
+        message_dispatcher.unregister("feedback")
 
     async def _prepare_message_data(self, message: discord.Message):
         """Helper method to prepare files and embeds from a message."""
@@ -124,9 +130,11 @@ class Feedback(commands.Cog):
                 ephemeral=True
             )
 
-    @commands.Cog.listener()
+    def _is_feedback_message(self, message: discord.Message) -> bool:
+        return message.channel.id in self.feedback_threads or isinstance(message.channel, discord.DMChannel)
+
     async def on_message(self, message: discord.Message):
-        """Handle DM communication between mods and users."""
+        """Handle DM communication between mods and users (routed by the message dispatcher)."""
         if message.author.bot:
             return
 
@@ -10,7 +10,15 @@ from datetime import datetime
 import random
 
 from config import GUILD_ID
-from database import DB_PATH, execute_db_operation
+from helpers.logging_helper import queued_file_handler
+from database import (
+    DB_PATH,
+    execute_db_operation,
+    upsert_invites,
+    record_recruitment_join,
+    record_member_leave,
+    get_recruitment_analytics,
+)
 
 # ------------------------------------------------------
 # Logging Setup - Clears on each bot run
@@ -19,14 +27,6 @@ LOG_DIR = Path("logs")
 LOG_DIR.mkdir(exist_ok=True)
 LOG_FILE = LOG_DIR / "invite_tracker.log"
 
-# Clear the log file on startup (safe method)
-try:
-    if LOG_FILE.exists():
-        LOG_FILE.unlink()
-except PermissionError:
-    # File is in use, just continue with existing file
-    pass
-
 # Create logger
 logger = logging.getLogger("InviteTracker")
 logger.setLevel(logging.INFO)
@@ -36,7 +36,7 @@ for handler in logger.handlers[:]:
     logger.removeHandler(handler)
 
 # Create file handler
-file_handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
+file_handler = queued_file_handler(LOG_FILE, mode="w")
 file_handler.setLevel(logging.INFO)
 
 # Create formatter
@@ -51,6 +51,8 @@ logger.addHandler(file_handler)
 
 logger.info("Invite Tracker cog logging initialized")
 
+JOIN_COALESCE_SECONDS = 1.0  # joins within this window share one guild.invites() fetch
+
 # ------------------------------------------------------
 # Xianxia Themed Messages
 # ------------------------------------------------------
@@ -87,8 +89,11 @@ class InviteTracker(commands.Cog):
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.invite_cache: Dict[int, List[discord.Invite]] = {}
+        self.invite_cache: Dict[int, Dict[str, discord.Invite]] = {}  # guild_id -> {code: invite}
         self.announcement_channels: Dict[int, int] = {}  # guild_id -> channel_id
+        self._pending_joins: Dict[int, List[discord.Member]] = {}  # guild_id -> joins awaiting the next fetch
+        self._join_flushes: Dict[int, asyncio.Task] = {}
+        self._flush_locks: Dict[int, asyncio.Lock] = {}  # one invite fetch + cache update per guild at a time
         logger.info("Invite Tracker cog initialized")
     
     async def cog_load(self):
@@ -110,7 +115,7 @@ class InviteTracker(commands.Cog):
         for guild in self.bot.guilds:
             try:
                 invites = await guild.invites()
-                self.invite_cache[guild.id] = invites
+                self.invite_cache[guild.id] = {inv.code: inv for inv in invites}
                 
                 # Update database with current invites
                 await self._update_invites_in_db(guild.id, invites)
@@ -145,126 +150,118 @@ class InviteTracker(commands.Cog):
             logger.error(f"Error loading channel settings: {e}")
     
     async def _update_invites_in_db(self, guild_id: int, invites: List[discord.Invite]):
-        """Update invite database with current invite data"""
-        for invite in invites:
-            try:
-                await execute_db_operation(
-                    "upsert invite",
-                    """
-                    INSERT OR REPLACE INTO invites 
-                    (invite_code, guild_id, inviter_id, inviter_name, channel_id, max_uses, uses)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        invite.code,
-                        guild_id,
-                        invite.inviter.id if invite.inviter else 0,
-                        invite.inviter.display_name if invite.inviter else "Unknown",
-                        invite.channel.id if invite.channel else None,
-                        invite.max_uses or -1,
-                        invite.uses or 0
-                    )
-                )
-            except Exception as e:
-                logger.error(f"Error updating invite {invite.code} in database: {e}")
+        """Update invite database with current invite data (one transaction)"""
+        rows = [
+            (
+                invite.code,
+                guild_id,
+                invite.inviter.id if invite.inviter else 0,
+                invite.inviter.display_name if invite.inviter else "Unknown",
+                invite.channel.id if invite.channel else None,
+                invite.max_uses or -1,
+                invite.uses or 0
+            )
+            for invite in invites
+        ]
+        try:
+            await upsert_invites(rows)
+        except Exception as e:
+            logger.error(f"Error updating {len(rows)} invites in database: {e}")
     
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
-        """Handle member join and track which invite was used"""
+        """Queue the join; joins arriving together are resolved against one invite fetch"""
         if member.bot:
             return
         
         guild = member.guild
         logger.info(f"{member} joined {guild.name}")
         
+        self._pending_joins.setdefault(guild.id, []).append(member)
+        if guild.id not in self._join_flushes:
+            self._join_flushes[guild.id] = asyncio.create_task(self._flush_joins(guild))
+    
+    async def _flush_joins(self, guild: discord.Guild):
+        """Fetch invites once for every join queued in the coalescing window and attribute them"""
         try:
-            # Get current invites
-            current_invites = await guild.invites()
-            cached_invites = self.invite_cache.get(guild.id, [])
-            
-            # Find which invite was used
-            used_invite = None
-            inviter = None
+            await asyncio.sleep(JOIN_COALESCE_SECONDS)
+        finally:
+            # Joins arriving from here on start the next window
+            self._join_flushes.pop(guild.id, None)
+            members = self._pending_joins.pop(guild.id, [])
+        if not members:
+            return
+        
+        # The next window's flush may start while this one is still fetching; diffing both
+        # fetches against the same cached counts would attribute the same uses twice
+        async with self._flush_locks.setdefault(guild.id, asyncio.Lock()):
+            try:
+                current_invites = await guild.invites()
+            except discord.Forbidden:
+                logger.warning(f"Missing permissions to check invites in {guild.name}")
+                current_invites = None
+            except Exception as e:
+                logger.error(f"Error fetching invites for {len(members)} joins in {guild.name}: {e}")
+                current_invites = None
             
-            for current_invite in current_invites:
-                # Find matching cached invite
-                cached_invite = next(
-                    (inv for inv in cached_invites if inv.code == current_invite.code),
-                    None
-                )
+            if current_invites is not None:
+                cached = self.invite_cache.get(guild.id, {})
                 
-                if cached_invite and current_invite.uses > cached_invite.uses:
-                    used_invite = current_invite
-                    inviter = current_invite.inviter
-                    break
-            
-            # Update cache
-            self.invite_cache[guild.id] = current_invites
-            
-            if used_invite and inviter and inviter != member:
-                await self._handle_invited_join(member, inviter, used_invite)
-            else:
+                # One pass over the fresh list: use-count deltas and rows whose data changed
+                used: List[Tuple[discord.Invite, int]] = []
+                changed: List[discord.Invite] = []
+                for invite in current_invites:
+                    old = cached.get(invite.code)
+                    if old is None:
+                        changed.append(invite)
+                        continue
+                    delta = (invite.uses or 0) - (old.uses or 0)
+                    if delta > 0:
+                        used.append((invite, delta))
+                    if delta or invite.max_uses != old.max_uses:
+                        changed.append(invite)
+                
+                self.invite_cache[guild.id] = {inv.code: inv for inv in current_invites}
+        
+        if current_invites is None:
+            for member in members:
                 await self._handle_unknown_join(member)
-            
-            await self._update_invites_in_db(guild.id, current_invites)
-            
-        except discord.Forbidden:
-            logger.warning(f"Missing permissions to check invites in {guild.name}")
-            await self._handle_unknown_join(member)
-        except Exception as e:
-            logger.error(f"Error handling member join for {member}: {e}")
-            await self._handle_unknown_join(member)
+            return
+        
+        if len(members) > 1:
+            logger.info(f"Coalesced {len(members)} joins in {guild.name} onto one invite fetch "
+                        f"({sum(d for _, d in used)} tracked uses)")
+        
+        # Members are matched to used invites in join order; with several invites used in one
+        # window the pairing is a best guess, which is all the invite counts can tell us
+        for member in members:
+            try:
+                while used and used[0][1] == 0:
+                    used.pop(0)
+                if used:
+                    invite, remaining = used[0]
+                    used[0] = (invite, remaining - 1)
+                    inviter = invite.inviter
+                    if inviter and inviter != member:
+                        await self._handle_invited_join(member, inviter, invite)
+                        continue
+                await self._handle_unknown_join(member)
+            except Exception as e:
+                logger.error(f"Error handling member join for {member}: {e}")
+        
+        if changed:
+            await self._update_invites_in_db(guild.id, changed)
     
     async def _handle_invited_join(self, member: discord.Member, inviter: discord.Member, invite: discord.Invite):
         """Handle when someone joins via a tracked invite"""
         guild = member.guild
         
         try:
-            # Record the invite use in database
-            await execute_db_operation(
-                "record invite use",
-                """
-                INSERT INTO invite_uses 
-                (guild_id, invite_code, inviter_id, inviter_name, joiner_id, joiner_name)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    guild.id,
-                    invite.code,
-                    inviter.id,
-                    inviter.display_name,
-                    member.id,
-                    member.display_name
-                )
-            )
-            
-            # Update recruitment stats
-            await execute_db_operation(
-                "update recruitment stats",
-                """
-                INSERT OR REPLACE INTO recruitment_stats
-                (user_id, guild_id, username, total_recruits)
-                VALUES (?, ?, ?, COALESCE((
-                    SELECT total_recruits + 1 FROM recruitment_stats 
-                    WHERE user_id = ? AND guild_id = ?
-                ), 1))
-                """,
-                (inviter.id, guild.id, inviter.display_name, inviter.id, guild.id)
-            )
-            
-            # Get updated recruit count
-            result = await execute_db_operation(
-                "get recruit count",
-                """
-                SELECT total_recruits FROM recruitment_stats 
-                WHERE user_id = ? AND guild_id = ?
-                """,
-                (inviter.id, guild.id),
-                fetch_type='one'
+            # Record the invite use; recruitment stats and sect counters are updated in the same transaction
+            recruit_count = await record_recruitment_join(
+                guild.id, invite.code, inviter.id, inviter.display_name, member.id, member.display_name
             )
             
-            recruit_count = result[0] if result else 1
-            
         except Exception as e:
             logger.error(f"Error recording invite join for {member}: {e}")
             recruit_count = 1
@@ -320,30 +317,8 @@ class InviteTracker(commands.Cog):
         days_in_server = (datetime.utcnow() - join_date).days if join_date else 0
         
         try:
-            # Check if they were invited by someone
-            result = await execute_db_operation(
-                "get inviter for leaving member",
-                """
-                SELECT inviter_id FROM invite_uses 
-                WHERE guild_id = ? AND joiner_id = ? 
-                ORDER BY joined_at DESC LIMIT 1
-                """,
-                (guild.id, member.id),
-                fetch_type='one'
-            )
-            
-            inviter_id = result[0] if result else None
-            
-            # Record the leave
-            await execute_db_operation(
-                "record member leave",
-                """
-                INSERT INTO user_leaves 
-                (guild_id, user_id, username, was_invited_by, days_in_server)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (guild.id, member.id, member.display_name, inviter_id, days_in_server)
-            )
+            # Record the leave (with their inviter, if any) and update the sect counters
+            await record_member_leave(guild.id, member.id, member.display_name, days_in_server)
             
         except Exception as e:
             logger.error(f"Error recording member leave for {member}: {e}")
@@ -398,9 +373,7 @@ class InviteTracker(commands.Cog):
     @commands.Cog.listener()
     async def on_invite_create(self, invite: discord.Invite):
         """Update cache when new invite is created"""
-        guild_invites = self.invite_cache.get(invite.guild.id, [])
-        guild_invites.append(invite)
-        self.invite_cache[invite.guild.id] = guild_invites
+        self.invite_cache.setdefault(invite.guild.id, {})[invite.code] = invite
         
         # Update database
         await self._update_invites_in_db(invite.guild.id, [invite])
@@ -409,8 +382,7 @@ class InviteTracker(commands.Cog):
     @commands.Cog.listener()
     async def on_invite_delete(self, invite: discord.Invite):
         """Update cache when invite is deleted"""
-        guild_invites = self.invite_cache.get(invite.guild.id, [])
-        self.invite_cache[invite.guild.id] = [inv for inv in guild_invites if inv.code != invite.code]
+        self.invite_cache.get(invite.guild.id, {}).pop(invite.code, None)
         logger.info(f"Removed deleted invite {invite.code} from cache")
     
     @app_commands.guilds(discord.Object(id=GUILD_ID))
@@ -648,70 +620,14 @@ class InviteTracker(commands.Cog):
         guild_id = interaction.guild.id
         
         try:
-            # Total recruits
-            result = await execute_db_operation(
-                "get total recruited count",
-                "SELECT COUNT(*) FROM invite_uses WHERE guild_id = ?",
-                (guild_id,),
-                fetch_type='one'
-            )
-            total_recruited = result[0] if result else 0
-            
-            # Total leaves
-            result = await execute_db_operation(
-                "get total leaves count",
-                "SELECT COUNT(*) FROM user_leaves WHERE guild_id = ?",
-                (guild_id,),
-                fetch_type='one'
-            )
-            total_leaves = result[0] if result else 0
-            
-            # Average days in server for those who left
-            result = await execute_db_operation(
-                "get avg days before leaving",
-                """
-                SELECT AVG(days_in_server) FROM user_leaves 
-                WHERE guild_id = ? AND days_in_server > 0
-                """,
-                (guild_id,),
-                fetch_type='one'
-            )
-            avg_days = result[0] if result and result[0] else 0
-            
-            # Most active recruiter
-            result = await execute_db_operation(
-                "get top recruiter",
-                """
-                SELECT username, total_recruits FROM recruitment_stats 
-                WHERE guild_id = ? ORDER BY total_recruits DESC LIMIT 1
-                """,
-                (guild_id,),
-                fetch_type='one'
-            )
-            top_recruiter = result
-            
-            # Recent activity (last 7 days)
-            result = await execute_db_operation(
-                "get recent joins",
-                """
-                SELECT COUNT(*) FROM invite_uses 
-                WHERE guild_id = ? AND joined_at >= datetime('now', '-7 days')
-                """,
-                (guild_id,),
-                fetch_type='one'
-            )
-            recent_joins = result[0] if result else 0
-            
-            result = await execute_db_operation(
-                "get recent leaves",
-                """
-                SELECT COUNT(*) FROM user_leaves 
-                WHERE guild_id = ? AND left_at >= datetime('now', '-7 days')
-                """,
-                (guild_id,),
-                fetch_type='one'
-            )
-            recent_leaves = result[0] if result else 0
+            # Running counters + 7 days of daily rollups, one indexed read
+            analytics = await get_recruitment_analytics(guild_id, recent_days=7) or {}
+            total_recruited = analytics.get("total_recruited", 0)
+            total_leaves = analytics.get("total_leaves", 0)
+            avg_days = analytics.get("avg_days", 0)
+            top_recruiter = analytics.get("top_recruiter")
+            recent_joins = analytics.get("recent_joins", 0)
+            recent_leaves = analytics.get("recent_leaves", 0)
             
         except Exception as e:
             logger.error(f"Error getting analytics data: {e}")
@@ -758,6 +674,8 @@ class InviteTracker(commands.Cog):
     
     async def cog_unload(self):
         """Clean up when cog is unloaded"""
+        for task in self._join_flushes.values():
+            task.cancel()
         logger.info("Invite Tracker cog unloaded")
 
 
@@ -0,0 +1,96 @@
+# cogs/jobs.py
+import discord
+from discord.ext import commands
+from discord import app_commands
+import logging
+
+from config import GUILD_ID
+from database import get_job, get_recent_jobs
+from helpers.job_helper import job_manager, STATUS_EMOJI
+
+logger = logging.getLogger("Jobs")
+
+
+def _format_progress(job: dict) -> str:
+    current = job.get("progress_current") or 0
+    total = job.get("progress_total") or 0
+    if total:
+        return f"{current}/{total} ({current / total * 100:.0f}%)"
+    return "—"
+
+
+class Jobs(commands.Cog):
+    """Status and control for background jobs (see helpers/job_helper.py)."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Every cog has registered its handlers by now; pick up work from a previous run
+        try:
+            await job_manager.resume_all()
+        except Exception as e:
+            logger.error(f"Failed to resume jobs: {e}", exc_info=True)
+
+    @app_commands.guilds(discord.Object(id=GUILD_ID))
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.command(name="jobs", description="Show or cancel background jobs")
+    @app_commands.describe(action="What to do", job_id="Job to inspect or cancel")
+    @app_commands.choices(action=[
+        app_commands.Choice(name="List recent jobs", value="list"),
+        app_commands.Choice(name="Show one job", value="show"),
+        app_commands.Choice(name="Cancel a job", value="cancel"),
+    ])
+    async def jobs(self, interaction: discord.Interaction, action: str = "list", job_id: int = None):
+        logger.info(f"/jobs {action} {job_id or ''} by {interaction.user} ({interaction.user.id})")
+
+        if action in ("show", "cancel") and job_id is None:
+            await interaction.response.send_message("⚠️ Please provide a `job_id`.", ephemeral=True)
+            return
+
+        if action == "cancel":
+            if await job_manager.cancel(job_id):
+                await interaction.response.send_message(f"🛑 Cancellation requested for job #{job_id}.", ephemeral=True)
+            else:
+                await interaction.response.send_message(f"⚠️ Job #{job_id} not found or already finished.", ephemeral=True)
+            return
+
+        if action == "show":
+            job = await get_job(job_id)
+            if not job:
+                await interaction.response.send_message(f"⚠️ Job #{job_id} not found.", ephemeral=True)
+                return
+            embed = discord.Embed(
+                title=f"{STATUS_EMOJI.get(job['status'], '❔')} Job #{job['job_id']} — {job['kind']}",
+                color=discord.Color.blurple()
+            )
+            embed.add_field(name="Status", value=job["status"], inline=True)
+            embed.add_field(name="Progress", value=_format_progress(job), inline=True)
+            embed.add_field(name="Started by", value=f"<@{job['created_by']}>" if job["created_by"] else "System", inline=True)
+            if job.get("progress_message"):
+                embed.add_field(name="Latest update", value=job["progress_message"][:1024], inline=False)
+            if job.get("result"):
+                embed.add_field(name="Result", value=job["result"][:1024], inline=False)
+            if job.get("error"):
+                embed.add_field(name="Error", value=job["error"][:1024], inline=False)
+            embed.set_footer(text=f"Created {job['created_at']} UTC • Finished {job['finished_at'] or '—'}")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+
+        jobs = await get_recent_jobs(limit=10)
+        if not jobs:
+            await interaction.response.send_message("📭 No jobs have been run yet.", ephemeral=True)
+            return
+
+        lines = []
+        for job in jobs:
+            emoji = STATUS_EMOJI.get(job["status"], "❔")
+            lines.append(f"{emoji} **#{job['job_id']}** `{job['kind']}` — {job['status']} — {_format_progress(job)}")
+        embed = discord.Embed(title="🧰 Background Jobs", description="\n".join(lines), color=discord.Color.blurple())
+        embed.set_footer(text=f"{job_manager.active_count} active • {job_manager.workers} worker slots")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Jobs(bot))
@@ -11,7 +11,10 @@ from typing import Dict, List, Tuple, Optional, Union
 
 from database import get_all_users, upsert_user_stats, DB_PATH
 from helpers.media_helper import fetch_user_stats
+from helpers.job_helper import job_manager, JobContext, JobCancelled
 from config import GUILD_ID
+from helpers.logging_helper import queued_file_handler
+from helpers.metrics import http_trace_configs
 
 # ------------------------------------------------------
 # Logging Setup - Clears on each bot run
@@ -20,10 +23,6 @@ LOG_DIR = Path("logs")
 LOG_DIR.mkdir(exist_ok=True)
 LOG_FILE = LOG_DIR / "leaderboard.log"
 
-# Clear the log file on startup
-if LOG_FILE.exists():
-    LOG_FILE.unlink()
-
 # Create logger
 logger = logging.getLogger("Leaderboard")
 logger.setLevel(logging.INFO)
@@ -33,7 +32,7 @@ for handler in logger.handlers[:]:
     logger.removeHandler(handler)
 
 # Create file handler
-file_handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
+file_handler = queued_file_handler(LOG_FILE, mode="w")
 file_handler.setLevel(logging.INFO)
 
 # Create formatter
@@ -368,6 +367,7 @@ class Leaderboard(commands.Cog):
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        job_manager.register("leaderboard_refresh", self._run_stats_refresh)
         logger.info("Leaderboard cog initialized")
 
     def _estimate_origin_distribution(self, total_manga: int, total_anime: int, 
@@ -873,8 +873,8 @@ class Leaderboard(commands.Cog):
         except Exception as e:
             logger.error(f"Error cleaning up duplicate user_stats: {e}", exc_info=True)
 
-    async def fetch_and_cache_stats(self) -> None:
-        """Fetch and cache statistics for all registered users."""
+    async def fetch_and_cache_stats(self, ctx: Optional[JobContext] = None) -> None:
+        """Fetch and cache statistics for all registered users (reports progress when run as a job)."""
         try:
             users = await get_all_users()
             if not users:
@@ -883,7 +883,7 @@ class Leaderboard(commands.Cog):
             
             logger.info(f"Starting stats fetch for {len(users)} users")
             
-            async with aiohttp.ClientSession() as session:
+            async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
                 # Process users in batches to avoid overwhelming the API
                 batch_size = 5
                 for i in range(0, len(users), batch_size):
@@ -895,6 +895,10 @@ class Leaderboard(commands.Cog):
                     # Count successful updates
                     successful_updates = sum(1 for result in results if result and not isinstance(result, Exception))
                     logger.info(f"Processed batch {i//batch_size + 1}: {successful_updates}/{len(batch)} successful updates")
+
+                    if ctx:
+                        done = min(i + batch_size, len(users))
+                        await ctx.progress(done, len(users), f"🔄 Refreshing leaderboard stats: {done}/{len(users)} users")
                     
                     # Small delay between batches to be respectful to the API
                     if i + batch_size < len(users):
@@ -902,9 +906,17 @@ class Leaderboard(commands.Cog):
             
             logger.info("Completed stats fetching for all users")
             
+        except JobCancelled:
+            raise
         except Exception as e:
             logger.error(f"Error in fetch_and_cache_stats: {e}", exc_info=True)
 
+    async def _run_stats_refresh(self, ctx: JobContext) -> str:
+        """Job handler: de-duplicate user_stats and refresh every user's AniList stats."""
+        await self.cleanup_duplicate_user_stats()
+        await self.fetch_and_cache_stats(ctx)
+        return "✅ Leaderboard stats refreshed."
+
     async def _get_leaderboard_data(self, medium: str) -> List[Tuple]:
         """Get leaderboard data from database for specified medium."""
         try:
@@ -999,12 +1011,13 @@ class Leaderboard(commands.Cog):
             chosen_medium = medium.value.lower()
             media_config = MEDIA_TYPES.get(chosen_medium, MEDIA_TYPES["manga"])
             
-            # Clean up any duplicate entries first
-            await self.cleanup_duplicate_user_stats()
-            
-            # Fetch and cache latest stats
-            logger.info(f"Fetching and caching stats for {chosen_medium} leaderboard")
-            await self.fetch_and_cache_stats()
+            # Refresh stats in the background; the board renders from what is already stored
+            logger.info(f"Queueing stats refresh for {chosen_medium} leaderboard")
+            job_id = await job_manager.submit(
+                "leaderboard_refresh",
+                created_by=interaction.user.id,
+                dedupe=True
+            )
 
             # Get leaderboard data
             leaderboard_data = await self._get_leaderboard_data(chosen_medium)
@@ -1012,7 +1025,7 @@ class Leaderboard(commands.Cog):
             if not leaderboard_data:
                 error_embed = discord.Embed(
                     title="⚠️ No Data Found",
-                    description=f"No progress data found for {media_config['media_label'].lower()}. Users need to have their AniList profiles linked and have consumed some {media_config['media_label'].lower()}!",
+                    description=f"No progress data found for {media_config['media_label'].lower()}. Users need to have their AniList profiles linked and have consumed some {media_config['media_label'].lower()}!\n\nStats are being refreshed in the background (job #{job_id}) - try again shortly.",
                     color=discord.Color.orange()
                 )
                 await interaction.followup.send(embed=error_embed, ephemeral=True)
@@ -8,6 +8,8 @@ from pathlib import Path
 from typing import Optional
 
 from config import GUILD_ID
+from helpers.logging_helper import queued_file_handler
+from helpers.metrics import http_trace_configs
 from database import add_user, get_user, update_username, remove_user
 
 # Configuration constants
@@ -29,7 +31,7 @@ logger.setLevel(logging.DEBUG)
 logger.handlers.clear()
 
 # Create file handler that clears on startup
-file_handler = logging.FileHandler(LOG_FILE, mode='w', encoding='utf-8')
+file_handler = queued_file_handler(LOG_FILE, mode="w")
 file_handler.setLevel(logging.DEBUG)
 
 # Create formatter
@@ -247,7 +249,7 @@ class Login(commands.Cog):
         logger.debug(f"Fetching AniList ID for username: {anilist_username}")
         
         try:
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30), trace_configs=http_trace_configs()) as session:
                 async with session.post(
                     ANILIST_ENDPOINT,
                     json={"query": query, "variables": {"name": anilist_username}}
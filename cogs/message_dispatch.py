@@ -0,0 +1,49 @@
+# cogs/message_dispatch.py
+import discord
+from discord.ext import commands
+from discord import app_commands
+import logging
+
+from config import GUILD_ID
+from helpers.message_dispatch import message_dispatcher
+
+logger = logging.getLogger("MessageDispatch")
+
+
+class MessageDispatch(commands.Cog):
+    """The bot's only on_message listener; content handlers register with helpers/message_dispatch.py."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        await message_dispatcher.dispatch(message)
+
+    @app_commands.guilds(discord.Object(id=GUILD_ID))
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.command(name="dispatch_stats", description="Show per-handler timing for chat message handlers")
+    async def dispatch_stats(self, interaction: discord.Interaction):
+        logger.info(f"/dispatch_stats by {interaction.user} ({interaction.user.id})")
+
+        stats = message_dispatcher.stats()
+        if not stats:
+            await interaction.response.send_message("📭 No message handlers are registered.", ephemeral=True)
+            return
+
+        lines = []
+        for name, s in sorted(stats.items(), key=lambda item: item[1].total_time, reverse=True):
+            lines.append(
+                f"**{name}** — {s.calls} calls • avg {s.avg_ms:.1f}ms • max {s.max_time * 1000:.0f}ms"
+                + (f" • ⚠️ {s.errors} errors" if s.errors else "")
+            )
+        embed = discord.Embed(title="📨 Message Dispatch", description="\n".join(lines), color=discord.Color.blurple())
+        embed.set_footer(
+            text=f"{message_dispatcher.messages_seen} messages scanned • {message_dispatcher.messages_routed} routed • "
+                 f"prefilter avg {message_dispatcher.prefilter_avg_us:.1f}µs"
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(MessageDispatch(bot))
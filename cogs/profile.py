@@ -8,6 +8,7 @@ from typing import Optional, List, Dict, Tuple
 
 from database import get_user, save_user, upsert_user_stats
 from config import GUILD_ID
+from helpers.metrics import http_trace_configs
 
 ANILIST_API_URL = "https://graphql.anilist.co"
 
@@ -107,7 +108,7 @@ query ($username: String) {
 
 async def fetch_user_stats(username: str) -> Optional[dict]:
     variables = {"username": username}
-    async with aiohttp.ClientSession() as session:
+    async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
         try:
             async with session.post(ANILIST_API_URL, json={"query": USER_STATS_QUERY, "variables": variables}) as resp:
                 if resp.status != 200:
@@ -9,7 +9,9 @@ from pathlib import Path
 from typing import List, Dict, Optional
 
 from config import GUILD_ID
+from helpers.logging_helper import queued_file_handler
 from helpers.media_helper import fetch_random_media
+from helpers.metrics import http_trace_configs
 from database import get_all_users
 
 # ------------------------------------------------------
@@ -19,10 +21,6 @@ LOG_DIR = Path("logs")
 LOG_DIR.mkdir(exist_ok=True)
 LOG_FILE = LOG_DIR / "random.log"
 
-# Clear the log file on startup
-if LOG_FILE.exists():
-    LOG_FILE.unlink()
-
 # Create logger
 logger = logging.getLogger("Random")
 logger.setLevel(logging.INFO)
@@ -32,7 +30,7 @@ for handler in logger.handlers[:]:
     logger.removeHandler(handler)
 
 # Create file handler
-file_handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
+file_handler = queued_file_handler(LOG_FILE, mode="w")
 file_handler.setLevel(logging.INFO)
 
 # Create formatter
@@ -105,7 +103,7 @@ class Random(commands.Cog):
         variables = {"id": media_id, "type": media_type}
         
         try:
-            async with aiohttp.ClientSession() as session:
+            async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
                 async with session.post(API_URL, json={"query": query, "variables": variables}) as response:
                     if response.status != 200:
                         logger.error(f"Failed to fetch detailed media info: {response.status}")
@@ -137,7 +135,7 @@ class Random(commands.Cog):
         variables = {"userName": anilist_username, "mediaId": media_id, "type": media_type}
 
         try:
-            async with aiohttp.ClientSession() as session:
+            async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
                 async with session.post(API_URL, json={"query": query, "variables": variables}) as resp:
                     if resp.status != 200:
                         logger.warning(f"AniList fetch failed ({resp.status}) for {anilist_username=} {media_id=}")
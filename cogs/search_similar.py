@@ -7,7 +7,9 @@ import logging
 from pathlib import Path
 
 from config import GUILD_ID
+from helpers.logging_helper import queued_file_handler
 from helpers.media_helper import fetch_media_by_title
+from helpers.metrics import http_trace_configs
 
 # ------------------------------------------------------
 # Logging Setup - Clears on each bot run
@@ -16,10 +18,6 @@ LOG_DIR = Path("logs")
 LOG_DIR.mkdir(exist_ok=True)
 LOG_FILE = LOG_DIR / "search_similar.log"
 
-# Clear the log file on startup
-if LOG_FILE.exists():
-    LOG_FILE.unlink()
-
 # Create logger
 logger = logging.getLogger("SearchSimilar")
 logger.setLevel(logging.INFO)
@@ -29,7 +27,7 @@ for handler in logger.handlers[:]:
     logger.removeHandler(handler)
 
 # Create file handler
-file_handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
+file_handler = queued_file_handler(LOG_FILE, mode="w")
 file_handler.setLevel(logging.INFO)
 
 # Create formatter
@@ -88,7 +86,7 @@ class SearchSimilar(commands.Cog):
             fetch_type = "MANGA" if selected_type == "LN" else selected_type
             logger.info(f"Searching for media titled '{title}' with type {fetch_type}")
 
-            async with aiohttp.ClientSession() as session:
+            async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
                 media_info = await fetch_media_by_title(session, title, fetch_type)
                 
                 if not media_info:
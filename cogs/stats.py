@@ -8,6 +8,7 @@ import aiohttp
 
 from database import get_user, save_user, upsert_user_stats
 from config import GUILD_ID
+from helpers.metrics import http_trace_configs
 
 # -----------------------------
 # Logging Setup
@@ -77,7 +78,7 @@ class Stats(commands.Cog):
         """
         variables = {"username": username}
 
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
             try:
                 async with session.post("https://graphql.anilist.co", json={"query": query, "variables": variables}) as resp:
                     if resp.status != 200:
@@ -5,20 +5,27 @@ from discord import app_commands
 import aiohttp
 import aiosqlite
 from config import STEAM_API_KEY, DB_PATH, GUILD_ID
-from bs4 import BeautifulSoup
 import logging
 import math
 import asyncio
 import random
 import io
 import textwrap
-
-# Optional Pillow for friend-grid image rendering
-try:
-    from PIL import Image, ImageDraw, ImageFont
-    PIL_AVAILABLE = True
-except Exception:
-    PIL_AVAILABLE = False
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from helpers.lazy_import import lazy_import
+from helpers.steam_helper import CatalogApp, avatar_cache, steam_app_cache, steam_catalog, store_json
+from helpers.metrics import http_trace_configs
+
+# Heavy dependencies load on first use: bs4 when a profile page is scraped,
+# Pillow (optional) when a friend grid is rendered
+bs4 = lazy_import("bs4")
+Image = lazy_import("PIL.Image")
+ImageDraw = lazy_import("PIL.ImageDraw")
+ImageFont = lazy_import("PIL.ImageFont")
+PIL_AVAILABLE = Image.available
 
 logger = logging.getLogger("steam")
 logger.setLevel(logging.INFO)
@@ -28,6 +35,15 @@ if not logger.hasHandlers():
     logger.addHandler(h)
 
 
+RECOMMENDATION_LIMIT = 12              # recommendations kept per run
+RECOMMENDATION_UPDATE_INTERVAL = 1.0   # minimum seconds between partial result edits
+FRIEND_GRID_CACHE_TTL = 600            # seconds a rendered friends page image is reused
+FRIEND_GRID_CACHE_SIZE = 64            # rendered pages kept across all profiles
+PROFILE_SCRAPE_TTL = 300               # seconds scraped profile data (screenshots, comments, ...) is reused
+PROFILE_SCRAPE_CACHE_SIZE = 128
+CATALOG_MIN_CANDIDATES = 30            # below this many local matches, store search is used to discover more
+
+
 # -------------------- Helpers --------------------
 async def safe_json(session, url, params=None, timeout=15):
     try:
@@ -76,6 +92,85 @@ def safe_text(s, fallback="N/A"):
     return str(s)
 
 
+# -------------------- Profile page parsers --------------------
+# Run in a worker thread; each builds a tree of only the tags it needs.
+def has_class(*names):
+    """
+    SoupStrainer class_ matcher for elements carrying any of `names` among several classes.
+    (bs4 4.13 compares a list/str class_ against the whole attribute, so
+    class="commentthread_comment responsive_body_text" would not match "commentthread_comment".)
+    """
+    wanted = set(names)
+
+    def match(value):
+        if not value:
+            return False
+        classes = value.split() if isinstance(value, str) else value
+        return not wanted.isdisjoint(classes)
+    return match
+
+
+def parse_screenshot_urls(html):
+    soup = bs4.BeautifulSoup(html, "html.parser", parse_only=bs4.SoupStrainer("img"))
+    imgs = []
+    for img in soup.find_all("img"):
+        src = img.get("src") or img.get("data-src")
+        if src and "cdn" in src:
+            imgs.append(src)
+    return list(dict.fromkeys(imgs))
+
+
+def parse_video_links(html):
+    soup = bs4.BeautifulSoup(html, "html.parser", parse_only=bs4.SoupStrainer("a", href=True))
+    videos = []
+    # many profiles embed videos as anchors or iframes
+    for a in soup.find_all("a"):
+        href = a.get("href")
+        if href and ("youtube.com" in href or "vimeo.com" in href or "/sharedfiles/" in href or "/videos/" in href):
+            videos.append(href)
+    return list(dict.fromkeys(videos))
+
+
+def parse_comments(html, limit=8):
+    # comments often are loaded dynamically; try common containers
+    soup = bs4.BeautifulSoup(html, "html.parser",
+                             parse_only=bs4.SoupStrainer("div", class_=has_class("commentthread_comment", "profile_comment")))
+    comment_nodes = soup.select(".commentthread_comment") or soup.select(".profile_comment") or []
+    parsed = []
+    for cn in comment_nodes[:limit]:
+        try:
+            # author link
+            a = cn.select_one(".commentthread_author_link") or cn.select_one("a")
+            author_name = a.get_text(" ", strip=True) if a else "Unknown"
+            author_link = a["href"] if a and a.has_attr("href") else None
+            # avatar
+            av = cn.find("img")
+            avatar_url = av["src"] if av and av.has_attr("src") else None
+            # comment text
+            text_el = cn.select_one(".commentthread_comment_text") or cn.find("div", class_=lambda c: c and "comment" in c)
+            comment_text = text_el.get_text(" ", strip=True) if text_el else ""
+            parsed.append({"author": author_name, "link": author_link, "avatar": avatar_url, "text": comment_text})
+        except Exception:
+            continue
+    return parsed
+
+
+def parse_groups(html, limit=60):
+    soup = bs4.BeautifulSoup(html, "html.parser", parse_only=bs4.SoupStrainer(class_=has_class("groupBlock")))
+    groups = []
+    for g in soup.select(".groupBlock")[:limit]:
+        a = g.select_one("a")
+        if a and a.has_attr("href"):
+            groups.append({"name": a.get_text(" ", strip=True), "url": a["href"]})
+    # fallback: find any /groups/ links
+    if not groups:
+        links = bs4.BeautifulSoup(html, "html.parser", parse_only=bs4.SoupStrainer("a", href=True))
+        for a in links.find_all("a"):
+            if "/groups/" in a["href"]:
+                groups.append({"name": a.get_text(" ", strip=True), "url": a["href"]})
+    return groups
+
+
 # Friend grid generator using Pillow (optional). Returns BytesIO png or None.
 def make_friend_grid_image(friends_slice, thumb_size=96, per_row=5):
     if not PIL_AVAILABLE:
@@ -137,6 +232,79 @@ class Steam(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.session: Optional[aiohttp.ClientSession] = None
+        # (steamid, page) -> (expires_at, png bytes)
+        self._friend_grid_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        # (kind, steamid) -> (expires_at, parsed result)
+        self._scrape_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+    async def cog_load(self):
+        self.session = aiohttp.ClientSession(trace_configs=http_trace_configs())
+        try:
+            removed = await steam_app_cache.prune()
+            if removed:
+                logger.info(f"Pruned {removed} expired Steam appdetails cache entries")
+        except Exception:
+            logger.exception("Failed to prune the Steam appdetails cache")
+
+    async def cog_unload(self):
+        if self.session:
+            await self.session.close()
+
+    def _cached_friend_grid(self, key) -> Optional[bytes]:
+        entry = self._friend_grid_cache.get(key)
+        if not entry or entry[0] < time.monotonic():
+            self._friend_grid_cache.pop(key, None)
+            return None
+        self._friend_grid_cache.move_to_end(key)
+        return entry[1]
+
+    def _store_friend_grid(self, key, png: bytes):
+        self._friend_grid_cache[key] = (time.monotonic() + FRIEND_GRID_CACHE_TTL, png)
+        self._friend_grid_cache.move_to_end(key)
+        while len(self._friend_grid_cache) > FRIEND_GRID_CACHE_SIZE:
+            self._friend_grid_cache.popitem(last=False)
+
+    async def _scrape_profile(self, kind: str, steamid: str, urls: list, parser):
+        """
+        Fetch the first of `urls` that responds and parse it with `parser` in a worker thread.
+        Results are cached per (kind, steamid); None means no page could be fetched.
+        """
+        key = (kind, steamid)
+        entry = self._scrape_cache.get(key)
+        if entry and entry[0] >= time.monotonic():
+            self._scrape_cache.move_to_end(key)
+            return entry[1]
+
+        html = None
+        for url in urls:
+            html = await fetch_text(self.session, url)
+            if html:
+                break
+        if not html:
+            return None
+
+        parsed = await asyncio.to_thread(parser, html)
+        self._scrape_cache[key] = (time.monotonic() + PROFILE_SCRAPE_TTL, parsed)
+        self._scrape_cache.move_to_end(key)
+        while len(self._scrape_cache) > PROFILE_SCRAPE_CACHE_SIZE:
+            self._scrape_cache.popitem(last=False)
+        return parsed
+
+    async def _render_friend_grid(self, steamid: str, idx: int, slice_: list) -> Optional[bytes]:
+        """PNG for one friends page: avatars from the disk cache, Pillow work in a worker thread."""
+        key = (steamid, idx)
+        png = self._cached_friend_grid(key)
+        if png is not None:
+            return png
+        avatars = await avatar_cache.get_many(self.session, slice_)
+        to_draw = [{"name": fr.get("personaname"), "avatar_bytes": av} for fr, av in zip(slice_, avatars)]
+        image_io = await asyncio.to_thread(make_friend_grid_image, to_draw, 96, 5)
+        if not image_io:
+            return None
+        png = image_io.getvalue()
+        self._store_friend_grid(key, png)
+        return png
 
     steam_group = app_commands.Group(name="steam", description="Steam commands")
     steam_group = app_commands.guilds(discord.Object(id=GUILD_ID))(steam_group)
@@ -146,7 +314,7 @@ class Steam(commands.Cog):
     @app_commands.describe(vanity_name="the part after /id/ in your steam URL")
     async def register(self, interaction: discord.Interaction, vanity_name: str):
         await interaction.response.defer(ephemeral=True)
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
             data = await safe_json(session, "https://api.steampowered.com/ISteamUser/ResolveVanityURL/v1/",
                                    params={"key": STEAM_API_KEY, "vanityurl": vanity_name})
             if not data or data.get("response", {}).get("success") != 1:
@@ -187,7 +355,7 @@ class Steam(commands.Cog):
                 steamid, vanity = row
                 user = vanity
 
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
             if user and not user.isdigit():
                 res = await safe_json(session, "https://api.steampowered.com/ISteamUser/ResolveVanityURL/v1/",
                                       params={"key": STEAM_API_KEY, "vanityurl": user})
@@ -232,7 +400,7 @@ class Steam(commands.Cog):
             try:
                 badges_html = await fetch_text(session, f"https://steamcommunity.com/profiles/{steamid}/badges") or await fetch_text(session, f"https://steamcommunity.com/id/{user}/badges")
                 if badges_html:
-                    bs = BeautifulSoup(badges_html, "html.parser")
+                    bs = bs4.BeautifulSoup(badges_html, "html.parser")
                     # badge count often shown in .profile_badges_count or in elements containing 'Badges'
                     # fallback: count badge tiles
                     badge_tiles = bs.find_all("div", class_=lambda c: c and "badge_row" in c or "badge" in c)
@@ -294,10 +462,10 @@ class Steam(commands.Cog):
         # Bio: attempt to scrape summary text from profile page (better than "Click details")
         summary_text = None
         try:
-            async with aiohttp.ClientSession() as s:
+            async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as s:
                 prof_html = await fetch_text(s, f"https://steamcommunity.com/profiles/{steamid}") or await fetch_text(s, f"https://steamcommunity.com/id/{user}")
                 if prof_html:
-                    ssp = BeautifulSoup(prof_html, "html.parser")
+                    ssp = bs4.BeautifulSoup(prof_html, "html.parser")
                     # try common selectors
                     summary = ssp.select_one(".profile_summary") or ssp.select_one("#summary") or ssp.find("div", class_=lambda c: c and "profile_summary" in c)
                     if summary:
@@ -407,7 +575,7 @@ class Steam(commands.Cog):
                     await self._send_paginated_games(sel_inter, owned_games, title="All Games", progress_msg=progress_msg)
                 elif choice == "friends":
                     await progress_msg.edit(content="🔎 Fetching friends...")
-                    await self._send_friends_pages(sel_inter, friend_ids, progress_msg=progress_msg)
+                    await self._send_friends_pages(sel_inter, friend_ids, progress_msg=progress_msg, steamid=steamid)
                 elif choice == "badges":
                     # badges already displayed on main profile: tell user quickly (ephemeral)
                     await progress_msg.edit(content="🏅 Badges are shown on the main profile embed.", embed=None)
@@ -527,7 +695,7 @@ class Steam(commands.Cog):
                 pass
 
     # ------------------ Friends pages ------------------
-    async def _send_friends_pages(self, interaction: discord.Interaction, friend_ids: list, progress_msg=None, per_page=5):
+    async def _send_friends_pages(self, interaction: discord.Interaction, friend_ids: list, progress_msg=None, per_page=5, steamid: str = None):
         if not friend_ids:
             try:
                 if progress_msg:
@@ -540,14 +708,15 @@ class Steam(commands.Cog):
 
         # fetch summaries in batches (100 at a time)
         friend_summaries = []
-        async with aiohttp.ClientSession() as session:
-            batches = chunk_list(friend_ids, 100)
-            for b in batches:
-                j = await safe_json(session, "https://api.steampowered.com/ISteamUser/GetPlayerSummaries/v2/",
-                                    params={"key": STEAM_API_KEY, "steamids": ",".join(b)})
-                batch_players = j.get("response", {}).get("players", []) if j else []
-                friend_summaries.extend(batch_players)
-                await asyncio.sleep(0.08)
+        batches = chunk_list(friend_ids, 100)
+        for b in batches:
+            j = await safe_json(self.session, "https://api.steampowered.com/ISteamUser/GetPlayerSummaries/v2/",
+                                params={"key": STEAM_API_KEY, "steamids": ",".join(b)})
+            batch_players = j.get("response", {}).get("players", []) if j else []
+            friend_summaries.extend(batch_players)
+            await asyncio.sleep(0.08)
+        # Rendered pages are cached per profile; without a steamid the friend list itself is the key
+        grid_owner = steamid or str(hash(tuple(friend_ids)))
 
         # build pages of 5 friends each
         pages = chunk_list(friend_summaries, per_page)
@@ -559,28 +728,9 @@ class Steam(commands.Cog):
         async def send_page(msg_interaction, idx):
             slice_ = pages[idx]
             if PIL_AVAILABLE:
-                # fetch avatar bytes for each friend in this slice
-                fetch_tasks = []
-                async with aiohttp.ClientSession() as s:
-                    for f in slice_:
-                        avatar_url = f.get("avatarfull") or f.get("avatar")
-                        if avatar_url:
-                            try:
-                                async with s.get(avatar_url) as r:
-                                    if r.status == 200:
-                                        avatar_bytes = await r.read()
-                                    else:
-                                        avatar_bytes = None
-                            except Exception:
-                                avatar_bytes = None
-                        else:
-                            avatar_bytes = None
-                        f['_avatar_bytes'] = avatar_bytes
-                # prepare friend dicts for grid helper
-                to_draw = [{"name": fr.get("personaname"), "avatar_bytes": fr.get('_avatar_bytes')} for fr in slice_]
-                image_io = make_friend_grid_image(to_draw, thumb_size=96, per_row=5)
-                if image_io:
-                    file = discord.File(fp=image_io, filename="friends_grid.png")
+                png = await self._render_friend_grid(grid_owner, idx, slice_)
+                if png:
+                    file = discord.File(fp=io.BytesIO(png), filename="friends_grid.png")
                     em = discord.Embed(title=f"👥 Friends — page {idx+1}/{len(pages)}", color=discord.Color.green())
                     try:
                         await msg_interaction.edit_original_response(content=None, embed=em, attachments=[file])  # if called via progress_msg
@@ -688,24 +838,18 @@ class Steam(commands.Cog):
     # ------------------ Screenshots ------------------
     async def _send_screenshots(self, interaction: discord.Interaction, steamid: str, progress_msg=None):
         # try to fetch screenshots from profile screenshot gallery or profile main page
-        async with aiohttp.ClientSession() as session:
-            html = await fetch_text(session, f"https://steamcommunity.com/profiles/{steamid}/screenshots/") or await fetch_text(session, f"https://steamcommunity.com/profiles/{steamid}") or await fetch_text(session, f"https://steamcommunity.com/id/{steamid}/screenshots/")
-        if not html:
+        imgs = await self._scrape_profile("screenshots", steamid, [
+            f"https://steamcommunity.com/profiles/{steamid}/screenshots/",
+            f"https://steamcommunity.com/profiles/{steamid}",
+            f"https://steamcommunity.com/id/{steamid}/screenshots/",
+        ], parse_screenshot_urls)
+        if imgs is None:
             try:
                 await progress_msg.edit(content="⚠️ Could not fetch screenshots or profile is private.")
             except Exception:
                 await interaction.followup.send("⚠️ Could not fetch screenshots or profile is private.", ephemeral=True)
             return
 
-        soup = BeautifulSoup(html, "html.parser")
-        imgs = []
-        # look for gallery items
-        for img in soup.select("img"):
-            src = img.get("src") or img.get("data-src")
-            if src and "cdn" in src:
-                imgs.append(src)
-        # dedupe
-        imgs = list(dict.fromkeys(imgs))
         if not imgs:
             try:
                 if progress_msg:
@@ -770,23 +914,18 @@ class Steam(commands.Cog):
 
     # ------------------ Videos ------------------
     async def _send_videos(self, interaction: discord.Interaction, steamid: str, progress_msg=None):
-        async with aiohttp.ClientSession() as session:
-            html = await fetch_text(session, f"https://steamcommunity.com/profiles/{steamid}/videos/") or await fetch_text(session, f"https://steamcommunity.com/profiles/{steamid}") or await fetch_text(session, f"https://steamcommunity.com/id/{steamid}/videos/")
-        if not html:
+        videos = await self._scrape_profile("videos", steamid, [
+            f"https://steamcommunity.com/profiles/{steamid}/videos/",
+            f"https://steamcommunity.com/profiles/{steamid}",
+            f"https://steamcommunity.com/id/{steamid}/videos/",
+        ], parse_video_links)
+        if videos is None:
             try:
                 await progress_msg.edit(content="⚠️ Could not fetch videos or profile is private.")
             except Exception:
                 await interaction.followup.send("⚠️ Could not fetch videos or profile is private.", ephemeral=True)
             return
 
-        soup = BeautifulSoup(html, "html.parser")
-        videos = []
-        # many profiles embed videos as anchors or iframes
-        for a in soup.select("a"):
-            href = a.get("href")
-            if href and ("youtube.com" in href or "vimeo.com" in href or "/sharedfiles/" in href or "/videos/" in href):
-                videos.append(href)
-        videos = list(dict.fromkeys(videos))
         if not videos:
             try:
                 if progress_msg:
@@ -812,9 +951,11 @@ class Steam(commands.Cog):
 
     # ------------------ Comments ------------------
     async def _send_comments(self, interaction: discord.Interaction, steamid: str, progress_msg=None):
-        async with aiohttp.ClientSession() as session:
-            html = await fetch_text(session, f"https://steamcommunity.com/profiles/{steamid}") or await fetch_text(session, f"https://steamcommunity.com/id/{steamid}")
-        if not html:
+        parsed = await self._scrape_profile("comments", steamid, [
+            f"https://steamcommunity.com/profiles/{steamid}",
+            f"https://steamcommunity.com/id/{steamid}",
+        ], parse_comments)
+        if parsed is None:
             try:
                 if progress_msg:
                     await progress_msg.edit(content="⚠️ Could not fetch profile (private?)")
@@ -824,44 +965,12 @@ class Steam(commands.Cog):
                 pass
             return
 
-        soup = BeautifulSoup(html, "html.parser")
-        # comments often are loaded dynamically; try common selectors
-        comment_nodes = soup.select(".commentthread_comment") or soup.select(".profile_comment") or []
-        parsed = []
-        for cn in comment_nodes[:8]:
-            try:
-                # author link
-                a = cn.select_one(".commentthread_author_link") or cn.select_one("a")
-                author_name = a.get_text(" ", strip=True) if a else "Unknown"
-                author_link = a["href"] if a and a.has_attr("href") else None
-                # avatar
-                av = cn.find("img")
-                avatar_url = av["src"] if av and av.has_attr("src") else None
-                # comment text
-                text_el = cn.select_one(".commentthread_comment_text") or cn.find("div", class_=lambda c: c and "comment" in c)
-                comment_text = text_el.get_text(" ", strip=True) if text_el else ""
-                parsed.append({"author": author_name, "link": author_link, "avatar": avatar_url, "text": comment_text})
-            except Exception:
-                continue
-
         if not parsed:
             # fallback: try comments page
-            comments_html = await fetch_text(session, f"https://steamcommunity.com/profiles/{steamid}/comments/") or await fetch_text(session, f"https://steamcommunity.com/id/{steamid}/comments/")
-            if comments_html:
-                csoup = BeautifulSoup(comments_html, "html.parser")
-                comment_nodes = csoup.select(".commentthread_comment")[:8]
-                for cn in comment_nodes:
-                    try:
-                        a = cn.select_one(".commentthread_author_link") or cn.select_one("a")
-                        author_name = a.get_text(" ", strip=True) if a else "Unknown"
-                        author_link = a["href"] if a and a.has_attr("href") else None
-                        av = cn.find("img")
-                        avatar_url = av["src"] if av and av.has_attr("src") else None
-                        text_el = cn.select_one(".commentthread_comment_text")
-                        comment_text = text_el.get_text(" ", strip=True) if text_el else ""
-                        parsed.append({"author": author_name, "link": author_link, "avatar": avatar_url, "text": comment_text})
-                    except Exception:
-                        continue
+            parsed = await self._scrape_profile("comments_page", steamid, [
+                f"https://steamcommunity.com/profiles/{steamid}/comments/",
+                f"https://steamcommunity.com/id/{steamid}/comments/",
+            ], parse_comments) or []
 
         if not parsed:
             try:
@@ -940,9 +1049,12 @@ class Steam(commands.Cog):
 
     # ------------------ Groups ------------------
     async def _send_groups(self, interaction: discord.Interaction, steamid: str, progress_msg=None):
-        async with aiohttp.ClientSession() as session:
-            html = await fetch_text(session, f"https://steamcommunity.com/profiles/{steamid}/groups/") or await fetch_text(session, f"https://steamcommunity.com/profiles/{steamid}") or await fetch_text(session, f"https://steamcommunity.com/id/{steamid}/groups/")
-        if not html:
+        groups = await self._scrape_profile("groups", steamid, [
+            f"https://steamcommunity.com/profiles/{steamid}/groups/",
+            f"https://steamcommunity.com/profiles/{steamid}",
+            f"https://steamcommunity.com/id/{steamid}/groups/",
+        ], parse_groups)
+        if groups is None:
             try:
                 if progress_msg:
                     await progress_msg.edit(content="⚠️ Could not fetch groups.")
@@ -952,18 +1064,6 @@ class Steam(commands.Cog):
                 pass
             return
 
-        soup = BeautifulSoup(html, "html.parser")
-        groups = []
-        # try group block selectors
-        for g in soup.select(".groupBlock")[:60]:
-            a = g.select_one("a")
-            if a and a.has_attr("href"):
-                groups.append({"name": a.get_text(" ", strip=True), "url": a["href"]})
-        # fallback: find any /groups/ links
-        if not groups:
-            for a in soup.find_all("a", href=True):
-                if "/groups/" in a["href"]:
-                    groups.append({"name": a.get_text(" ", strip=True), "url": a["href"]})
         if not groups:
             try:
                 if progress_msg:
@@ -1007,7 +1107,7 @@ class Steam(commands.Cog):
                 return await interaction.followup.send("❌ You have not registered a Steam account. Use `/steam register <vanity>`.", ephemeral=True)
             steamid = row[0]
 
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
             # Get user's owned games with detailed info
             owned = await safe_json(session, "https://api.steampowered.com/IPlayerService/GetOwnedGames/v1/",
                                     params={"key": STEAM_API_KEY, "steamid": steamid, "include_appinfo": 1, "include_played_free_games": 1})
@@ -1021,24 +1121,38 @@ class Steam(commands.Cog):
 
             # Analyze user preferences
             await interaction.followup.send("🔄 Analyzing your game library and preferences...", ephemeral=True)
+
+            # The view goes out with the first scored page and is updated as more candidates come in
+            view = None
+
+            async def show(recommendations, final=False):
+                nonlocal view
+                if view is None:
+                    view = RecommendationView(recommendations, interaction.user)
+                else:
+                    view.set_recommendations(recommendations)
+                embed = await self._create_recommendation_embed(
+                    view.recommendations[view.current_index], view.current_index + 1, len(view.recommendations)
+                )
+                status = "Based on your library analysis:" if final else "⏳ Still scoring more candidates…"
+                await interaction.edit_original_response(
+                    content=f"🎮 **Personalized Game Recommendations**\n{status}",
+                    embed=embed,
+                    view=view
+                )
             
-            recommendations = await self._generate_recommendations(session, owned_games, steamid)
+            recommendations = await self._generate_recommendations(session, owned_games, steamid, on_update=show)
             
             if not recommendations:
                 return await interaction.edit_original_response(content="❌ Could not generate recommendations. Try again later.")
 
-            # Create interactive recommendation view
-            view = RecommendationView(recommendations, interaction.user)
-            embed = await self._create_recommendation_embed(recommendations[0], 1, len(recommendations))
-            
-            await interaction.edit_original_response(
-                content="🎮 **Personalized Game Recommendations**\nBased on your library analysis:",
-                embed=embed,
-                view=view
-            )
+            await show(recommendations, final=True)
 
-    async def _generate_recommendations(self, session, owned_games, steamid):
-        """Generate personalized recommendations based on user's library"""
+    async def _generate_recommendations(self, session, owned_games, steamid, on_update=None):
+        """
+        Generate personalized recommendations based on user's library.
+        `on_update(partial_top_list)` is awaited while candidates are still being scored.
+        """
         
         # Step 1: Analyze user's gaming preferences
         total_playtime = sum(g.get("playtime_forever", 0) for g in owned_games)
@@ -1061,18 +1175,15 @@ class Steam(commands.Cog):
         analyzed_count = 0
         owned_app_ids = {str(g["appid"]) for g in owned_games}
 
-        for game in analyzed_games[:15]:  # Limit API calls
+        analyzed_games = analyzed_games[:15]  # Limit API calls
+        library_details = await steam_app_cache.get_many(session, [g["appid"] for g in analyzed_games])
+
+        for game in analyzed_games:
             app_id = game["appid"]
             playtime_weight = max(1, math.log(game.get("playtime_forever", 60) + 1))  # Logarithmic weighting
             
             # Get detailed app info
-            app_data = await safe_json(session, f"https://store.steampowered.com/api/appdetails", 
-                                     params={"appids": app_id, "cc": "us", "l": "en"})
-            
-            if not app_data or str(app_id) not in app_data:
-                continue
-                
-            details = app_data[str(app_id)].get("data", {})
+            details = library_details.get(int(app_id))
             if not details:
                 continue
                 
@@ -1097,107 +1208,122 @@ class Steam(commands.Cog):
             # Analyze publishers  
             for pub in details.get("publishers", []):
                 publisher_scores[pub] = publisher_scores.get(pub, 0) + playtime_weight * 0.7
-            
-            await asyncio.sleep(0.1)  # Rate limiting
 
         if analyzed_count == 0:
             return []
 
-        # Step 3: Find recommendation candidates
-        # Use Steam's recommendation API and store search
-        candidates = []
-        
-        # Get top genres for searching
-        top_genres = sorted(genre_scores.items(), key=lambda x: x[1], reverse=True)[:3]
-        
-        for genre_name, _ in top_genres:
-            # Search Steam store for games in preferred genres
-            search_url = "https://store.steampowered.com/api/storesearch/"
-            search_data = await safe_json(session, search_url, params={
-                "term": genre_name,
-                "l": "en",
-                "cc": "us",
-                "category1": "998"  # Games category
-            })
-            
-            if search_data and "items" in search_data:
-                for item in search_data["items"][:20]:  # Top 20 per genre
-                    if str(item["id"]) not in owned_app_ids:  # Don't recommend owned games
-                        candidates.append(item["id"])
-            
-            await asyncio.sleep(0.1)
-        
-        # Step 4: Score and rank candidates
-        scored_recommendations = []
-        
-        for app_id in list(set(candidates))[:50]:  # Limit to 50 unique candidates
-            # Get detailed info for scoring
-            app_data = await safe_json(session, f"https://store.steampowered.com/api/appdetails",
-                                     params={"appids": app_id, "cc": "us", "l": "en"})
-            
-            if not app_data or str(app_id) not in app_data:
-                continue
-                
-            details = app_data[str(app_id)].get("data", {})
-            if not details or details.get("type") != "game":
-                continue
-            
-            # Calculate recommendation score
+        # Step 3: Score candidates from the local catalog (no network for apps already indexed)
+        max_genre = max(genre_scores.values()) if genre_scores else 0
+        max_tag = max(tag_scores.values()) if tag_scores else 0
+        max_dev = max(developer_scores.values()) if developer_scores else 0
+        max_pub = max(publisher_scores.values()) if publisher_scores else 0
+
+        def score_candidate(app: CatalogApp):
             score = 0
             match_reasons = []
             
             # Genre matching
-            for genre in details.get("genres", []):
-                genre_name = genre.get("description", "")
+            for genre_name in app.genres:
                 if genre_name in genre_scores:
-                    genre_weight = genre_scores[genre_name] / max(genre_scores.values())
-                    score += genre_weight * 10
+                    score += genre_scores[genre_name] / max_genre * 10
                     match_reasons.append(f"Genre: {genre_name}")
             
             # Tag/category matching
-            for category in details.get("categories", []):
-                cat_name = category.get("description", "")
+            for cat_name in app.categories:
                 if cat_name in tag_scores:
-                    tag_weight = tag_scores[cat_name] / max(tag_scores.values()) if tag_scores else 0
-                    score += tag_weight * 5
+                    score += tag_scores[cat_name] / max_tag * 5
                     match_reasons.append(f"Feature: {cat_name}")
             
             # Developer matching
-            for dev in details.get("developers", []):
+            for dev in app.developers:
                 if dev in developer_scores:
-                    dev_weight = developer_scores[dev] / max(developer_scores.values())
-                    score += dev_weight * 8
+                    score += developer_scores[dev] / max_dev * 8
                     match_reasons.append(f"Developer: {dev}")
             
             # Publisher matching
-            for pub in details.get("publishers", []):
+            for pub in app.publishers:
                 if pub in publisher_scores:
-                    pub_weight = publisher_scores[pub] / max(publisher_scores.values())
-                    score += pub_weight * 6
+                    score += publisher_scores[pub] / max_pub * 6
                     match_reasons.append(f"Publisher: {pub}")
             
             # Boost score for highly rated games
-            metacritic_score = details.get("metacritic", {}).get("score", 0)
-            if metacritic_score > 75:
+            if app.metacritic > 75:
                 score += 3
-                match_reasons.append(f"Highly rated ({metacritic_score}/100)")
-            
-            # Add popularity boost for games with many reviews
-            # (This would require additional API calls, so we'll skip for now)
-            
+                match_reasons.append(f"Highly rated ({app.metacritic}/100)")
+
+            return score, match_reasons[:3]  # Top 3 reasons
+
+        scored = {}  # app_id -> (score, match_reasons)
+
+        def consider(app: CatalogApp):
+            if app.app_type != "game" or str(app.appid) in owned_app_ids or app.appid in scored:
+                return
+            score, reasons = score_candidate(app)
             if score > 0:
-                scored_recommendations.append({
-                    "app_id": app_id,
-                    "score": score,
-                    "details": details,
-                    "match_reasons": match_reasons[:3]  # Top 3 reasons
+                scored[app.appid] = (score, reasons)
+
+        async def ranked():
+            # Full details (description, price, images) are only needed for the games shown
+            top = sorted(scored.items(), key=lambda x: x[1][0], reverse=True)[:RECOMMENDATION_LIMIT]
+            details = await steam_app_cache.get_many(session, [app_id for app_id, _ in top])
+            return [
+                {"app_id": app_id, "score": score, "details": details[app_id], "match_reasons": reasons}
+                for app_id, (score, reasons) in top if app_id in details
+            ]
+
+        await steam_catalog.load()
+        top_genres = sorted(genre_scores.items(), key=lambda x: x[1], reverse=True)[:3]
+        local_ids = steam_catalog.candidates(
+            genres=[g for g, _ in top_genres],
+            developers=developer_scores.keys(),
+            publishers=publisher_scores.keys(),
+        )
+        for app_id in local_ids:
+            consider(steam_catalog.apps[app_id])
+
+        last_update = 0.0
+        if on_update and scored:
+            last_update = time.monotonic()
+            try:
+                await on_update(await ranked())
+            except Exception:
+                logger.exception("Partial recommendation update failed")
+
+        # Step 4: Discover new apps through store search while the local catalog is still thin
+        if len(scored) < CATALOG_MIN_CANDIDATES:
+            searches = await asyncio.gather(*(
+                store_json(session, "https://store.steampowered.com/api/storesearch/", {
+                    "term": genre_name,
+                    "l": "en",
+                    "cc": "us",
+                    "category1": "998"  # Games category
                 })
-            
-            await asyncio.sleep(0.08)
+                for genre_name, _ in top_genres
+            ))
+
+            candidates = []
+            for search_data in searches:
+                if search_data and "items" in search_data:
+                    for item in search_data["items"][:20]:  # Top 20 per genre
+                        if str(item["id"]) not in owned_app_ids and item["id"] not in steam_catalog.apps:
+                            candidates.append(item["id"])
+
+            # Details land in the catalog as they arrive
+            async for app_id, details in steam_app_cache.iter_many(session, list(dict.fromkeys(candidates))[:50]):
+                app = steam_catalog.apps.get(app_id) or CatalogApp.from_details(app_id, details)
+                consider(app)
+
+                # Hand partial rankings to the caller at most once per interval
+                now = time.monotonic()
+                if on_update and scored and now - last_update >= RECOMMENDATION_UPDATE_INTERVAL:
+                    last_update = now
+                    try:
+                        await on_update(await ranked())
+                    except Exception:
+                        logger.exception("Partial recommendation update failed")
         
         # Sort by score and return top recommendations
-        scored_recommendations.sort(key=lambda x: x["score"], reverse=True)
-        return scored_recommendations[:12]  # Return top 12 recommendations
+        return await ranked()
 
     async def _create_recommendation_embed(self, recommendation, current_index, total_count):
         """Create an embed for a single recommendation"""
@@ -1257,15 +1383,14 @@ class Steam(commands.Cog):
     @app_commands.describe(game_name="Name of the game")
     async def game(self, interaction: discord.Interaction, game_name: str):
         await interaction.response.defer()
-        search_url = f"https://store.steampowered.com/api/storesearch/?term={game_name}&l=en&cc=us"
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(search_url) as resp:
-                    if resp.status != 200:
-                        return await interaction.followup.send(f"❌ Failed to search for '{game_name}'")
-                    search_data = await resp.json()
-            except Exception:
-                return await interaction.followup.send("❌ Failed to search Steam.")
+        # Shares the store rate limiter with appdetails; params are URL-encoded by aiohttp
+        search_data = await store_json(self.session, "https://store.steampowered.com/api/storesearch/", {
+            "term": game_name,
+            "l": "en",
+            "cc": "us"
+        })
+        if search_data is None:
+            return await interaction.followup.send(f"❌ Failed to search for '{game_name}'")
 
         items = search_data.get("items", [])
         if not items:
@@ -1281,14 +1406,8 @@ class Steam(commands.Cog):
             async def button_callback(button_inter: discord.Interaction):
                 await button_inter.response.defer(ephemeral=True)
                 appid = item["id"]
-                url = f"https://store.steampowered.com/api/appdetails?appids={appid}&cc=us&l=en"
-                async with aiohttp.ClientSession() as session:
-                    try:
-                        async with session.get(url) as resp:
-                            data = await resp.json()
-                    except Exception:
-                        return await button_inter.followup.send(f"❌ No data found for '{item['name']}'", ephemeral=True)
-                app_data = data.get(str(appid), {}).get("data")
+                async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
+                    app_data = await steam_app_cache.get(session, appid)
                 if not app_data:
                     return await button_inter.followup.send(f"❌ No data found for '{item['name']}'", ephemeral=True)
 
@@ -1370,6 +1489,14 @@ class RecommendationView(discord.ui.View):
         
         # Update button states and URLs
         self._update_buttons()
+
+    def set_recommendations(self, recommendations):
+        """Swap in a re-ranked list, staying on the recommendation the user is looking at if it is still there."""
+        current = self.recommendations[self.current_index]["app_id"] if self.recommendations else None
+        self.recommendations = recommendations
+        ids = [r["app_id"] for r in recommendations]
+        self.current_index = ids.index(current) if current in ids else min(self.current_index, len(ids) - 1)
+        self._update_buttons()
     
     def _update_buttons(self):
         """Update button enabled/disabled state"""
@@ -1443,7 +1570,7 @@ class RecommendationView(discord.ui.View):
                 await cur.close()
                 if row:
                     steamid = row[0]
-                    async with aiohttp.ClientSession() as session:
+                    async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
                         owned = await safe_json(session, "https://api.steampowered.com/IPlayerService/GetOwnedGames/v1/",
                                               params={"key": STEAM_API_KEY, "steamid": steamid, "include_appinfo": 1, "include_played_free_games": 1})
                         owned_games = owned.get("response", {}).get("games", []) if owned else []
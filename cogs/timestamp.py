@@ -1,15 +1,24 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import re
 import logging
 from pathlib import Path
-from datetime import datetime, timezone
-import asyncio
+from datetime import datetime
 from typing import Optional, List, Tuple
 import time
 
 from config import GUILD_ID
+from database import get_timestamp_webhooks, save_timestamp_webhook, delete_timestamp_webhook
+from helpers.message_dispatch import message_dispatcher
+from helpers.logging_helper import queued_file_handler
+from helpers.timestamp_helper import convert_times, find_time_matches, parse_time_string
+
+# Prefilter for the dispatcher: a digit followed by am/pm, or an H:MM time
+TIME_PREFILTER = r"\d\s*[ap]m\b|\d:\d\d"
+
+WEBHOOK_NAME = "Lemegeton Timestamp"
+# on_webhooks_update also fires for the webhook we just created; don't drop it straight away
+WEBHOOK_CREATE_GRACE = 10.0
 
 # Set up logging
 log_file_path = Path(__file__).parent.parent / "logs" / "timestamp.log"
@@ -19,7 +28,7 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 # Create file handler with rotation
-file_handler = logging.FileHandler(log_file_path, encoding='utf-8')
+file_handler = queued_file_handler(log_file_path)
 file_handler.setLevel(logging.INFO)
 
 # Create formatter
@@ -37,23 +46,25 @@ class TimestampConverter(commands.Cog):
         self.bot = bot
         self.watching_enabled = True  # Global toggle for all channels - enabled by default
         self.recently_processed = set()  # Track recently processed message IDs to prevent loops
+        self.webhook_cache = {}  # channel_id -> discord.Webhook (warmed lazily)
+        self._stored_webhook_ids = {}  # channel_id -> webhook_id persisted in the DB (no tokens)
+        self._webhook_created_at = {}  # channel_id -> monotonic time we created its webhook
         
-        # Time patterns to match (ordered by specificity to prevent overlaps)
-        self.time_patterns = [
-            # Date and time combinations first (most specific) - these should match first
-            r'\b(tomorrow|today)\s+at\s+(\d{1,2}):(\d{2})\s*(am|pm|AM|PM)\b',
-            r'\b(tomorrow|today)\s+at\s+(\d{1,2})\s*(am|pm|AM|PM)\b',
-            r'\b(\w{3,9}\s+\d{1,2})\s+at\s+(\d{1,2}):(\d{2})\s*(am|pm|AM|PM)\b',
-            r'\b(\w{3,9}\s+\d{1,2})\s+at\s+(\d{1,2})\s*(am|pm|AM|PM)\b',
-            # Standalone time formats (will be filtered out by overlap detection)
-            r'\b(\d{1,2}):(\d{2})\s*(am|pm|AM|PM)\b',
-            r'\b(\d{1,2})\s*(am|pm|AM|PM)\b',
-            # 24-hour format (very restrictive - must have colon and be valid time)
-            r'\b([01]?\d|2[0-3]):([0-5]\d)\b(?=\s|$|[^\d])',
-        ]
-        
+        # Time formats are detected by helpers/timestamp_helper.py (one compiled pattern, one scan)
+
         logger.info("TimestampConverter cog initialized")
 
+    async def cog_load(self):
+        message_dispatcher.register("timestamp", self.on_message, pattern=TIME_PREFILTER)
+        try:
+            self._stored_webhook_ids = await get_timestamp_webhooks()
+            logger.info(f"Restored {len(self._stored_webhook_ids)} stored timestamp webhook IDs")
+        except Exception as e:
+            logger.error(f"Failed to restore timestamp webhooks: {e}")
+
+    async def cog_unload(self):
+        message_dispatcher.unregister("timestamp")
+
     @app_commands.guilds(discord.Object(id=GUILD_ID))
     @app_commands.command(name="timestamp_watch", description="Toggle automatic timestamp conversion for all channels")
     @app_commands.default_permissions(administrator=True)
@@ -94,9 +105,8 @@ class TimestampConverter(commands.Cog):
             logger.error(f"Error in toggle_timestamp_watch: {e}")
             await interaction.response.send_message("❌ An error occurred while toggling timestamp watch.", ephemeral=True)
 
-    @commands.Cog.listener()
     async def on_message(self, message):
-        """Listen for messages in all channels and auto-convert timestamps when enabled."""
+        """Auto-convert timestamps when enabled (routed by the message dispatcher)."""
         try:
             # Skip if bot message, webhook message, or watching is disabled
             if message.author.bot or not self.watching_enabled:
@@ -108,7 +118,7 @@ class TimestampConverter(commands.Cog):
                 
             # Double-check: Skip if this message was sent by our webhook
             if hasattr(message, 'author') and hasattr(message.author, 'name'):
-                if message.author.name == "Lemegeton Timestamp":
+                if message.author.name == WEBHOOK_NAME:
                     return
             
             # Skip if message is a command
@@ -133,25 +143,10 @@ class TimestampConverter(commands.Cog):
             converted_message = self.convert_times_in_message(message.content)
             
             if converted_message and converted_message != message.content:
-                # Wait a moment to avoid spam
-                await asyncio.sleep(0.5)
-                
                 # Send the converted message with user's display name and avatar
-                webhook = None
                 try:
-                    # Try to get or create a webhook for this channel
-                    webhooks = await message.channel.webhooks()
-                    webhook = next((w for w in webhooks if w.name == "Lemegeton Timestamp"), None)
-                    
-                    if not webhook:
-                        webhook = await message.channel.create_webhook(name="Lemegeton Timestamp")
-                    
-                    # Send the message as the user with converted timestamps
-                    await webhook.send(
-                        content=converted_message,
-                        username=message.author.display_name,
-                        avatar_url=message.author.display_avatar.url
-                    )
+                    # Send the message as the user with converted timestamps (cached per-channel webhook)
+                    await self._send_as_user(message, converted_message)
                     
                     # Delete the original message
                     try:
@@ -178,169 +173,89 @@ class TimestampConverter(commands.Cog):
         except Exception as e:
             logger.error(f"Error in on_message timestamp detection: {e}")
 
+    # ---------------------
+    # Webhook cache
+    # ---------------------
+    async def _get_webhook(self, channel) -> discord.Webhook:
+        """
+        Return the channel's conversion webhook, looking it up (or creating it) only on a cache miss.
+        Only the webhook ID is persisted; its token is fetched from Discord after a restart.
+        """
+        webhook = self.webhook_cache.get(channel.id)
+        if webhook:
+            return webhook
+
+        webhook = None
+        stored_id = self._stored_webhook_ids.get(channel.id)
+        if stored_id:
+            try:
+                webhook = await self.bot.fetch_webhook(stored_id)
+            except (discord.NotFound, discord.Forbidden):
+                webhook = None
+            if webhook and not webhook.token:
+                webhook = None
+
+        if not webhook:
+            webhooks = await channel.webhooks()
+            webhook = next((w for w in webhooks if w.name == WEBHOOK_NAME and w.token), None)
+        if not webhook:
+            webhook = await channel.create_webhook(name=WEBHOOK_NAME)
+            self._webhook_created_at[channel.id] = time.monotonic()
+            logger.info(f"Created timestamp webhook in #{channel}")
+
+        self.webhook_cache[channel.id] = webhook
+        if stored_id != webhook.id:
+            try:
+                await save_timestamp_webhook(channel.id, webhook.id)
+                self._stored_webhook_ids[channel.id] = webhook.id
+            except Exception as e:
+                logger.warning(f"Could not persist webhook for channel {channel.id}: {e}")
+        return webhook
+
+    async def _invalidate_webhook(self, channel_id: int):
+        cached = self.webhook_cache.pop(channel_id, None)
+        stored = self._stored_webhook_ids.pop(channel_id, None)
+        if cached is not None or stored is not None:
+            logger.info(f"Invalidated cached timestamp webhook for channel {channel_id}")
+            try:
+                await delete_timestamp_webhook(channel_id)
+            except Exception as e:
+                logger.warning(f"Could not delete stored webhook for channel {channel_id}: {e}")
+
+    @commands.Cog.listener()
+    async def on_webhooks_update(self, channel):
+        created_at = self._webhook_created_at.get(channel.id)
+        if created_at and time.monotonic() - created_at < WEBHOOK_CREATE_GRACE:
+            return
+        await self._invalidate_webhook(channel.id)
+
+    async def _send_as_user(self, message, content: str):
+        """Execute the cached webhook; a deleted webhook (NotFound) is dropped and looked up once more."""
+        for attempt in range(2):
+            webhook = await self._get_webhook(message.channel)
+            try:
+                await webhook.send(
+                    content=content,
+                    username=message.author.display_name,
+                    avatar_url=message.author.display_avatar.url
+                )
+                return
+            except discord.NotFound:
+                await self._invalidate_webhook(message.channel.id)
+                if attempt:
+                    raise
+
     def convert_times_in_message(self, content: str) -> str:
         """Convert all time mentions in a message to Discord timestamps."""
-        converted_content = content
-        
-        # Pre-filter: Skip entire message if it contains specific duration phrases
-        # Be more specific to avoid false positives
-        if re.search(r'\bin\s+\d+\s*(hours?|hrs?|minutes?|mins?|seconds?|secs?)\b', content, re.IGNORECASE):
-            return content  # Return unchanged if it contains "in X hours" patterns
-        
-        if re.search(r'\b\d+\s*(hours?|hrs?|minutes?|mins?|seconds?|secs?)\s+(ago|from\s+now|later)\b', content, re.IGNORECASE):
-            return content  # Return unchanged if it contains "X hours ago" or "X hours from now" patterns
-        
-        # Find all times and their positions, avoiding overlaps
-        replacements = []
-        processed_ranges = []  # Track which parts of the string have been processed
-        
-        for pattern in self.time_patterns:
-            matches = re.finditer(pattern, content, re.IGNORECASE)
-            for match in matches:
-                original_text = match.group(0)
-                start_pos = match.start()
-                end_pos = match.end()
-                
-                # Check if this match overlaps with any already processed range
-                overlaps = any(
-                    not (end_pos <= proc_start or start_pos >= proc_end)
-                    for proc_start, proc_end in processed_ranges
-                )
-                
-                if overlaps:
-                    continue  # Skip this match to avoid overlaps
-                
-                # Additional check: make sure this match isn't part of a duration phrase
-                context_start = max(0, start_pos - 15)
-                context_end = min(len(content), end_pos + 15)
-                context = content[context_start:context_end].lower()
-                
-                # Skip if this appears to be part of a duration statement
-                # But be more specific - don't just look for "in" anywhere
-                if re.search(r'\bin\s+\d+\s*(hours?|hrs?|minutes?|mins?)\b', context):
-                    continue
-                if re.search(r'\b(ago\b|from\s+now|later)\b', context):
-                    continue
-                
-                timestamp = self.parse_time_string(original_text)
-                if timestamp:
-                    unix_timestamp = int(timestamp.timestamp())
-                    # Use short time format for clean display that maintains grammar
-                    # :t shows "3:30 PM", :f shows "December 28, 2023 3:30 PM"
-                    # For better readability, use :f for dates with time, :t for just times
-                    if any(word in original_text.lower() for word in ['tomorrow', 'today', 'dec', 'jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov']):
-                        discord_timestamp = f"<t:{unix_timestamp}:f>"  # Full date and time
-                    else:
-                        discord_timestamp = f"<t:{unix_timestamp}:t>"  # Just time
-                    replacements.append((match.start(), match.end(), original_text, discord_timestamp))
-                    processed_ranges.append((start_pos, end_pos))
-        
-        # Sort replacements by position (reverse order to avoid index shifting)
-        replacements.sort(key=lambda x: x[0], reverse=True)
-        
-        # Apply replacements
-        for start, end, original, replacement in replacements:
-            converted_content = converted_content[:start] + replacement + converted_content[end:]
-        
-        return converted_content
+        return convert_times(content)
 
     def find_times_in_message(self, content: str) -> List[Tuple[str, datetime]]:
         """Find all time mentions in a message and return parsed timestamps."""
-        found_times = []
-        
-        for pattern in self.time_patterns:
-            matches = re.finditer(pattern, content, re.IGNORECASE)
-            for match in matches:
-                original_text = match.group(0)
-                timestamp = self.parse_time_string(original_text)
-                if timestamp:
-                    found_times.append((original_text, timestamp))
-        
-        return found_times
+        return [(text, timestamp) for _, _, text, timestamp in find_time_matches(content)]
 
     def parse_time_string(self, time_str: str, date_str: Optional[str] = None) -> Optional[datetime]:
         """Parse various time formats and return a datetime object."""
-        try:
-            # Skip if this looks like a duration/future statement
-            # Be more specific - only skip if it's clearly a duration
-            if re.search(r'\bin\s+\d+\s*(hours?|hrs?|minutes?|mins?|seconds?|secs?)\b', time_str, re.IGNORECASE):
-                return None
-            if re.search(r'\b\d+\s*(hours?|hrs?|minutes?|mins?|seconds?|secs?)\s+(ago|from\s+now|later)\b', time_str, re.IGNORECASE):
-                return None
-            
-            # Use local time for calculations - this will be the user's system timezone
-            now = datetime.now()
-            
-            # Combine time and date strings if provided
-            full_str = f"{date_str} {time_str}" if date_str else time_str
-            
-            # Clean up the string
-            full_str = full_str.strip().lower()
-            
-            # Handle "tomorrow at X" or "today at X"
-            if "tomorrow" in full_str:
-                base_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
-                base_date = base_date.replace(day=base_date.day + 1)
-                time_part = re.search(r'(\d{1,2}):?(\d{2})?\s*(am|pm)?', full_str)
-            elif "today" in full_str:
-                base_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
-                time_part = re.search(r'(\d{1,2}):?(\d{2})?\s*(am|pm)?', full_str)
-            elif re.search(r'\w{3,9}\s+\d{1,2}\s+at', full_str):
-                # Handle "Dec 25 at" type patterns
-                base_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
-                # For now, assume it's this year (could be enhanced later)
-                time_part = re.search(r'(\d{1,2}):?(\d{2})?\s*(am|pm)?', full_str)
-            else:
-                base_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
-                time_part = re.search(r'(\d{1,2}):?(\d{2})?\s*(am|pm)?', full_str)
-            
-            if not time_part:
-                return None
-                
-            hour = int(time_part.group(1))
-            minute = int(time_part.group(2)) if time_part.group(2) else 0
-            am_pm = time_part.group(3)
-            
-            # Handle AM/PM conversion
-            if am_pm:
-                if am_pm in ['pm'] and hour != 12:
-                    hour += 12
-                elif am_pm in ['am'] and hour == 12:
-                    hour = 0
-            
-            # If no AM/PM specified and hour is 1-12, assume next occurrence
-            elif hour <= 12:
-                # If the time has already passed today, assume tomorrow
-                test_time = base_date.replace(hour=hour, minute=minute)
-                if test_time < now:
-                    # Try PM version
-                    if hour != 12:
-                        test_time = base_date.replace(hour=hour + 12, minute=minute)
-                        if test_time < now:
-                            # Still in the past, use tomorrow
-                            base_date = base_date.replace(day=base_date.day + 1)
-                            hour = hour  # Keep original hour for tomorrow
-                    else:
-                        # For 12:xx, try tomorrow
-                        base_date = base_date.replace(day=base_date.day + 1)
-            
-            # Validate hour and minute
-            if hour > 23 or minute > 59:
-                return None
-            
-            # Create the final datetime in local time
-            result = base_date.replace(hour=hour, minute=minute)
-            
-            # Convert local time to UTC for Discord timestamps
-            # Use time.mktime to get local timestamp, then convert to UTC
-            local_timestamp = time.mktime(result.timetuple())
-            utc_result = datetime.fromtimestamp(local_timestamp, tz=timezone.utc)
-                
-            return utc_result
-            
-        except Exception as e:
-            logger.error(f"Error parsing time string '{time_str}': {e}")
-            return None
+        return parse_time_string(time_str, date_str)
 
 async def setup(bot):
     await bot.add_cog(TimestampConverter(bot))
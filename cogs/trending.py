@@ -9,6 +9,8 @@ import logging
 from pathlib import Path
 
 from config import GUILD_ID
+from helpers.logging_helper import queued_file_handler
+from helpers.metrics import http_trace_configs
 
 # ------------------------------------------------------
 # Logging Setup - Clears on each bot run
@@ -17,10 +19,6 @@ LOG_DIR = Path("logs")
 LOG_DIR.mkdir(exist_ok=True)
 LOG_FILE = LOG_DIR / "trending.log"
 
-# Clear the log file on startup
-if LOG_FILE.exists():
-    LOG_FILE.unlink()
-
 # Create logger
 logger = logging.getLogger("Trending")
 logger.setLevel(logging.INFO)
@@ -30,7 +28,7 @@ for handler in logger.handlers[:]:
     logger.removeHandler(handler)
 
 # Create file handler
-file_handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
+file_handler = queued_file_handler(LOG_FILE, mode="w")
 file_handler.setLevel(logging.INFO)
 
 # Create formatter
@@ -158,7 +156,7 @@ class Trending(commands.Cog):
         variables = {"type": fetch_type}
         
         try:
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)) as session:
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT), trace_configs=http_trace_configs()) as session:
                 logger.info(f"Making API request to AniList for {label} trending data")
                 async with session.post(
                     ANILIST_ENDPOINT,
@@ -324,7 +322,7 @@ class TrendingPaginatedView(discord.ui.View):
 
         async def fetch_trending(fetch_type: str, label: str):
             variables = {"type": fetch_type}
-            async with aiohttp.ClientSession() as session:
+            async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
                 try:
                     async with session.post(
                         "https://graphql.anilist.co",
@@ -7,6 +7,7 @@ import os
 from pathlib import Path
 
 from config import GUILD_ID
+from helpers.logging_helper import queued_file_handler
 from helpers.media_helper import fetch_watchlist
 from database import get_user
 
@@ -17,10 +18,6 @@ LOG_DIR = Path("logs")
 LOG_DIR.mkdir(exist_ok=True)
 LOG_FILE = LOG_DIR / "watchlist.log"
 
-# Clear the log file on startup
-if LOG_FILE.exists():
-    LOG_FILE.unlink()
-
 # Create logger
 logger = logging.getLogger("Watchlist")
 logger.setLevel(logging.INFO)
@@ -30,7 +27,7 @@ for handler in logger.handlers[:]:
     logger.removeHandler(handler)
 
 # Create file handler
-file_handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
+file_handler = queued_file_handler(LOG_FILE, mode="w")
 file_handler.setLevel(logging.INFO)
 
 # Create formatter
@@ -9,6 +9,10 @@ BOT_ID = int(os.getenv("BOT_ID"))
 CHANNEL_ID = int(os.getenv("CHANNEL_ID"))
 STEAM_API_KEY = os.getenv("STEAM_API_KEY")
 ADMIN_DISCORD_ID = int(os.getenv("ADMIN_DISCORD_ID"))
+MOD_ROLE_ID = int(os.getenv("MOD_ROLE_ID", "0")) or None  # optional; finisher falls back to guild permissions
+COG_HOT_RELOAD = os.getenv("COG_HOT_RELOAD", "1").lower() not in ("0", "false", "no")  # set to 0 in production
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0")) or None  # optional; serves /metrics when set
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
 
 # Database path - Railway compatible
 DB_PATH = os.getenv("DATABASE_PATH", os.path.join(os.path.dirname(__file__), "database.db"))
@@ -1,23 +1,29 @@
 import aiosqlite
+import json
 from pathlib import Path
 import aiohttp
 import asyncio
 import logging
 import os
 import time
-from typing import List, Dict, Optional
+import zlib
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 
+from helpers.logging_helper import queued_file_handler, queued_handler
+from helpers.metrics import DB_QUERY_DURATION, DB_QUERY_ERRORS
+
 # ------------------------------------------------------
 # Logging Setup with File-based System
 # ------------------------------------------------------
 # Configuration constants
 LOG_DIR = "logs"
 LOG_FILE = "database.log"
-LOG_MAX_SIZE = 50 * 1024 * 1024  # 50MB max log file size
 DB_TIMEOUT = 30.0  # Database operation timeout in seconds
 CONNECTION_RETRIES = 3  # Number of retry attempts for database connections
 RETRY_DELAY = 1.0  # Delay between retries in seconds
+# Per-query DEBUG logging (SQL, parameters, timings) is opt-in: it runs for every statement
+DB_DEBUG_LOG = os.getenv("DB_DEBUG_LOG", "0").lower() in ("1", "true", "yes")
 
 # Ensure logs directory exists
 os.makedirs(LOG_DIR, exist_ok=True)
@@ -25,16 +31,12 @@ os.makedirs(LOG_DIR, exist_ok=True)
 # Configure comprehensive file-based logging
 log_file_path = os.path.join(LOG_DIR, LOG_FILE)
 
-# Clear existing log file if it's too large
-if os.path.exists(log_file_path) and os.path.getsize(log_file_path) > LOG_MAX_SIZE:
-    open(log_file_path, 'w').close()
-
-# Setup file handler with detailed formatting
-file_handler = logging.FileHandler(log_file_path, encoding='utf-8')
+# Setup file handler with detailed formatting (rotating, written from the background log thread)
+file_handler = queued_file_handler(log_file_path)
 file_handler.setLevel(logging.DEBUG)
 
 # Setup console handler
-console_handler = logging.StreamHandler()
+console_handler = queued_handler(logging.StreamHandler())
 console_handler.setLevel(logging.INFO)
 
 # Create formatter
@@ -48,7 +50,7 @@ console_handler.setFormatter(formatter)
 
 # Configure logger
 logger = logging.getLogger("Database")
-logger.setLevel(logging.DEBUG)
+logger.setLevel(logging.DEBUG if DB_DEBUG_LOG else logging.INFO)
 logger.handlers.clear()  # Remove any existing handlers
 logger.addHandler(file_handler)
 logger.addHandler(console_handler)
@@ -102,7 +104,7 @@ async def get_db_connection():
                 logger.error(f"All database connection attempts failed")
                 raise
 
-async def execute_db_operation(operation_name: str, query: str, params=None, fetch_type=None):
+async def execute_db_operation(operation_name: str, query: str, params=None, fetch_type=None, metric: str = None):
     """
     Execute database operation with comprehensive logging and error handling.
     
@@ -111,11 +113,15 @@ async def execute_db_operation(operation_name: str, query: str, params=None, fet
         query: SQL query to execute
         params: Query parameters
         fetch_type: 'one', 'all', or None for no fetch
+        metric: Static label for the query metrics; required when operation_name contains IDs/usernames
     """
-    logger.debug(f"Executing {operation_name}")
-    logger.debug(f"Query: {query}")
-    if params:
-        logger.debug(f"Parameters: {params}")
+    metric = metric or operation_name
+    # Runs for every statement: only build the SQL/params text when DEBUG is actually on
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Executing %s", operation_name)
+        logger.debug("Query: %s", query)
+        if params:
+            logger.debug("Parameters: %s", params)
     
     start_time = time.time()
     
@@ -139,24 +145,27 @@ async def execute_db_operation(operation_name: str, query: str, params=None, fet
             await db.commit()
             
             execution_time = time.time() - start_time
-            logger.debug(f"{operation_name} completed in {execution_time:.3f}s")
+            DB_QUERY_DURATION.observe(execution_time, operation=metric)
+            logger.debug("%s completed in %.3fs", operation_name, execution_time)
             
             if result is not None:
                 if fetch_type == 'one':
-                    logger.debug(f"Query returned 1 row")
+                    logger.debug("Query returned 1 row")
                 elif fetch_type == 'all':
-                    logger.debug(f"Query returned {len(result)} rows")
+                    logger.debug("Query returned %d rows", len(result))
                 elif fetch_type == 'lastrowid':
-                    logger.debug(f"Last inserted row ID: {result}")
+                    logger.debug("Last inserted row ID: %s", result)
             
             return result
             
     except aiosqlite.Error as db_error:
         execution_time = time.time() - start_time
+        DB_QUERY_ERRORS.inc(operation=metric)
         logger.error(f"{operation_name} failed after {execution_time:.3f}s: {db_error}")
         raise
     except Exception as e:
         execution_time = time.time() - start_time
+        DB_QUERY_ERRORS.inc(operation=metric)
         logger.error(f"Unexpected error in {operation_name} after {execution_time:.3f}s: {e}", exc_info=True)
         raise
 
@@ -237,7 +246,8 @@ async def add_user(discord_id: int, username: str, anilist_username: str = None,
         await execute_db_operation(
             f"add user {username}",
             query,
-            (discord_id, username.strip(), anilist_username, anilist_id)
+            (discord_id, username.strip(), anilist_username, anilist_id),
+            metric="add user"
         )
         
         logger.info(f"✅ Successfully added user {username} (Discord ID: {discord_id})")
@@ -269,7 +279,8 @@ async def get_user(discord_id: int):
             f"get user {discord_id}",
             query,
             (discord_id,),
-            fetch_type='one'
+            fetch_type='one',
+            metric="get user"
         )
         
         if user:
@@ -328,7 +339,8 @@ async def update_username(discord_id: int, username: str):
         await execute_db_operation(
             f"update username for {discord_id}",
             query,
-            (username.strip(), discord_id)
+            (username.strip(), discord_id),
+            metric="update username"
         )
         
         logger.info(f"✅ Updated username for {discord_id}: '{old_username}' → '{username}'")
@@ -547,7 +559,8 @@ async def update_anilist_info(discord_id: int, anilist_username: str, anilist_id
         await execute_db_operation(
             f"update AniList info for {discord_id}",
             query,
-            (anilist_username.strip(), anilist_id, discord_id)
+            (anilist_username.strip(), anilist_id, discord_id),
+            metric="update AniList info"
         )
         
         logger.info(f"✅ Updated AniList info for {discord_id}: {anilist_username} (ID: {anilist_id})")
@@ -761,7 +774,8 @@ async def set_user_manga_progress(discord_id: int, manga_id: int, chapter: int,
         await execute_db_operation(
             f"set manga progress for user {discord_id}",
             query,
-            (discord_id, manga_id, chapter, rating)
+            (discord_id, manga_id, chapter, rating),
+            metric="set manga progress"
         )
         
         logger.info(f"✅ Set manga {manga_id} progress for user {discord_id}: Chapter {chapter}, Rating {rating}")
@@ -793,7 +807,8 @@ async def get_user_manga_progress(discord_id: int, manga_id: int):
             f"get manga progress for user {discord_id}",
             query,
             (discord_id, manga_id),
-            fetch_type='one'
+            fetch_type='one',
+            metric="get manga progress"
         )
         
         if result:
@@ -860,7 +875,8 @@ async def upsert_user_manga_progress(discord_id, manga_id, title, chapters, poin
         await execute_db_operation(
             f"upsert manga progress for user {discord_id}",
             query,
-            (discord_id, manga_id, title.strip(), chapters, points, status, repeat, started_at, now)
+            (discord_id, manga_id, title.strip(), chapters, points, status, repeat, started_at, now),
+            metric="upsert manga progress"
         )
         
         logger.info(f"✅ Upserted manga progress for user {discord_id}: {title} ({status})")
@@ -931,7 +947,8 @@ async def upsert_user_stats(
             query,
             (discord_id, username.strip(), numeric_fields['total_manga'], numeric_fields['total_anime'],
              numeric_fields['avg_manga_score'], numeric_fields['avg_anime_score'], 
-             numeric_fields['total_chapters'], numeric_fields['total_episodes'])
+             numeric_fields['total_chapters'], numeric_fields['total_episodes']),
+            metric="upsert user stats"
         )
         
         logger.info(f"✅ Successfully upserted stats for {username}")
@@ -969,7 +986,8 @@ async def save_user(discord_id: int, username: str):
         await execute_db_operation(
             f"save user {username} ({operation_type})",
             query,
-            (discord_id, username.strip())
+            (discord_id, username.strip()),
+            metric="save user"
         )
         
         logger.info(f"✅ Successfully saved user: {username} ({operation_type})")
@@ -1172,6 +1190,36 @@ async def init_invite_tracker_tables():
                 )
             """)
             
+            # Per-guild running totals and daily join/leave buckets for /sect_analytics
+            cursor = await db.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recruitment_counters'"
+            )
+            counters_existed = await cursor.fetchone() is not None
+            await cursor.close()
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS recruitment_counters (
+                    guild_id INTEGER PRIMARY KEY,
+                    total_recruited INTEGER NOT NULL DEFAULT 0,
+                    total_leaves INTEGER NOT NULL DEFAULT 0,
+                    leave_days_sum INTEGER NOT NULL DEFAULT 0,
+                    leave_days_count INTEGER NOT NULL DEFAULT 0,
+                    top_recruiter_id INTEGER,
+                    top_recruiter_name TEXT,
+                    top_recruiter_count INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS recruitment_daily (
+                    guild_id INTEGER NOT NULL,
+                    day TEXT NOT NULL,
+                    joins INTEGER NOT NULL DEFAULT 0,
+                    leaves INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (guild_id, day)
+                )
+            """)
+            if not counters_existed:
+                await _backfill_recruitment_counters(db)
+            
             # Invite tracker settings - stores channel configuration
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS invite_tracker_settings (
@@ -1188,6 +1236,181 @@ async def init_invite_tracker_tables():
         logger.error(f"❌ Failed to initialize invite tracker tables: {e}", exc_info=True)
         raise
 
+async def _backfill_recruitment_counters(db):
+    """Seed the counters and daily rollups from existing history (runs once, when the tables are created)."""
+    await db.execute("""
+        INSERT OR IGNORE INTO recruitment_counters (guild_id) 
+        SELECT guild_id FROM invite_uses UNION SELECT guild_id FROM user_leaves
+    """)
+    await db.execute("""
+        UPDATE recruitment_counters SET
+            total_recruited = (SELECT COUNT(*) FROM invite_uses u WHERE u.guild_id = recruitment_counters.guild_id),
+            total_leaves = (SELECT COUNT(*) FROM user_leaves l WHERE l.guild_id = recruitment_counters.guild_id),
+            leave_days_sum = (SELECT COALESCE(SUM(days_in_server), 0) FROM user_leaves l
+                              WHERE l.guild_id = recruitment_counters.guild_id AND days_in_server > 0),
+            leave_days_count = (SELECT COUNT(*) FROM user_leaves l
+                                WHERE l.guild_id = recruitment_counters.guild_id AND days_in_server > 0)
+    """)
+    await db.execute("""
+        UPDATE recruitment_counters SET
+            top_recruiter_id = (SELECT user_id FROM recruitment_stats s WHERE s.guild_id = recruitment_counters.guild_id
+                                ORDER BY total_recruits DESC LIMIT 1),
+            top_recruiter_name = (SELECT username FROM recruitment_stats s WHERE s.guild_id = recruitment_counters.guild_id
+                                  ORDER BY total_recruits DESC LIMIT 1),
+            top_recruiter_count = COALESCE((SELECT MAX(total_recruits) FROM recruitment_stats s
+                                            WHERE s.guild_id = recruitment_counters.guild_id), 0)
+    """)
+    await db.execute("""
+        INSERT OR IGNORE INTO recruitment_daily (guild_id, day, joins)
+        SELECT guild_id, date(joined_at), COUNT(*) FROM invite_uses GROUP BY guild_id, date(joined_at)
+    """)
+    await db.execute("""
+        INSERT INTO recruitment_daily (guild_id, day, leaves)
+        SELECT guild_id, date(left_at), COUNT(*) FROM user_leaves WHERE true GROUP BY guild_id, date(left_at)
+        ON CONFLICT(guild_id, day) DO UPDATE SET leaves = excluded.leaves
+    """)
+    logger.info("Seeded recruitment counters from existing invite history")
+
+
+async def record_recruitment_join(guild_id: int, invite_code: str, inviter_id: int, inviter_name: str,
+                                  joiner_id: int, joiner_name: str) -> int:
+    """Record an invited join and bump every counter in one transaction. Returns the inviter's total recruits."""
+    async with aiosqlite.connect(DB_PATH, timeout=DB_TIMEOUT) as db:
+        await db.execute(
+            """
+            INSERT INTO invite_uses 
+            (guild_id, invite_code, inviter_id, inviter_name, joiner_id, joiner_name)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (guild_id, invite_code, inviter_id, inviter_name, joiner_id, joiner_name)
+        )
+        await db.execute(
+            """
+            INSERT OR REPLACE INTO recruitment_stats
+            (user_id, guild_id, username, total_recruits)
+            VALUES (?, ?, ?, COALESCE((
+                SELECT total_recruits + 1 FROM recruitment_stats 
+                WHERE user_id = ? AND guild_id = ?
+            ), 1))
+            """,
+            (inviter_id, guild_id, inviter_name, inviter_id, guild_id)
+        )
+        cursor = await db.execute(
+            "SELECT total_recruits FROM recruitment_stats WHERE user_id = ? AND guild_id = ?",
+            (inviter_id, guild_id)
+        )
+        row = await cursor.fetchone()
+        await cursor.close()
+        recruits = row[0] if row else 1
+
+        await db.execute(
+            """
+            INSERT INTO recruitment_counters (guild_id, total_recruited, top_recruiter_id, top_recruiter_name, top_recruiter_count)
+            VALUES (?, 1, ?, ?, ?)
+            ON CONFLICT(guild_id) DO UPDATE SET
+                total_recruited = total_recruited + 1,
+                top_recruiter_id = CASE WHEN excluded.top_recruiter_count > top_recruiter_count
+                                        THEN excluded.top_recruiter_id ELSE top_recruiter_id END,
+                top_recruiter_name = CASE WHEN excluded.top_recruiter_count > top_recruiter_count
+                                          THEN excluded.top_recruiter_name ELSE top_recruiter_name END,
+                top_recruiter_count = MAX(top_recruiter_count, excluded.top_recruiter_count)
+            """,
+            (guild_id, inviter_id, inviter_name, recruits)
+        )
+        await db.execute(
+            """
+            INSERT INTO recruitment_daily (guild_id, day, joins) VALUES (?, date('now'), 1)
+            ON CONFLICT(guild_id, day) DO UPDATE SET joins = joins + 1
+            """,
+            (guild_id,)
+        )
+        await db.commit()
+    return recruits
+
+
+async def record_member_leave(guild_id: int, user_id: int, username: str, days_in_server: int):
+    """Record a leave (with the member's inviter, if known) and bump the counters in one transaction."""
+    async with aiosqlite.connect(DB_PATH, timeout=DB_TIMEOUT) as db:
+        await db.execute(
+            """
+            INSERT INTO user_leaves 
+            (guild_id, user_id, username, was_invited_by, days_in_server)
+            VALUES (?, ?, ?, (
+                SELECT inviter_id FROM invite_uses 
+                WHERE guild_id = ? AND joiner_id = ? 
+                ORDER BY joined_at DESC LIMIT 1
+            ), ?)
+            """,
+            (guild_id, user_id, username, guild_id, user_id, days_in_server)
+        )
+        counted = 1 if days_in_server > 0 else 0
+        await db.execute(
+            """
+            INSERT INTO recruitment_counters (guild_id, total_leaves, leave_days_sum, leave_days_count)
+            VALUES (?, 1, ?, ?)
+            ON CONFLICT(guild_id) DO UPDATE SET
+                total_leaves = total_leaves + 1,
+                leave_days_sum = leave_days_sum + excluded.leave_days_sum,
+                leave_days_count = leave_days_count + excluded.leave_days_count
+            """,
+            (guild_id, days_in_server * counted, counted)
+        )
+        await db.execute(
+            """
+            INSERT INTO recruitment_daily (guild_id, day, leaves) VALUES (?, date('now'), 1)
+            ON CONFLICT(guild_id, day) DO UPDATE SET leaves = leaves + 1
+            """,
+            (guild_id,)
+        )
+        await db.commit()
+
+
+async def get_recruitment_analytics(guild_id: int, recent_days: int = 7) -> Optional[Dict]:
+    """Counters plus joins/leaves over the last `recent_days` days (today included) in one read."""
+    row = await execute_db_operation(
+        f"get recruitment analytics for guild {guild_id}",
+        """
+        SELECT c.total_recruited, c.total_leaves, c.leave_days_sum, c.leave_days_count,
+               c.top_recruiter_name, c.top_recruiter_count,
+               COALESCE(SUM(d.joins), 0), COALESCE(SUM(d.leaves), 0)
+        FROM recruitment_counters c
+        LEFT JOIN recruitment_daily d ON d.guild_id = c.guild_id AND d.day >= date('now', ?)
+        WHERE c.guild_id = ?
+        GROUP BY c.guild_id
+        """,
+        (f"-{recent_days - 1} days", guild_id),
+        fetch_type="one",
+        metric="get recruitment analytics"
+    )
+    if not row:
+        return None
+    total_recruited, total_leaves, days_sum, days_count, top_name, top_count, recent_joins, recent_leaves = row
+    return {
+        "total_recruited": total_recruited,
+        "total_leaves": total_leaves,
+        "avg_days": days_sum / days_count if days_count else 0,
+        "top_recruiter": (top_name, top_count) if top_name else None,
+        "recent_joins": recent_joins,
+        "recent_leaves": recent_leaves,
+    }
+
+
+async def upsert_invites(rows: List[Tuple]):
+    """Write invite rows (invite_code, guild_id, inviter_id, inviter_name, channel_id, max_uses, uses) in one transaction."""
+    if not rows:
+        return
+    async with aiosqlite.connect(DB_PATH, timeout=DB_TIMEOUT) as db:
+        await db.executemany(
+            """
+            INSERT OR REPLACE INTO invites
+            (invite_code, guild_id, inviter_id, inviter_name, channel_id, max_uses, uses)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows
+        )
+        await db.commit()
+
+
 # ------------------------------------------------------
 # STEAM USERS TABLE
 # ------------------------------------------------------
@@ -1205,6 +1428,759 @@ async def init_steam_users_table():
         logger.info("Steam users table ready.")
 
 
+# ------------------------------------------------------
+# STEAM APP DETAILS CACHE (store appdetails responses)
+# ------------------------------------------------------
+async def init_steam_app_cache_table():
+    """appdetails payloads keyed by appid, stored as zlib-compressed JSON."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS steam_app_cache (
+                appid INTEGER PRIMARY KEY,
+                data BLOB NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        await db.commit()
+        logger.info("Steam app cache table ready.")
+
+
+async def get_cached_steam_apps(appids: List[int], max_age: float) -> Dict[int, dict]:
+    """Return {appid: details} for the appids cached within the last `max_age` seconds."""
+    appids = [int(a) for a in appids]
+    if not appids:
+        return {}
+    cutoff = time.time() - max_age
+    found = {}
+    async with aiosqlite.connect(DB_PATH, timeout=DB_TIMEOUT) as db:
+        # Stay well under SQLite's bound-parameter limit
+        for i in range(0, len(appids), 500):
+            chunk = appids[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = await db.execute(
+                f"SELECT appid, data FROM steam_app_cache WHERE appid IN ({placeholders}) AND fetched_at >= ?",
+                (*chunk, cutoff)
+            )
+            for appid, data in await cursor.fetchall():
+                try:
+                    found[appid] = json.loads(zlib.decompress(data))
+                except (zlib.error, ValueError):
+                    logger.warning(f"Discarding unreadable Steam cache entry for app {appid}")
+            await cursor.close()
+    return found
+
+
+async def save_steam_apps(apps: Dict[int, dict]):
+    """Store appdetails payloads ({} for apps Steam has no data for) in one transaction."""
+    if not apps:
+        return
+    now = time.time()
+    rows = [(int(appid), zlib.compress(json.dumps(details, separators=(",", ":")).encode()), now)
+            for appid, details in apps.items()]
+    async with aiosqlite.connect(DB_PATH, timeout=DB_TIMEOUT) as db:
+        await db.executemany(
+            "INSERT OR REPLACE INTO steam_app_cache (appid, data, fetched_at) VALUES (?, ?, ?)",
+            rows
+        )
+        await db.commit()
+
+
+# ------------------------------------------------------
+# STEAM CATALOG (slim per-app index built from appdetails)
+# ------------------------------------------------------
+STEAM_CATALOG_LIST_COLUMNS = ("genres", "categories", "developers", "publishers")
+
+
+async def init_steam_catalog_table():
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS steam_catalog (
+                appid INTEGER PRIMARY KEY,
+                name TEXT,
+                app_type TEXT,
+                genres TEXT NOT NULL DEFAULT '[]',
+                categories TEXT NOT NULL DEFAULT '[]',
+                developers TEXT NOT NULL DEFAULT '[]',
+                publishers TEXT NOT NULL DEFAULT '[]',
+                metacritic INTEGER,
+                updated_at REAL NOT NULL
+            )
+        """)
+        await db.commit()
+        logger.info("Steam catalog table ready.")
+
+
+async def save_steam_catalog_apps(apps: List[Dict]):
+    """Upsert catalog rows: dicts with appid, name, app_type, metacritic and the list columns."""
+    if not apps:
+        return
+    now = time.time()
+    rows = [
+        (int(a["appid"]), a.get("name"), a.get("app_type"),
+         *(json.dumps(list(a.get(col) or [])) for col in STEAM_CATALOG_LIST_COLUMNS),
+         a.get("metacritic"), now)
+        for a in apps
+    ]
+    async with aiosqlite.connect(DB_PATH, timeout=DB_TIMEOUT) as db:
+        await db.executemany(
+            """
+            INSERT OR REPLACE INTO steam_catalog
+                (appid, name, app_type, genres, categories, developers, publishers, metacritic, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows
+        )
+        await db.commit()
+
+
+async def get_steam_catalog() -> List[Dict]:
+    """Every catalog row, list columns decoded."""
+    async with aiosqlite.connect(DB_PATH, timeout=DB_TIMEOUT) as db:
+        cursor = await db.execute(
+            "SELECT appid, name, app_type, genres, categories, developers, publishers, metacritic FROM steam_catalog"
+        )
+        rows = await cursor.fetchall()
+        await cursor.close()
+    apps = []
+    for appid, name, app_type, *lists, metacritic in rows:
+        app = {"appid": appid, "name": name, "app_type": app_type, "metacritic": metacritic}
+        app.update({col: json.loads(value) for col, value in zip(STEAM_CATALOG_LIST_COLUMNS, lists)})
+        apps.append(app)
+    return apps
+
+
+async def iter_steam_app_cache(batch_size: int = 500):
+    """Yield (appid, details) for every cached appdetails payload, oldest rows included."""
+    async with aiosqlite.connect(DB_PATH, timeout=DB_TIMEOUT) as db:
+        cursor = await db.execute("SELECT appid, data FROM steam_app_cache")
+        while True:
+            rows = await cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for appid, data in rows:
+                try:
+                    yield appid, json.loads(zlib.decompress(data))
+                except (zlib.error, ValueError):
+                    continue
+        await cursor.close()
+
+
+async def prune_steam_app_cache(max_age: float) -> int:
+    """Delete cached appdetails older than `max_age` seconds. Returns the number of rows removed."""
+    async with aiosqlite.connect(DB_PATH, timeout=DB_TIMEOUT) as db:
+        cursor = await db.execute("DELETE FROM steam_app_cache WHERE fetched_at < ?", (time.time() - max_age,))
+        removed = cursor.rowcount
+        await cursor.close()
+        await db.commit()
+    return removed
+
+
+# ------------------------------------------------------
+# BACKGROUND JOBS TABLE
+# ------------------------------------------------------
+JOB_UPDATABLE_COLUMNS = {
+    "status", "progress_current", "progress_total", "progress_message",
+    "result", "error", "started_at", "finished_at", "cancel_requested",
+}
+
+
+async def init_jobs_table():
+    """Create the table backing helpers.job_helper (queued/running/finished background jobs)."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                params TEXT,
+                status TEXT NOT NULL DEFAULT 'queued',
+                progress_current INTEGER DEFAULT 0,
+                progress_total INTEGER DEFAULT 0,
+                progress_message TEXT,
+                result TEXT,
+                error TEXT,
+                created_by INTEGER,
+                cancel_requested INTEGER DEFAULT 0,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                started_at DATETIME,
+                finished_at DATETIME
+            )
+        """)
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+        await db.commit()
+        logger.info("Jobs table ready.")
+
+
+async def create_job(kind: str, params: str = None, created_by: int = None) -> int:
+    """Insert a queued job and return its id."""
+    job_id = await execute_db_operation(
+        f"create {kind} job",
+        "INSERT INTO jobs (kind, params, created_by) VALUES (?, ?, ?)",
+        (kind, params, created_by),
+        fetch_type='lastrowid'
+    )
+    logger.info(f"✅ Created job #{job_id} ({kind})")
+    return job_id
+
+
+async def update_job(job_id: int, **fields):
+    """Update selected columns of a job row."""
+    unknown = set(fields) - JOB_UPDATABLE_COLUMNS
+    if unknown:
+        raise ValueError(f"Invalid job columns: {', '.join(sorted(unknown))}")
+    if not fields:
+        return
+
+    assignments = ", ".join(f"{column} = ?" for column in fields)
+    await execute_db_operation(
+        f"update job {job_id}",
+        f"UPDATE jobs SET {assignments} WHERE job_id = ?",
+        (*fields.values(), job_id),
+        metric="update job"
+    )
+
+
+async def get_job(job_id: int):
+    """Return a single job row as a dict, or None."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,))
+        row = await cursor.fetchone()
+        await cursor.close()
+    return dict(row) if row else None
+
+
+async def get_recent_jobs(limit: int = 10) -> List[Dict]:
+    """Return the most recently created jobs, newest first."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute("SELECT * FROM jobs ORDER BY job_id DESC LIMIT ?", (limit,))
+        rows = await cursor.fetchall()
+        await cursor.close()
+    return [dict(r) for r in rows]
+
+
+async def get_unfinished_jobs(kind: str = None) -> List[Dict]:
+    """Return queued or running jobs (optionally of one kind), oldest first."""
+    query = "SELECT * FROM jobs WHERE status IN ('queued', 'running')"
+    params = ()
+    if kind:
+        query += " AND kind = ?"
+        params = (kind,)
+    query += " ORDER BY job_id"
+
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(query, params)
+        rows = await cursor.fetchall()
+        await cursor.close()
+    return [dict(r) for r in rows]
+
+
+
+
+# ------------------------------------------------------
+# ANILIST PROFILE CACHE TABLE
+# ------------------------------------------------------
+SQLITE_IN_CHUNK = 500  # stay well below SQLite's bound-variable limit
+
+
+async def init_anilist_profile_cache_table():
+    """Create the cache of raw AniList User payloads (statistics + favourites) used by affinity."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS anilist_profile_cache (
+                anilist_username TEXT PRIMARY KEY COLLATE NOCASE,
+                anilist_id INTEGER,
+                profile_json TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        # Usernames AniList had no User for, so lookups don't retry them on every command
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS anilist_profile_misses (
+                anilist_username TEXT PRIMARY KEY COLLATE NOCASE,
+                checked_at REAL NOT NULL
+            )
+        """)
+        await db.commit()
+        logger.info("AniList profile cache table ready.")
+
+
+async def get_cached_anilist_profiles(usernames: List[str]) -> Dict[str, Tuple[dict, float]]:
+    """Return {lowercase username: (profile dict, fetched_at)} for the cached usernames."""
+    names = list(dict.fromkeys(u for u in usernames if u))
+    cached = {}
+    if not names:
+        return cached
+
+    async with aiosqlite.connect(DB_PATH) as db:
+        for i in range(0, len(names), SQLITE_IN_CHUNK):
+            chunk = names[i:i + SQLITE_IN_CHUNK]
+            placeholders = ",".join("?" for _ in chunk)
+            cursor = await db.execute(
+                f"SELECT anilist_username, profile_json, fetched_at FROM anilist_profile_cache "
+                f"WHERE anilist_username IN ({placeholders})",
+                chunk
+            )
+            for username, profile_json, fetched_at in await cursor.fetchall():
+                try:
+                    cached[username.lower()] = (json.loads(profile_json), fetched_at)
+                except (TypeError, ValueError):
+                    logger.warning(f"Discarding unreadable cached profile for {username}")
+            await cursor.close()
+
+    logger.debug(f"Profile cache hit for {len(cached)}/{len(names)} usernames")
+    return cached
+
+
+async def save_anilist_profiles(profiles: Dict[str, dict]):
+    """Upsert fetched AniList profiles keyed by username."""
+    if not profiles:
+        return
+    now = time.time()
+    rows = [
+        (username, profile.get("id"), json.dumps(profile, separators=(",", ":")), now)
+        for username, profile in profiles.items()
+    ]
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.executemany("""
+            INSERT INTO anilist_profile_cache (anilist_username, anilist_id, profile_json, fetched_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(anilist_username) DO UPDATE SET
+                anilist_id=excluded.anilist_id,
+                profile_json=excluded.profile_json,
+                fetched_at=excluded.fetched_at
+        """, rows)
+        await db.executemany(
+            "DELETE FROM anilist_profile_misses WHERE anilist_username = ?",
+            [(username,) for username in profiles]
+        )
+        await db.commit()
+    logger.info(f"✅ Cached {len(rows)} AniList profiles")
+
+
+async def get_anilist_profile_misses(usernames: List[str], max_age: float) -> set:
+    """Return the lowercase usernames recorded as not found on AniList within the last max_age seconds."""
+    names = list(dict.fromkeys(u for u in usernames if u))
+    misses = set()
+    if not names:
+        return misses
+
+    cutoff = time.time() - max_age
+    async with aiosqlite.connect(DB_PATH) as db:
+        for i in range(0, len(names), SQLITE_IN_CHUNK):
+            chunk = names[i:i + SQLITE_IN_CHUNK]
+            placeholders = ",".join("?" for _ in chunk)
+            cursor = await db.execute(
+                f"SELECT anilist_username FROM anilist_profile_misses "
+                f"WHERE checked_at >= ? AND anilist_username IN ({placeholders})",
+                [cutoff, *chunk]
+            )
+            misses.update(username.lower() for username, in await cursor.fetchall())
+            await cursor.close()
+    return misses
+
+
+async def save_anilist_profile_misses(usernames: List[str]):
+    """Record usernames AniList returned no User for."""
+    if not usernames:
+        return
+    now = time.time()
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.executemany("""
+            INSERT INTO anilist_profile_misses (anilist_username, checked_at) VALUES (?, ?)
+            ON CONFLICT(anilist_username) DO UPDATE SET checked_at=excluded.checked_at
+        """, [(username, now) for username in usernames])
+        await db.commit()
+    logger.info(f"Recorded {len(usernames)} AniList usernames with no profile")
+
+
+# ------------------------------------------------------
+# AFFINITY MATRIX TABLES
+# ------------------------------------------------------
+async def init_affinity_matrix_tables():
+    """Create the stored pairwise affinity scores (user_a < user_b) and per-user sync state."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS affinity_matrix (
+                user_a TEXT NOT NULL,
+                user_b TEXT NOT NULL,
+                score REAL NOT NULL,
+                breakdown_json TEXT,
+                computed_at REAL NOT NULL,
+                PRIMARY KEY (user_a, user_b)
+            )
+        """)
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_affinity_matrix_b ON affinity_matrix (user_b)")
+        # Fingerprint of the profile each user's row set was last computed from
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS affinity_matrix_state (
+                anilist_username TEXT PRIMARY KEY,
+                profile_hash TEXT NOT NULL,
+                synced_at REAL NOT NULL
+            )
+        """)
+        await db.commit()
+        logger.info("Affinity matrix tables ready.")
+
+
+async def get_affinity_sync_state() -> Dict[str, str]:
+    """Return {anilist_username: profile_hash} for users already in the matrix."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute("SELECT anilist_username, profile_hash FROM affinity_matrix_state")
+        rows = await cursor.fetchall()
+        await cursor.close()
+    return {name: profile_hash for name, profile_hash in rows}
+
+
+async def save_affinity_pairs(rows: List[tuple], synced_hashes: Dict[str, str]):
+    """Upsert computed pairs and mark the given users as synced, in one transaction."""
+    now = time.time()
+    async with aiosqlite.connect(DB_PATH, timeout=DB_TIMEOUT) as db:
+        await db.executemany("""
+            INSERT INTO affinity_matrix (user_a, user_b, score, breakdown_json, computed_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(user_a, user_b) DO UPDATE SET
+                score=excluded.score,
+                breakdown_json=excluded.breakdown_json,
+                computed_at=excluded.computed_at
+        """, rows)
+        await db.executemany("""
+            INSERT INTO affinity_matrix_state (anilist_username, profile_hash, synced_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(anilist_username) DO UPDATE SET
+                profile_hash=excluded.profile_hash,
+                synced_at=excluded.synced_at
+        """, [(name, profile_hash, now) for name, profile_hash in synced_hashes.items()])
+        await db.commit()
+    logger.info(f"✅ Stored {len(rows)} affinity pairs for {len(synced_hashes)} changed users")
+
+
+async def remove_affinity_users(usernames: List[str]):
+    """Drop matrix rows and sync state for users who are no longer registered."""
+    if not usernames:
+        return
+    async with aiosqlite.connect(DB_PATH) as db:
+        for name in usernames:
+            await db.execute("DELETE FROM affinity_matrix WHERE user_a = ? OR user_b = ?", (name, name))
+            await db.execute("DELETE FROM affinity_matrix_state WHERE anilist_username = ?", (name,))
+        await db.commit()
+    logger.info(f"Removed {len(usernames)} users from the affinity matrix")
+
+
+async def get_top_affinity_matches(username: str, limit: int = None) -> List[Tuple[str, float, dict]]:
+    """Return [(other_username, score, breakdown)] for one user, best first, straight from the matrix."""
+    query = """
+        SELECT user_b AS other, score, breakdown_json FROM affinity_matrix WHERE user_a = ?
+        UNION ALL
+        SELECT user_a AS other, score, breakdown_json FROM affinity_matrix WHERE user_b = ?
+        ORDER BY score DESC
+    """
+    params = [username, username]
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute(query, params)
+        rows = await cursor.fetchall()
+        await cursor.close()
+
+    matches = []
+    for other, score, breakdown_json in rows:
+        try:
+            breakdown = json.loads(breakdown_json) if breakdown_json else {}
+        except (TypeError, ValueError):
+            breakdown = {}
+        matches.append((other, score, breakdown))
+    return matches
+
+
+# ------------------------------------------------------
+# ANILIST LIST ENTRIES + LIST-OVERLAP AFFINITY
+# ------------------------------------------------------
+async def init_list_affinity_tables():
+    """Create stored MediaListCollection entries and the list-overlap affinity matrix."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS anilist_list_entries (
+                anilist_username TEXT NOT NULL COLLATE NOCASE,
+                media_id INTEGER NOT NULL,
+                media_type TEXT NOT NULL,
+                status TEXT,
+                score REAL,
+                PRIMARY KEY (anilist_username, media_id)
+            )
+        """)
+        # entries_hash: fingerprint of the stored list; synced_hash: list the matrix rows were computed from
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS anilist_list_state (
+                anilist_username TEXT PRIMARY KEY COLLATE NOCASE,
+                entries_hash TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                synced_hash TEXT
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS list_affinity_matrix (
+                user_a TEXT NOT NULL,
+                user_b TEXT NOT NULL,
+                score REAL NOT NULL,
+                shared INTEGER NOT NULL,
+                co_rated INTEGER NOT NULL,
+                correlation REAL,
+                computed_at REAL NOT NULL,
+                PRIMARY KEY (user_a, user_b)
+            )
+        """)
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_list_affinity_matrix_b ON list_affinity_matrix (user_b)")
+        await db.commit()
+        logger.info("List affinity tables ready.")
+
+
+async def save_anilist_list_entries(username: str, entries: List[tuple], entries_hash: str):
+    """Replace one user's stored list with [(media_id, media_type, status, score)]."""
+    now = time.time()
+    async with aiosqlite.connect(DB_PATH, timeout=DB_TIMEOUT) as db:
+        await db.execute("DELETE FROM anilist_list_entries WHERE anilist_username = ?", (username,))
+        await db.executemany("""
+            INSERT OR REPLACE INTO anilist_list_entries (anilist_username, media_id, media_type, status, score)
+            VALUES (?, ?, ?, ?, ?)
+        """, [(username, media_id, media_type, status, score) for media_id, media_type, status, score in entries])
+        await db.execute("""
+            INSERT INTO anilist_list_state (anilist_username, entries_hash, fetched_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(anilist_username) DO UPDATE SET
+                entries_hash=excluded.entries_hash,
+                fetched_at=excluded.fetched_at
+        """, (username, entries_hash, now))
+        await db.commit()
+    logger.debug(f"Stored {len(entries)} list entries for {username}")
+
+
+async def get_anilist_list_state() -> Dict[str, Tuple[str, float, Optional[str]]]:
+    """Return {lowercase username: (entries_hash, fetched_at, synced_hash)}."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute(
+            "SELECT anilist_username, entries_hash, fetched_at, synced_hash FROM anilist_list_state"
+        )
+        rows = await cursor.fetchall()
+        await cursor.close()
+    return {name.lower(): (entries_hash, fetched_at, synced_hash) for name, entries_hash, fetched_at, synced_hash in rows}
+
+
+async def get_anilist_list_entries() -> Dict[str, List[Tuple[int, float]]]:
+    """Return {lowercase username: [(media_id, score)]} for every stored list (score 0 = unscored)."""
+    entries: Dict[str, List[Tuple[int, float]]] = {}
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute("SELECT anilist_username, media_id, score FROM anilist_list_entries")
+        async for username, media_id, score in cursor:
+            entries.setdefault(username.lower(), []).append((media_id, score or 0))
+        await cursor.close()
+    return entries
+
+
+async def save_list_affinity_pairs(rows: List[tuple], synced_hashes: Dict[str, str]):
+    """Replace the list-affinity rows of the changed users and mark them synced, in one transaction."""
+    async with aiosqlite.connect(DB_PATH, timeout=DB_TIMEOUT) as db:
+        # Pairs that no longer share any title are not in `rows`; clear them first
+        for name in synced_hashes:
+            await db.execute("DELETE FROM list_affinity_matrix WHERE user_a = ? OR user_b = ?", (name, name))
+        await db.executemany("""
+            INSERT INTO list_affinity_matrix (user_a, user_b, score, shared, co_rated, correlation, computed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(user_a, user_b) DO UPDATE SET
+                score=excluded.score,
+                shared=excluded.shared,
+                co_rated=excluded.co_rated,
+                correlation=excluded.correlation,
+                computed_at=excluded.computed_at
+        """, rows)
+        await db.executemany(
+            "UPDATE anilist_list_state SET synced_hash = ? WHERE anilist_username = ?",
+            [(entries_hash, name) for name, entries_hash in synced_hashes.items()]
+        )
+        await db.commit()
+    logger.info(f"✅ Stored {len(rows)} list affinity pairs for {len(synced_hashes)} changed users")
+
+
+async def remove_list_affinity_users(usernames: List[str]):
+    """Drop stored lists and list-affinity rows for users who are no longer registered."""
+    if not usernames:
+        return
+    async with aiosqlite.connect(DB_PATH) as db:
+        for name in usernames:
+            await db.execute("DELETE FROM list_affinity_matrix WHERE user_a = ? OR user_b = ?", (name, name))
+            await db.execute("DELETE FROM anilist_list_entries WHERE anilist_username = ?", (name,))
+            await db.execute("DELETE FROM anilist_list_state WHERE anilist_username = ?", (name,))
+        await db.commit()
+    logger.info(f"Removed {len(usernames)} users from the list affinity matrix")
+
+
+async def get_top_list_affinity_matches(username: str, limit: int = None) -> List[Tuple[str, float, dict]]:
+    """Return [(other_username, score, {shared, co_rated, correlation})] for one user, best first."""
+    query = """
+        SELECT user_b AS other, score, shared, co_rated, correlation FROM list_affinity_matrix WHERE user_a = ?
+        UNION ALL
+        SELECT user_a AS other, score, shared, co_rated, correlation FROM list_affinity_matrix WHERE user_b = ?
+        ORDER BY score DESC
+    """
+    params = [username, username]
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute(query, params)
+        rows = await cursor.fetchall()
+        await cursor.close()
+
+    return [
+        (other, score, {"shared": shared, "co_rated": co_rated, "correlation": correlation})
+        for other, score, shared, co_rated, correlation in rows
+    ]
+
+
+# ------------------------------------------------------
+# TIMESTAMP WEBHOOKS TABLE
+# ------------------------------------------------------
+async def init_timestamp_webhooks_table():
+    """Create the per-channel webhook store used by the timestamp auto-converter."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        # Older builds stored the webhook token as well; drop that table so no token stays on disk
+        cursor = await db.execute("PRAGMA table_info(timestamp_webhooks)")
+        columns = [row[1] for row in await cursor.fetchall()]
+        await cursor.close()
+        if "webhook_token" in columns:
+            await db.execute("DROP TABLE timestamp_webhooks")
+            logger.info("Dropped timestamp_webhooks table with stored webhook tokens")
+
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS timestamp_webhooks (
+                channel_id INTEGER PRIMARY KEY,
+                webhook_id INTEGER NOT NULL
+            )
+        """)
+        await db.commit()
+        logger.info("Timestamp webhooks table ready.")
+
+
+async def get_timestamp_webhooks() -> Dict[int, int]:
+    """Return {channel_id: webhook_id}. Tokens are never stored; they are fetched from Discord."""
+    rows = await execute_db_operation(
+        "get timestamp webhooks",
+        "SELECT channel_id, webhook_id FROM timestamp_webhooks",
+        fetch_type="all"
+    )
+    return {channel_id: webhook_id for channel_id, webhook_id in rows or []}
+
+
+async def save_timestamp_webhook(channel_id: int, webhook_id: int):
+    await execute_db_operation(
+        f"save timestamp webhook for channel {channel_id}",
+        """
+        INSERT INTO timestamp_webhooks (channel_id, webhook_id) VALUES (?, ?)
+        ON CONFLICT(channel_id) DO UPDATE SET webhook_id=excluded.webhook_id
+        """,
+        (channel_id, webhook_id),
+        metric="save timestamp webhook"
+    )
+
+
+async def delete_timestamp_webhook(channel_id: int):
+    await execute_db_operation(
+        f"delete timestamp webhook for channel {channel_id}",
+        "DELETE FROM timestamp_webhooks WHERE channel_id = ?",
+        (channel_id,),
+        metric="delete timestamp webhook"
+    )
+
+
+# ------------------------------------------------------
+# PAGINATOR STATE TABLE (AniList embed paginators)
+# ------------------------------------------------------
+PAGINATOR_STATE_TTL = 30 * 24 * 3600  # seconds since the last click before a paginator expires
+
+PAGINATOR_STATE_COLUMNS = (
+    "message_id", "channel_id", "guild_id", "state_type", "total_pages",
+    "current_page", "activity_id", "media_id", "media_type", "updated_at",
+)
+
+
+async def init_paginator_state_table():
+    """Create the per-message paginator state, looked up lazily when a paginator button is clicked."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS paginator_state (
+                message_id TEXT PRIMARY KEY,
+                channel_id TEXT,
+                guild_id TEXT,
+                state_type TEXT NOT NULL,
+                total_pages INTEGER NOT NULL DEFAULT 1,
+                current_page INTEGER NOT NULL DEFAULT 1,
+                activity_id INTEGER,
+                media_id INTEGER,
+                media_type TEXT,
+                updated_at REAL NOT NULL
+            )
+        """)
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_paginator_state_updated ON paginator_state (updated_at)")
+        await db.commit()
+        logger.info("Paginator state table ready.")
+
+
+async def set_paginator_state(message_id: str, channel_id: str, guild_id: str, state_type: str,
+                              total_pages: int, current_page: int, activity_id: int = None,
+                              media_id: int = None, media_type: str = None):
+    """Upsert one message's paginator state; every write also renews its TTL."""
+    await execute_db_operation(
+        f"set paginator state for message {message_id}",
+        """
+        INSERT INTO paginator_state (message_id, channel_id, guild_id, state_type, total_pages,
+                                     current_page, activity_id, media_id, media_type, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(message_id) DO UPDATE SET
+            total_pages=excluded.total_pages,
+            current_page=excluded.current_page,
+            updated_at=excluded.updated_at
+        """,
+        (str(message_id), str(channel_id), str(guild_id), state_type, total_pages,
+         current_page, activity_id, media_id, media_type, time.time()),
+        metric="set paginator state"
+    )
+
+
+async def get_paginator_state(message_id: str) -> Optional[Dict]:
+    """Return one message's paginator state, or None if it is unknown or expired."""
+    row = await execute_db_operation(
+        f"get paginator state for message {message_id}",
+        f"SELECT {', '.join(PAGINATOR_STATE_COLUMNS)} FROM paginator_state WHERE message_id = ? AND updated_at >= ?",
+        (str(message_id), time.time() - PAGINATOR_STATE_TTL),
+        fetch_type="one",
+        metric="get paginator state"
+    )
+    return dict(zip(PAGINATOR_STATE_COLUMNS, row)) if row else None
+
+
+async def delete_paginator_state(message_id: str):
+    await execute_db_operation(
+        f"delete paginator state for message {message_id}",
+        "DELETE FROM paginator_state WHERE message_id = ?",
+        (str(message_id),),
+        metric="delete paginator state"
+    )
+
+
+async def prune_paginator_states(max_age: float = PAGINATOR_STATE_TTL) -> int:
+    """Delete paginator state not touched for `max_age` seconds. Returns the number of rows removed."""
+    async with aiosqlite.connect(DB_PATH, timeout=DB_TIMEOUT) as db:
+        cursor = await db.execute("DELETE FROM paginator_state WHERE updated_at < ?", (time.time() - max_age,))
+        removed = cursor.rowcount
+        await cursor.close()
+        await db.commit()
+    if removed:
+        logger.info(f"🧹 Pruned {removed} expired paginator states")
+    return removed
 
 
 # ------------------------------------------------------
@@ -1229,7 +2205,15 @@ async def init_db():
         ("Global Challenges", init_global_challenges_table),
         ("Invite Tracker", init_invite_tracker_tables),
         ("Steam Users", init_steam_users_table),
+        ("Steam App Cache", init_steam_app_cache_table),
+        ("Steam Catalog", init_steam_catalog_table),
         ("Challenge Manga", init_challenge_manga_table),
+        ("Jobs", init_jobs_table),
+        ("AniList Profile Cache", init_anilist_profile_cache_table),
+        ("Affinity Matrix", init_affinity_matrix_tables),
+        ("List Affinity", init_list_affinity_tables),
+        ("Timestamp Webhooks", init_timestamp_webhooks_table),
+        ("Paginator State", init_paginator_state_table),
     ]
     
     start_time = time.time()
@@ -0,0 +1,595 @@
+# affinity_helper.py
+
+import hashlib
+import json
+import math
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from helpers.lazy_import import lazy_import
+
+# Optional NumPy for the vectorized one-vs-all / all-pairs kernel; imported the first time the kernel runs
+np = lazy_import("numpy")
+NUMPY_AVAILABLE = np.available
+
+# The vectorized kernel sums the same terms in a different order than the scalar path;
+# final scores agree to within this (i.e. at most one step of the 2-decimal rounding).
+VECTOR_TOLERANCE = 0.01
+VECTOR_MIN_USERS = 50  # below this the scalar path is just as fast
+
+# -----------------------------
+# Similarity primitives
+# -----------------------------
+def weighted_jaccard(set1, set2, rarity_weights=None):
+    """Advanced Jaccard similarity with rarity weighting."""
+    if not set1 or not set2:
+        return 0.0
+
+    intersection = set1 & set2
+    union = set1 | set2
+
+    if not intersection:
+        return 0.0
+
+    if rarity_weights:
+        # Weight by inverse rarity (rare items count more)
+        intersection_weight = sum(rarity_weights.get(item, 1.0) for item in intersection)
+        union_weight = sum(rarity_weights.get(item, 1.0) for item in union)
+        return intersection_weight / max(union_weight, 1)
+
+    return len(intersection) / len(union)
+
+
+def gaussian_similarity(a, b, sigma=1.0):
+    """Gaussian similarity function for numeric values."""
+    if a == 0 and b == 0:
+        return 1.0
+    diff = abs(a - b)
+    max_val = max(abs(a), abs(b), 1)
+    normalized_diff = diff / max_val
+    return math.exp(-(normalized_diff ** 2) / (2 * sigma ** 2))
+
+
+def log_similarity(a, b):
+    """Logarithmic similarity for highly variable numeric data."""
+    if a == 0 and b == 0:
+        return 1.0
+    log_a = math.log(max(a, 1))
+    log_b = math.log(max(b, 1))
+    return 1 / (1 + abs(log_a - log_b))
+
+
+def experience_weight(count):
+    """Weight based on user experience level."""
+    if count == 0:
+        return 0.1
+    elif count < 10:
+        return 0.3
+    elif count < 50:
+        return 0.6
+    elif count < 100:
+        return 0.8
+    elif count < 500:
+        return 1.0
+    else:
+        return 1.2  # Bonus for very experienced users
+
+
+def diversity_score(genres_list, formats_list):
+    """Calculate diversity bonus based on genre/format variety."""
+    total_items = len(genres_list) + len(formats_list)
+    if total_items == 0:
+        return 0.0
+    unique_genres = len(set(g.get("genre", "") for g in genres_list))
+    unique_formats = len(set(f.get("format", "") for f in formats_list))
+    return (unique_genres + unique_formats) / max(total_items, 1) * 0.5
+
+
+def score_tendency(score):
+    """Classify a mean score into a scoring tendency bucket."""
+    if score == 0:
+        return "unrated"
+    elif score < 4:
+        return "harsh"
+    elif score < 6:
+        return "critical"
+    elif score < 7.5:
+        return "moderate"
+    elif score < 8.5:
+        return "generous"
+    else:
+        return "very_generous"
+
+
+def scoring_pattern_similarity(score1, score2):
+    """Analyze scoring patterns and tendencies of two mean scores."""
+    # Award points for similar scoring patterns
+    if score_tendency(score1) == score_tendency(score2):
+        return 1.0
+    elif abs(score1 - score2) <= 0.5:
+        return 0.8
+    elif abs(score1 - score2) <= 1.0:
+        return 0.6
+    elif abs(score1 - score2) <= 1.5:
+        return 0.4
+    else:
+        return 0.2
+
+
+def weighted_genre_similarity(weights1, weights2):
+    """Weighted cosine similarity of two {name: count} dicts."""
+    if not weights1 or not weights2:
+        return 0.0
+
+    common_genres = set(weights1.keys()) & set(weights2.keys())
+    if not common_genres:
+        return 0.0
+
+    dot_product = sum(weights1[g] * weights2[g] for g in common_genres)
+    norm1 = math.sqrt(sum(w**2 for w in weights1.values()))
+    norm2 = math.sqrt(sum(w**2 for w in weights2.values()))
+
+    if norm1 == 0 or norm2 == 0:
+        return 0.0
+
+    return dot_product / (norm1 * norm2)
+
+
+def media_balance(anime_count, manga_count):
+    """Share of anime in a user's combined anime + manga count (0.5 when empty)."""
+    total = anime_count + manga_count
+    if total == 0:
+        return 0.5  # Neutral
+    return anime_count / total
+
+
+# -----------------------------
+# Per-profile features
+# -----------------------------
+def _weights(entries, key):
+    return {e[key]: e["count"] for e in entries if e.get(key) and e.get("count", 0) > 0}
+
+
+def extract_affinity_features(user: dict) -> dict:
+    """
+    Pre-digest one AniList profile (User statistics + favourites) into the values the
+    pairwise score needs, so scoring many pairs does not re-parse the same profile.
+    """
+    favourites = user.get("favourites") or {}
+    statistics = user.get("statistics") or {}
+    anime_stats = statistics.get("anime") or {}
+    manga_stats = statistics.get("manga") or {}
+
+    anime_count = anime_stats.get("count", 0)
+    manga_count = manga_stats.get("count", 0)
+    episodes = anime_stats.get("episodesWatched", 0)
+    chapters = manga_stats.get("chaptersRead", 0)
+    anime_genres = anime_stats.get("genres", [])
+    manga_genres = manga_stats.get("genres", [])
+
+    return {
+        "name": user.get("name"),
+        "fav_anime": {a["id"] for a in (favourites.get("anime") or {}).get("nodes", [])},
+        "fav_manga": {m["id"] for m in (favourites.get("manga") or {}).get("nodes", [])},
+        "fav_char": {c["id"] for c in (favourites.get("characters") or {}).get("nodes", [])},
+        "anime_count": anime_count,
+        "manga_count": manga_count,
+        "episodes": episodes,
+        "chapters": chapters,
+        "anime_mean": anime_stats.get("meanScore", 0),
+        "manga_mean": manga_stats.get("meanScore", 0),
+        "anime_exp": experience_weight(anime_count),
+        "manga_exp": experience_weight(manga_count),
+        "anime_genres": _weights(anime_genres, "genre"),
+        "manga_genres": _weights(manga_genres, "genre"),
+        "anime_formats": _weights(anime_stats.get("formats", []), "format"),
+        "manga_formats": _weights(manga_stats.get("formats", []), "format"),
+        "diversity": diversity_score(anime_genres + manga_genres, []),
+        # Normalize episodes/chapters to "series equivalent"
+        "total_activity": (anime_count + episodes / 12) + (manga_count + chapters / 50),
+        "balance": media_balance(anime_count, manga_count),
+    }
+
+
+# -----------------------------
+# Pairwise score
+# -----------------------------
+def score_affinity_features(f1: dict, f2: dict) -> Tuple[float, Dict[str, float]]:
+    """Return (final score 0-100 rounded to 2 places, component breakdown) for two feature dicts."""
+    # 1. FAVORITES AFFINITY (25% weight)
+    anime_fav_score = weighted_jaccard(f1["fav_anime"], f2["fav_anime"]) * 2.0
+    manga_fav_score = weighted_jaccard(f1["fav_manga"], f2["fav_manga"]) * 1.8
+    char_fav_score = weighted_jaccard(f1["fav_char"], f2["fav_char"]) * 1.5
+
+    # Bonus for having any shared favorites at all
+    shared_favorites_bonus = 0
+    if f1["fav_anime"] & f2["fav_anime"] or f1["fav_manga"] & f2["fav_manga"] or f1["fav_char"] & f2["fav_char"]:
+        shared_favorites_bonus = 0.3
+
+    favorites_score = (anime_fav_score + manga_fav_score + char_fav_score + shared_favorites_bonus) * 6.25
+
+    # 2. CONSUMPTION PATTERNS (20% weight)
+    avg_anime_weight = (f1["anime_exp"] + f2["anime_exp"]) / 2
+    avg_manga_weight = (f1["manga_exp"] + f2["manga_exp"]) / 2
+
+    anime_count_sim = gaussian_similarity(f1["anime_count"], f2["anime_count"], sigma=0.8) * avg_anime_weight
+    manga_count_sim = gaussian_similarity(f1["manga_count"], f2["manga_count"], sigma=0.8) * avg_manga_weight
+    episode_sim = log_similarity(f1["episodes"], f2["episodes"])
+    chapter_sim = log_similarity(f1["chapters"], f2["chapters"])
+
+    consumption_score = (anime_count_sim * 0.3 + manga_count_sim * 0.25 +
+                         episode_sim * 0.25 + chapter_sim * 0.2) * 20
+
+    # 3. SCORING COMPATIBILITY (15% weight)
+    anime_scoring_sim = scoring_pattern_similarity(f1["anime_mean"], f2["anime_mean"])
+    manga_scoring_sim = scoring_pattern_similarity(f1["manga_mean"], f2["manga_mean"])
+    anime_score_sim = gaussian_similarity(f1["anime_mean"], f2["anime_mean"], sigma=0.6)
+    manga_score_sim = gaussian_similarity(f1["manga_mean"], f2["manga_mean"], sigma=0.6)
+
+    scoring_score = (anime_scoring_sim * 0.4 + manga_scoring_sim * 0.35 +
+                     anime_score_sim * 0.15 + manga_score_sim * 0.1) * 15
+
+    # 4. GENRE AFFINITY WITH WEIGHTED PREFERENCES (15% weight)
+    anime_genre_sim = weighted_genre_similarity(f1["anime_genres"], f2["anime_genres"])
+    manga_genre_sim = weighted_genre_similarity(f1["manga_genres"], f2["manga_genres"])
+    diversity_bonus = gaussian_similarity(f1["diversity"], f2["diversity"], sigma=0.5) * 0.3
+
+    genre_score = (anime_genre_sim * 0.5 + manga_genre_sim * 0.4 + diversity_bonus * 0.1) * 15
+
+    # 5. FORMAT PREFERENCES (10% weight)
+    anime_format_sim = weighted_genre_similarity(f1["anime_formats"], f2["anime_formats"])
+    manga_format_sim = weighted_genre_similarity(f1["manga_formats"], f2["manga_formats"])
+
+    format_score = (anime_format_sim * 0.6 + manga_format_sim * 0.4) * 10
+
+    # 6. ACTIVITY LEVEL COMPATIBILITY (8% weight)
+    activity_sim = gaussian_similarity(f1["total_activity"], f2["total_activity"], sigma=1.0)
+    # Bonus for both being active users
+    if f1["total_activity"] > 10 and f2["total_activity"] > 10:
+        activity_sim *= 1.2
+    activity_score = activity_sim * 8
+
+    # 7. BALANCE FACTOR (7% weight) - Anime vs Manga preference balance
+    balance_score = gaussian_similarity(f1["balance"], f2["balance"], sigma=0.4) * 7
+
+    # ===== FINAL CALCULATION =====
+    raw_score = (favorites_score + consumption_score + scoring_score + genre_score +
+                 format_score + activity_score + balance_score)
+
+    # Experience multiplier (bonus for comparing experienced users): 0.9 to 1.1
+    min_experience = min(avg_anime_weight, avg_manga_weight)
+    experience_multiplier = 0.9 + (min_experience * 0.2)
+
+    final_score = min(raw_score * experience_multiplier, 100.0)
+
+    breakdown = {
+        'favorites': favorites_score,
+        'consumption': consumption_score,
+        'scoring': scoring_score,
+        'genres': genre_score,
+        'formats': format_score,
+        'activity': activity_score,
+        'balance': balance_score
+    }
+    return round(final_score, 2), breakdown
+
+
+def calculate_affinity(user1: dict, user2: dict) -> Tuple[float, Dict[str, float]]:
+    """Score two raw AniList profiles."""
+    return score_affinity_features(extract_affinity_features(user1), extract_affinity_features(user2))
+
+
+# -----------------------------
+# Stored matrix support
+# -----------------------------
+def profile_fingerprint(profile: dict) -> str:
+    """Hash of the parts of a profile that affect affinity (avatar/name changes are ignored)."""
+    relevant = {"statistics": profile.get("statistics"), "favourites": profile.get("favourites")}
+    return hashlib.sha1(json.dumps(relevant, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def compute_affinity_rows(profiles: Dict[str, dict], changed: Iterable[str]) -> List[tuple]:
+    """
+    Rows (user_a, user_b, score, breakdown_json, computed_at) for every pair that involves
+    a changed user, with user_a < user_b so each pair is stored once (the score is symmetric).
+    CPU-bound; callers run it in a thread. Uses the NumPy kernel when available.
+    """
+    features = {name: extract_affinity_features(p) for name, p in profiles.items()}
+    now = time.time()
+    rows = []
+    seen = set()
+
+    if NUMPY_AVAILABLE and len(features) >= VECTOR_MIN_USERS:
+        matrix = AffinityFeatureMatrix(features)
+        changed = [name for name in dict.fromkeys(changed) if name in matrix.index]
+        changed_set = set(changed)
+        if not changed:
+            return rows
+        scores, components = matrix.score_block([matrix.index[name] for name in changed])
+        for r, name in enumerate(changed):
+            for c, other in enumerate(matrix.names):
+                # Pairs of two changed users appear twice; keep the ordered one
+                if other == name or (other in changed_set and other < name):
+                    continue
+                pair = (name, other) if name < other else (other, name)
+                breakdown = {key: float(values[r, c]) for key, values in components.items()}
+                rows.append((pair[0], pair[1], round(float(scores[r, c]), 2),
+                             json.dumps(breakdown, separators=(",", ":")), now))
+        return rows
+
+    for name in changed:
+        if name not in features:
+            continue
+        for other in features:
+            if other == name:
+                continue
+            pair = (name, other) if name < other else (other, name)
+            if pair in seen:
+                continue
+            seen.add(pair)
+            score, breakdown = score_affinity_features(features[pair[0]], features[pair[1]])
+            rows.append((pair[0], pair[1], score, json.dumps(breakdown, separators=(",", ":")), now))
+
+    return rows
+
+
+# -----------------------------
+# Vectorized kernel (NumPy)
+# -----------------------------
+SCALAR_FIELDS = (
+    "anime_count", "manga_count", "episodes", "chapters", "anime_mean", "manga_mean",
+    "anime_exp", "manga_exp", "diversity", "total_activity", "balance",
+)
+FAVOURITE_FIELDS = ("fav_anime", "fav_manga", "fav_char")
+WEIGHT_FIELDS = ("anime_genres", "manga_genres", "anime_formats", "manga_formats")
+
+
+def _gaussian(a, b, sigma):
+    max_val = np.maximum(np.maximum(np.abs(a), np.abs(b)), 1)
+    return np.exp(-((np.abs(a - b) / max_val) ** 2) / (2 * sigma ** 2))
+
+
+def _log_similarity(a, b):
+    return 1 / (1 + np.abs(np.log(np.maximum(a, 1)) - np.log(np.maximum(b, 1))))
+
+
+def _tendency(scores):
+    # Same buckets as score_tendency(): unrated / harsh / critical / moderate / generous / very_generous
+    return np.where(scores == 0, -1, np.digitize(scores, [4, 6, 7.5, 8.5]))
+
+
+def _scoring_pattern(a, b, ta, tb):
+    diff = np.abs(a - b)
+    return np.select([ta == tb, diff <= 0.5, diff <= 1.0, diff <= 1.5], [1.0, 0.8, 0.6, 0.4], 0.2)
+
+
+class AffinityFeatureMatrix:
+    """
+    Fixed-width encoding of many users' affinity features, so one-vs-all and all-pairs
+    scores are a handful of matrix operations instead of a Python loop per pair.
+    Implements the same weighting as score_affinity_features() (see VECTOR_TOLERANCE).
+    """
+
+    def __init__(self, features: Dict[str, dict]):
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("NumPy is required for the vectorized affinity kernel")
+
+        self.names = list(features)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        rows = [features[name] for name in self.names]
+        n = len(rows)
+
+        self.scalars = {field: np.array([f[field] or 0 for f in rows], dtype=np.float64) for field in SCALAR_FIELDS}
+        self.anime_tendency = _tendency(self.scalars["anime_mean"])
+        self.manga_tendency = _tendency(self.scalars["manga_mean"])
+
+        # Favourites: binary membership over items held by at least two users
+        # (an item only one user has can never be in an intersection)
+        self.favourites = {}
+        for field in FAVOURITE_FIELDS:
+            sets = [f[field] for f in rows]
+            counts = Counter(item for items in sets for item in items)
+            vocab = {item: j for j, item in enumerate(item for item, count in counts.items() if count > 1)}
+            membership = np.zeros((n, len(vocab)), dtype=np.float64)
+            for i, items in enumerate(sets):
+                for item in items:
+                    j = vocab.get(item)
+                    if j is not None:
+                        membership[i, j] = 1.0
+            sizes = np.array([len(items) for items in sets], dtype=np.float64)
+            self.favourites[field] = (membership, sizes)
+
+        # Genre/format counts: L2-normalised rows, so a dot product is the weighted cosine
+        self.weights = {}
+        for field in WEIGHT_FIELDS:
+            vocab = {key: j for j, key in enumerate(sorted({k for f in rows for k in f[field]}))}
+            dense = np.zeros((n, len(vocab)), dtype=np.float64)
+            for i, f in enumerate(rows):
+                for key, count in f[field].items():
+                    dense[i, vocab[key]] = count
+            norms = np.linalg.norm(dense, axis=1, keepdims=True)
+            self.weights[field] = np.divide(dense, norms, out=np.zeros_like(dense), where=norms > 0)
+
+    def score_block(self, rows: Optional[List[int]] = None, cols: Optional[List[int]] = None):
+        """
+        Scores for users `rows` (default all) against users `cols` (default all).
+        Returns (unrounded final scores, {component: matrix}) with shape (len(rows), len(cols)).
+        """
+        rows = np.arange(len(self.names)) if rows is None else np.asarray(rows)
+        cols = np.arange(len(self.names)) if cols is None else np.asarray(cols)
+
+        def pair(field):
+            values = self.scalars[field]
+            return values[rows][:, None], values[cols][None, :]
+
+        # 1. Favourites
+        fav_terms = {}
+        any_shared = np.zeros((len(rows), len(cols)), dtype=bool)
+        for field in FAVOURITE_FIELDS:
+            membership, sizes = self.favourites[field]
+            inter = membership[rows] @ membership[cols].T
+            union = sizes[rows][:, None] + sizes[cols][None, :] - inter
+            fav_terms[field] = np.divide(inter, union, out=np.zeros_like(inter), where=inter > 0)
+            any_shared |= inter > 0
+        favorites = (fav_terms["fav_anime"] * 2.0 + fav_terms["fav_manga"] * 1.8 +
+                     fav_terms["fav_char"] * 1.5 + np.where(any_shared, 0.3, 0.0)) * 6.25
+
+        # 2. Consumption
+        ea, eb = pair("anime_exp")
+        ma, mb = pair("manga_exp")
+        avg_anime_weight = (ea + eb) / 2
+        avg_manga_weight = (ma + mb) / 2
+        consumption = (_gaussian(*pair("anime_count"), 0.8) * avg_anime_weight * 0.3 +
+                       _gaussian(*pair("manga_count"), 0.8) * avg_manga_weight * 0.25 +
+                       _log_similarity(*pair("episodes")) * 0.25 +
+                       _log_similarity(*pair("chapters")) * 0.2) * 20
+
+        # 3. Scoring
+        aa, ab = pair("anime_mean")
+        na, nb = pair("manga_mean")
+        scoring = (_scoring_pattern(aa, ab, self.anime_tendency[rows][:, None], self.anime_tendency[cols][None, :]) * 0.4 +
+                   _scoring_pattern(na, nb, self.manga_tendency[rows][:, None], self.manga_tendency[cols][None, :]) * 0.35 +
+                   _gaussian(aa, ab, 0.6) * 0.15 +
+                   _gaussian(na, nb, 0.6) * 0.1) * 15
+
+        def cosine(field):
+            w = self.weights[field]
+            return w[rows] @ w[cols].T
+
+        # 4. Genres
+        diversity_bonus = _gaussian(*pair("diversity"), 0.5) * 0.3
+        genres = (cosine("anime_genres") * 0.5 + cosine("manga_genres") * 0.4 + diversity_bonus * 0.1) * 15
+
+        # 5. Formats
+        formats = (cosine("anime_formats") * 0.6 + cosine("manga_formats") * 0.4) * 10
+
+        # 6. Activity
+        ta, tb = pair("total_activity")
+        activity_sim = _gaussian(ta, tb, 1.0)
+        activity = np.where((ta > 10) & (tb > 10), activity_sim * 1.2, activity_sim) * 8
+
+        # 7. Balance
+        balance = _gaussian(*pair("balance"), 0.4) * 7
+
+        raw = favorites + consumption + scoring + genres + formats + activity + balance
+        multiplier = 0.9 + np.minimum(avg_anime_weight, avg_manga_weight) * 0.2
+        final = np.minimum(raw * multiplier, 100.0)
+
+        components = {
+            'favorites': favorites,
+            'consumption': consumption,
+            'scoring': scoring,
+            'genres': genres,
+            'formats': formats,
+            'activity': activity,
+            'balance': balance,
+        }
+        return final, components
+
+    def one_vs_all(self, name: str) -> List[Tuple[str, float]]:
+        """[(other, score)] for one user against everyone else, best first."""
+        i = self.index[name]
+        scores, _ = self.score_block([i])
+        ranked = [(other, round(float(scores[0, j]), 2)) for j, other in enumerate(self.names) if j != i]
+        ranked.sort(key=lambda x: x[1], reverse=True)
+        return ranked
+
+    def best_matches(self) -> Dict[str, Tuple[str, float]]:
+        """{user: (best other user, score)} for the whole server from one all-pairs block."""
+        if len(self.names) < 2:
+            return {}
+        scores, _ = self.score_block()
+        np.fill_diagonal(scores, -np.inf)
+        best = scores.argmax(axis=1)
+        return {name: (self.names[j], round(float(scores[i, j]), 2)) for i, (name, j) in enumerate(zip(self.names, best))}
+
+
+# -----------------------------
+# List-overlap affinity (shared titles + score correlation)
+# -----------------------------
+LIST_CONFIDENCE_SHRINK = 10  # co-rated titles at which the correlation counts for half its value
+
+
+def list_fingerprint(entries: Iterable[Tuple[int, float]]) -> str:
+    """Hash of a user's (media_id, score) list, used to detect which lists changed."""
+    return hashlib.sha1(json.dumps(sorted(entries), separators=(",", ":")).encode()).hexdigest()
+
+
+def list_overlap_score(shared: int, size_a: int, size_b: int, co_rated: int, correlation: float) -> float:
+    """
+    0-100 score from list overlap and mean-centered score correlation.
+    Correlation is shrunk towards 0 while few titles are co-rated, so two users agreeing
+    on 2 titles do not outrank two users agreeing on 200.
+    """
+    overlap = shared / max(size_a + size_b - shared, 1)
+    confidence = co_rated / (co_rated + LIST_CONFIDENCE_SHRINK)
+    taste = (1 + correlation * confidence) / 2
+    return round(min((taste * 0.7 + math.sqrt(overlap) * 0.3) * 100, 100.0), 2)
+
+
+class ListOverlapIndex:
+    """
+    Sparse user x media score matrix stored column-wise (media_id -> [(user, centered score)]).
+    Scores are centered on each user's own mean so harsh and generous raters are comparable;
+    unscored entries still count as shared titles but not towards the correlation.
+    """
+
+    def __init__(self, entries: Dict[str, List[Tuple[int, float]]]):
+        self.sizes = {}
+        self.rows: Dict[str, Dict[int, Optional[float]]] = {}
+        self.columns: Dict[int, List[Tuple[str, Optional[float]]]] = {}
+
+        for name, items in entries.items():
+            scored = [score for _, score in items if score]
+            mean = sum(scored) / len(scored) if scored else 0.0
+            row = {media_id: (score - mean if score else None) for media_id, score in items}
+            self.rows[name] = row
+            self.sizes[name] = len(row)
+            for media_id, centered in row.items():
+                self.columns.setdefault(media_id, []).append((name, centered))
+
+    def pair_stats(self, name: str) -> Dict[str, Tuple[int, int, float]]:
+        """{other: (shared, co_rated, correlation)} for every user sharing at least one title with `name`."""
+        acc: Dict[str, list] = {}
+        for media_id, x in self.rows.get(name, {}).items():
+            for other, y in self.columns[media_id]:
+                if other == name:
+                    continue
+                stats = acc.get(other)
+                if stats is None:
+                    stats = acc[other] = [0, 0, 0.0, 0.0, 0.0]
+                stats[0] += 1
+                if x is not None and y is not None:
+                    stats[1] += 1
+                    stats[2] += x * y
+                    stats[3] += x * x
+                    stats[4] += y * y
+
+        result = {}
+        for other, (shared, co_rated, sxy, sxx, syy) in acc.items():
+            denominator = math.sqrt(sxx * syy)
+            result[other] = (shared, co_rated, sxy / denominator if denominator else 0.0)
+        return result
+
+
+def compute_list_affinity_rows(entries: Dict[str, List[Tuple[int, float]]], changed: Iterable[str]) -> List[tuple]:
+    """
+    Rows (user_a, user_b, score, shared, co_rated, correlation, computed_at) for every pair
+    involving a changed user that shares at least one title, with user_a < user_b.
+    CPU-bound; callers run it in a thread.
+    """
+    index = ListOverlapIndex(entries)
+    changed = [name for name in dict.fromkeys(changed) if name in index.rows]
+    changed_set = set(changed)
+    now = time.time()
+    rows = []
+
+    for name in changed:
+        for other, (shared, co_rated, correlation) in index.pair_stats(name).items():
+            if other in changed_set and other < name:
+                continue
+            a, b = (name, other) if name < other else (other, name)
+            score = list_overlap_score(shared, index.sizes[a], index.sizes[b], co_rated, correlation)
+            rows.append((a, b, score, shared, co_rated, round(correlation, 4), now))
+    return rows
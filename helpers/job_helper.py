@@ -0,0 +1,286 @@
+# job_helper.py
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+import discord
+
+from database import create_job, update_job, get_job, get_unfinished_jobs
+from helpers.logging_helper import queued_file_handler
+
+# -----------------------------
+# Logging setup
+# -----------------------------
+LOG_DIR = "logs"
+os.makedirs(LOG_DIR, exist_ok=True)
+LOG_FILE = os.path.join(LOG_DIR, "jobs.log")
+
+logger = logging.getLogger("Jobs")
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    file_handler = queued_file_handler(LOG_FILE)
+    file_handler.setFormatter(logging.Formatter("[%(asctime)s] [%(levelname)s] %(message)s"))
+    logger.addHandler(file_handler)
+
+# -----------------------------
+# Configuration
+# -----------------------------
+JOB_WORKERS = 2                  # jobs allowed to run at the same time
+PROGRESS_FLUSH_INTERVAL = 2.0    # seconds between persisted progress writes
+INTERACTION_EDIT_INTERVAL = 1.0  # seconds between edits of the invoking interaction
+MAX_RESULT_LENGTH = 1800         # keeps the final status inside one Discord message
+
+STATUS_EMOJI = {
+    "queued": "🕒",
+    "running": "🔄",
+    "completed": "✅",
+    "failed": "❌",
+    "cancelled": "🛑",
+}
+
+JobHandler = Callable[["JobContext"], Awaitable[Optional[str]]]
+
+
+class JobCancelled(Exception):
+    """Raised inside a job handler once cancellation has been requested."""
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+# -----------------------------
+# Job context (passed to handlers)
+# -----------------------------
+class JobContext:
+    """
+    Handle given to a job handler.
+    Handlers report progress through `progress()`, which also raises JobCancelled
+    when the job has been cancelled, so long loops get cancellation for free.
+    """
+
+    def __init__(self, job_id: int, kind: str, params: dict, created_by: Optional[int] = None,
+                 interaction: Optional[discord.Interaction] = None, resumed: bool = False):
+        self.job_id = job_id
+        self.kind = kind
+        self.params = params or {}
+        self.created_by = created_by
+        self.interaction = interaction
+        self.resumed = resumed
+
+        self.current = 0
+        self.total = 0
+        self.message = None
+
+        self._cancel_event = asyncio.Event()
+        self._last_flush = 0.0
+        self._last_edit = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def request_cancel(self):
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    async def progress(self, current: int = None, total: int = None, message: str = None, force: bool = False):
+        """Record progress; persisted and shown to the invoker at a throttled rate."""
+        self.check_cancelled()
+
+        if current is not None:
+            self.current = current
+        if total is not None:
+            self.total = total
+        if message is not None:
+            self.message = message
+
+        now = time.monotonic()
+        if force or now - self._last_flush >= PROGRESS_FLUSH_INTERVAL:
+            self._last_flush = now
+            await self.flush()
+        if message is not None and (force or now - self._last_edit >= INTERACTION_EDIT_INTERVAL):
+            self._last_edit = now
+            await self.notify(message)
+
+    async def flush(self):
+        try:
+            await update_job(
+                self.job_id,
+                progress_current=self.current,
+                progress_total=self.total,
+                progress_message=self.message
+            )
+        except Exception as e:
+            logger.warning(f"Could not persist progress for job #{self.job_id}: {e}")
+
+    async def notify(self, text: str):
+        """Edit the invoking interaction's response, if there still is one."""
+        if not self.interaction:
+            return
+        try:
+            await self.interaction.edit_original_response(content=text[:2000])
+        except Exception:
+            # Interaction tokens expire after 15 minutes; progress stays visible through /jobs
+            self.interaction = None
+
+
+# -----------------------------
+# Job manager
+# -----------------------------
+class JobManager:
+    """Runs registered job kinds in the background with bounded concurrency."""
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self._semaphore = asyncio.Semaphore(workers)
+        self._handlers: Dict[str, JobHandler] = {}
+        self._active: Dict[int, JobContext] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._resumed = False
+
+    def register(self, kind: str, handler: JobHandler):
+        """Register (or replace, on cog reload) the handler for a job kind."""
+        self._handlers[kind] = handler
+        logger.info(f"Registered job handler: {kind}")
+
+    def active_job(self, kind: str) -> Optional[int]:
+        """Return the id of a queued/running job of this kind in this process, if any."""
+        for job_id, ctx in self._active.items():
+            if ctx.kind == kind:
+                return job_id
+        return None
+
+    def get_context(self, job_id: int) -> Optional[JobContext]:
+        return self._active.get(job_id)
+
+    @property
+    def active_count(self) -> int:
+        return len(self._active)
+
+    async def submit(self, kind: str, params: dict = None, created_by: int = None,
+                     interaction: discord.Interaction = None, dedupe: bool = False,
+                     description: str = None) -> int:
+        """
+        Persist a new job and schedule it. With dedupe, reuse an active job of the same kind.
+        If an interaction is given (already responded/deferred), it is edited with progress and the result.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"No job handler registered for '{kind}'")
+
+        if dedupe:
+            existing = self.active_job(kind)
+            if existing is not None:
+                logger.info(f"Job of kind {kind} already active as #{existing}, not submitting another")
+                return existing
+
+        job_id = await create_job(kind, json.dumps(params or {}), created_by)
+        logger.info(f"Submitted job #{job_id} ({kind}) by {created_by}")
+        ctx = JobContext(job_id, kind, params or {}, created_by, interaction)
+        await ctx.notify(f"🕒 {description or kind} queued as job #{job_id}. Use `/jobs` to check on it or cancel it.")
+        self._start(ctx)
+        return job_id
+
+    async def resume_all(self) -> int:
+        """Reschedule jobs left queued/running by a previous process. Runs once per process."""
+        if self._resumed:
+            return 0
+        self._resumed = True
+
+        resumed = 0
+        for row in await get_unfinished_jobs():
+            job_id = row["job_id"]
+            if job_id in self._active:
+                continue
+            if row["kind"] not in self._handlers:
+                logger.warning(f"Job #{job_id} has unknown kind '{row['kind']}', marking failed")
+                await update_job(job_id, status="failed", error="No handler registered after restart",
+                                 finished_at=_now())
+                continue
+            if row.get("cancel_requested"):
+                await update_job(job_id, status="cancelled", finished_at=_now())
+                continue
+            try:
+                params = json.loads(row["params"]) if row["params"] else {}
+            except (TypeError, ValueError):
+                params = {}
+            self._start(JobContext(job_id, row["kind"], params, row["created_by"], resumed=True))
+            resumed += 1
+
+        if resumed:
+            logger.info(f"🔄 Resumed {resumed} unfinished job(s)")
+        return resumed
+
+    async def cancel(self, job_id: int) -> bool:
+        """Request cancellation. Returns False if the job does not exist or already finished."""
+        ctx = self._active.get(job_id)
+        if ctx:
+            ctx.request_cancel()
+            await update_job(job_id, cancel_requested=1)
+            logger.info(f"Cancellation requested for job #{job_id}")
+            return True
+
+        row = await get_job(job_id)
+        if not row or row["status"] not in ("queued", "running"):
+            return False
+        # Known to the DB but not scheduled here (e.g. handler missing) - finish it directly
+        await update_job(job_id, status="cancelled", cancel_requested=1, finished_at=_now())
+        return True
+
+    def _start(self, ctx: JobContext):
+        task = asyncio.create_task(self._run(ctx), name=f"job-{ctx.job_id}-{ctx.kind}")
+        self._active[ctx.job_id] = ctx
+        self._tasks[ctx.job_id] = task
+
+        def _done(_):
+            self._active.pop(ctx.job_id, None)
+            self._tasks.pop(ctx.job_id, None)
+
+        task.add_done_callback(_done)
+
+    async def _run(self, ctx: JobContext):
+        async with self._semaphore:
+            if ctx.cancelled:
+                await update_job(ctx.job_id, status="cancelled", finished_at=_now())
+                await ctx.notify(f"🛑 Job #{ctx.job_id} cancelled before it started.")
+                return
+
+            handler = self._handlers.get(ctx.kind)
+            await update_job(ctx.job_id, status="running", started_at=_now())
+            logger.info(f"▶️ Job #{ctx.job_id} ({ctx.kind}) started{' (resumed)' if ctx.resumed else ''}")
+            start = time.monotonic()
+
+            try:
+                result = await handler(ctx)
+            except JobCancelled:
+                await ctx.flush()
+                await update_job(ctx.job_id, status="cancelled", finished_at=_now())
+                logger.info(f"🛑 Job #{ctx.job_id} ({ctx.kind}) cancelled")
+                await ctx.notify(f"🛑 Job #{ctx.job_id} cancelled.")
+            except asyncio.CancelledError:
+                # Bot shutting down: leave the row as 'running' so it is resumed on the next start
+                logger.info(f"Job #{ctx.job_id} ({ctx.kind}) interrupted by shutdown")
+                raise
+            except Exception as e:
+                await ctx.flush()
+                await update_job(ctx.job_id, status="failed", error=str(e)[:MAX_RESULT_LENGTH], finished_at=_now())
+                logger.error(f"❌ Job #{ctx.job_id} ({ctx.kind}) failed: {e}", exc_info=True)
+                await ctx.notify(f"❌ Job #{ctx.job_id} failed: {e}")
+            else:
+                result_text = str(result)[:MAX_RESULT_LENGTH] if result else None
+                await ctx.flush()
+                await update_job(ctx.job_id, status="completed", result=result_text, finished_at=_now())
+                logger.info(f"✅ Job #{ctx.job_id} ({ctx.kind}) completed in {time.monotonic() - start:.2f}s")
+                await ctx.notify(result_text or f"✅ Job #{ctx.job_id} completed.")
+
+
+# Shared instance; lives in a helper module so it survives cog reloads
+job_manager = JobManager()
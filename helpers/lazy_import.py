@@ -0,0 +1,68 @@
+# lazy_import.py
+
+import importlib
+import importlib.util
+import logging
+import threading
+import time
+from typing import Dict
+
+logger = logging.getLogger("LazyImport")
+
+
+class LazyModule:
+    """
+    Stand-in for a heavy optional module (PIL, bs4, numpy, ...) that is imported on first
+    attribute access instead of when the cog module is executed.
+
+    `available` only asks the import system whether the package exists, so feature checks
+    (PIL_AVAILABLE and friends) stay cheap. Safe to use from worker threads.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._available = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    self._module = importlib.import_module(self._name)
+                    logger.debug(f"Lazily imported {self._name} in {(time.perf_counter() - start) * 1000:.1f}ms")
+        return self._module
+
+    def __getattr__(self, attr: str):
+        # Only called for names not found on the proxy itself, i.e. the module's attributes
+        return getattr(self._load(), attr)
+
+    @property
+    def available(self) -> bool:
+        if self._available is None:
+            try:
+                self._available = importlib.util.find_spec(self._name.split(".")[0]) is not None
+            except (ImportError, ValueError):
+                self._available = False
+        return self._available
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+# One proxy per module name, so every cog shares the same import
+_lazy_modules: Dict[str, LazyModule] = {}
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Return a proxy for `name` that imports it the first time one of its attributes is used."""
+    module = _lazy_modules.get(name)
+    if module is None:
+        module = _lazy_modules.setdefault(name, LazyModule(name))
+    return module
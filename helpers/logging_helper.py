@@ -0,0 +1,127 @@
+# logging_helper.py
+
+import atexit
+import copy
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from typing import Dict
+
+# -----------------------------
+# Configuration
+# -----------------------------
+LOG_MAX_BYTES = 10 * 1024 * 1024  # rotate each log file at 10MB
+LOG_BACKUP_COUNT = 3  # keep name.log.1 .. name.log.3
+
+# Records are written by the target handlers only; formatting already happened in QueuedHandler
+_PASSTHROUGH = logging.Formatter("%(message)s")
+_ROLLOVER = object()  # queue marker: rotate a file in order with the records around it
+
+_log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+_listener = None
+_listener_lock = threading.Lock()
+_file_targets: Dict[str, logging.Handler] = {}
+
+
+class _RoutingListener(logging.handlers.QueueListener):
+    """Background writer: every queued item carries the handler that should format and write it."""
+
+    def __init__(self):
+        super().__init__(_log_queue)
+
+    def handle(self, item):
+        source, record = item
+        if source is _ROLLOVER:
+            target = _file_targets.get(record)
+            if target is not None:
+                target.doRollover()
+            return
+        try:
+            text = source.format(record)
+        except Exception:
+            source.handleError(record)
+            return
+        record.msg, record.args = text, None
+        record.exc_info, record.exc_text, record.stack_info = None, None, None
+        source.target.handle(record)
+
+
+class QueuedHandler(logging.handlers.QueueHandler):
+    """
+    Drop-in replacement for a FileHandler/StreamHandler that never touches the disk on the
+    calling thread (the event loop). Records are enqueued and formatted + written by one
+    shared background thread; level and formatter are set on this handler as usual.
+    """
+
+    def __init__(self, target: logging.Handler):
+        super().__init__(_log_queue)
+        self.target = target
+        self.baseFilename = getattr(target, "baseFilename", None)
+        _ensure_listener()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only merge the args here, so later mutation of the arguments can't change the message;
+        # timestamps, formatting and tracebacks are rendered on the writer thread.
+        # Copied because the same record also goes to other handlers (e.g. the root logger's)
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        self.queue.put_nowait((self, record))
+
+
+def _ensure_listener():
+    global _listener
+    if _listener is None:
+        with _listener_lock:
+            if _listener is None:
+                _listener = _RoutingListener()
+                _listener.start()
+                atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flush everything still queued and stop the writer thread (runs at interpreter exit)."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+    for target in _file_targets.values():
+        target.flush()
+
+
+def roll_over_file(path: str):
+    """Start a fresh log file (the current one becomes .1) once everything logged so far is written."""
+    _log_queue.put_nowait((_ROLLOVER, os.path.abspath(path)))
+
+
+def queued_handler(target: logging.Handler) -> QueuedHandler:
+    """Route an existing handler (e.g. a StreamHandler) through the background writer."""
+    target.setFormatter(_PASSTHROUGH)
+    return QueuedHandler(target)
+
+
+def queued_file_handler(path: str, mode: str = "a", max_bytes: int = LOG_MAX_BYTES,
+                        backup_count: int = LOG_BACKUP_COUNT) -> QueuedHandler:
+    """
+    Rotating, queued file handler. Files shared by several loggers (or created again on cog
+    reload) reuse one RotatingFileHandler. mode="w" (a fresh log per run) rotates the previous
+    run's log to name.log.1 instead of truncating it, so call sites can keep passing mode="w".
+    """
+    key = os.path.abspath(path)
+    target = _file_targets.get(key)
+    if target is None:
+        os.makedirs(os.path.dirname(key), exist_ok=True)
+        target = logging.handlers.RotatingFileHandler(
+            key, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True
+        )
+        target.setFormatter(_PASSTHROUGH)
+        if mode == "w" and os.path.exists(key) and os.path.getsize(key) > 0:
+            target.doRollover()
+        _file_targets[key] = target
+    return QueuedHandler(target)
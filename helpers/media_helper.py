@@ -6,6 +6,8 @@ import re
 import logging
 from typing import Optional, List, Tuple, Dict
 
+from helpers.metrics import http_trace_configs
+
 # -----------------------------
 # Logging setup
 # -----------------------------
@@ -205,7 +207,7 @@ async def fetch_anilist_entries(username: str, media_type: str) -> List[Dict]:
         A list of dicts containing mediaId, status, score, progress, chapters.
     """
     query = USER_MANGA_QUERY if media_type.upper() == "MANGA" else USER_ANIME_QUERY
-    async with aiohttp.ClientSession() as session:
+    async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
         try:
             async with session.post(ANILIST_API_URL, json={"query": query, "variables": {"username": username}}) as resp:
                 if resp.status != 200:
@@ -342,7 +344,7 @@ async def fetch_user_stats(username: str) -> dict:
     """
     variables = {"username": username}
 
-    async with aiohttp.ClientSession() as session:
+    async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
         try:
             async with session.post(ANILIST_API_URL, json={"query": query, "variables": variables}) as resp:
                 if resp.status != 200:
@@ -412,7 +414,7 @@ async def fetch_random_media(media_type: str = "ANIME") -> Optional[discord.Embe
     """
     Fetch a completely random Anime, Manga, or Light Novel (LN) from AniList.
     """
-    async with aiohttp.ClientSession() as session:
+    async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
         for _ in range(15):
             random_id = random.randint(1, 180000)
 
@@ -534,7 +536,7 @@ async def fetch_watchlist(username: str) -> Optional[dict]:
             logger.info(f"Using cached watchlist for {username}")
             return cached_data
 
-    async with aiohttp.ClientSession() as session:
+    async with aiohttp.ClientSession(trace_configs=http_trace_configs()) as session:
         try:
             async with session.post(
                 ANILIST_API_URL,
@@ -0,0 +1,187 @@
+# message_dispatch.py
+
+import asyncio
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import discord
+
+from helpers.metrics import MetricFamily, metrics
+from helpers.logging_helper import queued_file_handler
+
+# -----------------------------
+# Logging setup
+# -----------------------------
+LOG_DIR = "logs"
+os.makedirs(LOG_DIR, exist_ok=True)
+LOG_FILE = os.path.join(LOG_DIR, "message_dispatch.log")
+
+logger = logging.getLogger("MessageDispatch")
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    file_handler = queued_file_handler(LOG_FILE)
+    file_handler.setFormatter(logging.Formatter("[%(asctime)s] [%(levelname)s] %(message)s"))
+    logger.addHandler(file_handler)
+
+# -----------------------------
+# Configuration
+# -----------------------------
+SLOW_HANDLER_SECONDS = 2.0  # handlers slower than this are logged as warnings
+
+MessageHandler = Callable[[discord.Message], Awaitable[None]]
+
+
+@dataclass
+class HandlerStats:
+    calls: int = 0
+    errors: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_time / self.calls * 1000 if self.calls else 0.0
+
+
+@dataclass
+class _Route:
+    name: str
+    handler: MessageHandler
+    pattern: Optional[str] = None
+    check: Optional[Callable[[discord.Message], bool]] = None
+    stats: HandlerStats = field(default_factory=HandlerStats)
+
+
+class MessageDispatcher:
+    """
+    Single on_message entry point for cogs that react to chat content.
+
+    Each handler registers a short regex fragment (its prefilter) and/or a cheap check.
+    All fragments are compiled into one alternation, so a message is scanned once and
+    only the handlers whose fragment appeared in it are awaited. A handler with both
+    must pass its check as well; one with neither sees every non-bot message.
+    """
+
+    def __init__(self):
+        self._routes: Dict[str, _Route] = {}
+        self._prefilter: Optional[re.Pattern] = None
+        self._group_routes: Dict[str, List[str]] = {}
+        self._pattern_routes = 0
+        self.messages_seen = 0
+        self.messages_routed = 0
+        self.prefilter_time = 0.0
+
+    def register(self, name: str, handler: MessageHandler, pattern: str = None,
+                 check: Callable[[discord.Message], bool] = None):
+        """Register (or replace, on cog reload) a handler. `pattern` is matched case-insensitively."""
+        previous = self._routes.get(name)
+        route = _Route(name, handler, pattern, check)
+        if previous:
+            route.stats = previous.stats
+        self._routes[name] = route
+        self._rebuild()
+        logger.info(f"Registered message handler: {name}")
+
+    def unregister(self, name: str):
+        if self._routes.pop(name, None):
+            self._rebuild()
+            logger.info(f"Unregistered message handler: {name}")
+
+    def _rebuild(self):
+        # Identical fragments share one group; otherwise only the first alternative would ever match
+        groups: Dict[str, str] = {}
+        self._group_routes = {}
+        for route in self._routes.values():
+            if not route.pattern:
+                continue
+            group = groups.setdefault(route.pattern, f"g{len(groups)}")
+            self._group_routes.setdefault(group, []).append(route.name)
+        self._pattern_routes = sum(len(names) for names in self._group_routes.values())
+        if groups:
+            alternation = "|".join(f"(?P<{group}>{pattern})" for pattern, group in groups.items())
+            self._prefilter = re.compile(alternation, re.IGNORECASE)
+        else:
+            self._prefilter = None
+
+    def _select(self, message: discord.Message) -> List[_Route]:
+        selected = set()
+        if self._prefilter and message.content:
+            for m in self._prefilter.finditer(message.content):
+                selected.update(self._group_routes[m.lastgroup])
+                if len(selected) == self._pattern_routes:
+                    break
+
+        routes = []
+        for route in self._routes.values():
+            if route.pattern and route.name not in selected:
+                continue
+            try:
+                if route.check is None or route.check(message):
+                    routes.append(route)
+            except Exception as e:
+                logger.error(f"Check for {route.name} failed: {e}")
+        return routes
+
+    async def dispatch(self, message: discord.Message):
+        """Route one message to the handlers whose prefilter matched; handlers run concurrently."""
+        # Every registered handler ignores bots, so do it once here
+        if message.author.bot:
+            return
+
+        self.messages_seen += 1
+        start = time.perf_counter()
+        routes = self._select(message)
+        self.prefilter_time += time.perf_counter() - start
+
+        if not routes:
+            return
+        self.messages_routed += 1
+        await asyncio.gather(*(self._run(route, message) for route in routes))
+
+    async def _run(self, route: _Route, message: discord.Message):
+        start = time.perf_counter()
+        try:
+            await route.handler(message)
+        except Exception as e:
+            route.stats.errors += 1
+            logger.error(f"❌ Handler {route.name} failed on message {message.id}: {e}", exc_info=True)
+        finally:
+            elapsed = time.perf_counter() - start
+            route.stats.calls += 1
+            route.stats.total_time += elapsed
+            route.stats.max_time = max(route.stats.max_time, elapsed)
+            if elapsed > SLOW_HANDLER_SECONDS:
+                logger.warning(f"Slow handler {route.name}: {elapsed:.2f}s on message {message.id}")
+
+    def stats(self) -> Dict[str, HandlerStats]:
+        return {name: route.stats for name, route in self._routes.items()}
+
+    @property
+    def prefilter_avg_us(self) -> float:
+        return self.prefilter_time / self.messages_seen * 1_000_000 if self.messages_seen else 0.0
+
+
+# Shared instance; lives in a helper module so registrations survive cog reloads
+message_dispatcher = MessageDispatcher()
+
+
+def _collect_metrics():
+    seen = MetricFamily("lemegeton_messages_seen_total", "Messages scanned by the dispatcher", "counter",
+                        [("lemegeton_messages_seen_total", {}, message_dispatcher.messages_seen)])
+    routed = MetricFamily("lemegeton_messages_routed_total", "Messages that matched at least one handler", "counter",
+                          [("lemegeton_messages_routed_total", {}, message_dispatcher.messages_routed)])
+    calls = MetricFamily("lemegeton_message_handler_calls_total", "Message handler invocations", "counter")
+    errors = MetricFamily("lemegeton_message_handler_errors_total", "Message handler failures", "counter")
+    seconds = MetricFamily("lemegeton_message_handler_seconds_total", "Time spent in message handlers", "counter")
+    for name, stats in message_dispatcher.stats().items():
+        calls.samples.append(("lemegeton_message_handler_calls_total", {"handler": name}, stats.calls))
+        errors.samples.append(("lemegeton_message_handler_errors_total", {"handler": name}, stats.errors))
+        seconds.samples.append(("lemegeton_message_handler_seconds_total", {"handler": name}, stats.total_time))
+    return [seen, routed, calls, errors, seconds]
+
+
+metrics.register_collector("message_dispatch", _collect_metrics)
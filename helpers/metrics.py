@@ -0,0 +1,326 @@
+# metrics.py
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+logger = logging.getLogger("Metrics")
+
+# -----------------------------
+# Configuration
+# -----------------------------
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LOOP_LAG_INTERVAL = 0.5  # seconds between event-loop lag probes
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Hosts grouped into a small fixed label set (full URLs would explode the series count)
+API_HOSTS = {
+    "graphql.anilist.co": "anilist",
+    "anilist.co": "anilist",
+    "api.steampowered.com": "steam",
+    "store.steampowered.com": "steam",
+    "steamcommunity.com": "steam",
+}
+
+LabelKey = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]  # (series name, labels, value)
+Collector = Callable[[], Iterable["MetricFamily"]]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class MetricFamily:
+    """One metric as it appears in the exposition: HELP, TYPE and its samples."""
+
+    def __init__(self, name: str, help_text: str, metric_type: str, samples: List[Sample] = None):
+        self.name = name
+        self.help = help_text
+        self.type = metric_type
+        self.samples = samples or []
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {_escape(self.help)}", f"# TYPE {self.name} {self.type}"]
+        for series, labels, value in self.samples:
+            lines.append(f"{series}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class _Metric:
+    metric_type = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        # Observations come from the loop and from worker threads (to_thread parsers, log writer)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: LabelKey) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def collect(self) -> MetricFamily:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            samples = [(self.name, self._labels(key), value) for key, value in sorted(self._values.items())]
+        return MetricFamily(self.name, self.help, self.metric_type, samples)
+
+
+class Gauge(_Metric):
+    metric_type = "gauge"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            samples = [(self.name, self._labels(key), value) for key, value in sorted(self._values.items())]
+        return MetricFamily(self.name, self.help, self.metric_type, samples)
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts (non-cumulative), sum, count]
+        self._series: Dict[LabelKey, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def collect(self) -> MetricFamily:
+        samples = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                labels = self._labels(key)
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+                samples.append((f"{self.name}_bucket", {**labels, "le": "+Inf"}, count))
+                samples.append((f"{self.name}_sum", labels, total))
+                samples.append((f"{self.name}_count", labels, count))
+        return MetricFamily(self.name, self.help, self.metric_type, samples)
+
+
+class MetricsRegistry:
+    """
+    Metrics the bot exposes in the Prometheus text format.
+
+    Counters/histograms are updated where the work happens; values that already live
+    elsewhere (cache hit counts, dispatcher stats, rate limiter tokens) are read at scrape
+    time through collectors registered by their owning helper module.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: Dict[str, Collector] = {}
+
+    def _get_or_create(self, cls, name, help_text, labelnames, **kwargs):
+        # Modules re-executed on cog reload get the existing metric back
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, help_text, tuple(labelnames), **kwargs)
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def register_collector(self, name: str, collector: Collector):
+        """Register (or replace, on reload) a callable returning MetricFamily objects at scrape time."""
+        self._collectors[name] = collector
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.collect().render())
+        for name, collector in list(self._collectors.items()):
+            try:
+                for family in collector():
+                    lines.extend(family.render())
+            except Exception as e:
+                logger.error(f"Metrics collector {name} failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+# Shared instance; lives in a helper module so counters survive cog reloads
+metrics = MetricsRegistry()
+
+# -----------------------------
+# Core metrics
+# -----------------------------
+COMMAND_DURATION = metrics.histogram(
+    "lemegeton_command_duration_seconds", "Time from interaction creation to command completion", ("command",)
+)
+COMMAND_ERRORS = metrics.counter("lemegeton_command_errors_total", "Application commands that raised", ("command",))
+
+HTTP_REQUESTS = metrics.counter("lemegeton_http_requests_total", "Outgoing HTTP requests by API and status", ("api", "status"))
+HTTP_DURATION = metrics.histogram("lemegeton_http_request_duration_seconds", "Outgoing HTTP request latency", ("api",))
+ANILIST_RATELIMIT_REMAINING = metrics.gauge(
+    "lemegeton_anilist_ratelimit_remaining", "X-RateLimit-Remaining from the last AniList response"
+)
+ANILIST_RATELIMIT_LIMIT = metrics.gauge("lemegeton_anilist_ratelimit_limit", "X-RateLimit-Limit from the last AniList response")
+
+DB_QUERY_DURATION = metrics.histogram(
+    "lemegeton_db_query_duration_seconds", "execute_db_operation latency by operation name", ("operation",)
+)
+DB_QUERY_ERRORS = metrics.counter("lemegeton_db_query_errors_total", "Failed execute_db_operation calls", ("operation",))
+
+LOOP_LAG = metrics.gauge("lemegeton_event_loop_lag_seconds", "Most recent event loop scheduling delay")
+LOOP_LAG_HISTOGRAM = metrics.histogram(
+    "lemegeton_event_loop_lag_distribution_seconds", "Event loop scheduling delay", buckets=LOOP_LAG_BUCKETS
+)
+
+
+def api_label(url) -> str:
+    host = (urlsplit(str(url)).hostname or "").lower()
+    return API_HOSTS.get(host, "other")
+
+
+def cache_families(caches: Dict[str, object]) -> List[MetricFamily]:
+    """Hit/miss counters for objects with `hits`/`misses` attributes, one `cache` label each."""
+    hits = MetricFamily("lemegeton_cache_hits_total", "Cache hits", "counter")
+    misses = MetricFamily("lemegeton_cache_misses_total", "Cache misses", "counter")
+    for name, cache in caches.items():
+        hits.samples.append(("lemegeton_cache_hits_total", {"cache": name}, cache.hits))
+        misses.samples.append(("lemegeton_cache_misses_total", {"cache": name}, cache.misses))
+    return [hits, misses]
+
+
+# -----------------------------
+# aiohttp instrumentation
+# -----------------------------
+async def _on_request_start(session, ctx, params):
+    ctx.start = time.perf_counter()
+
+
+async def _on_request_end(session, ctx, params):
+    api = api_label(params.url)
+    HTTP_DURATION.observe(time.perf_counter() - ctx.start, api=api)
+    HTTP_REQUESTS.inc(api=api, status=str(params.response.status))
+    if api == "anilist":
+        headers = params.response.headers
+        if "X-RateLimit-Remaining" in headers:
+            ANILIST_RATELIMIT_REMAINING.set(float(headers["X-RateLimit-Remaining"]))
+        if "X-RateLimit-Limit" in headers:
+            ANILIST_RATELIMIT_LIMIT.set(float(headers["X-RateLimit-Limit"]))
+
+
+async def _on_request_exception(session, ctx, params):
+    api = api_label(params.url)
+    HTTP_DURATION.observe(time.perf_counter() - ctx.start, api=api)
+    HTTP_REQUESTS.inc(api=api, status="error")
+
+
+_trace_config: Optional[aiohttp.TraceConfig] = None
+
+
+def http_trace_configs() -> List[aiohttp.TraceConfig]:
+    """trace_configs for aiohttp.ClientSession: counts, latency and status of every request."""
+    global _trace_config
+    if _trace_config is None:
+        _trace_config = aiohttp.TraceConfig()
+        _trace_config.on_request_start.append(_on_request_start)
+        _trace_config.on_request_end.append(_on_request_end)
+        _trace_config.on_request_exception.append(_on_request_exception)
+    return [_trace_config]
+
+
+# -----------------------------
+# Event loop lag
+# -----------------------------
+async def monitor_loop_lag(interval: float = LOOP_LAG_INTERVAL):
+    """Sleep `interval` forever; anything beyond it is time the loop was busy with something else."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        LOOP_LAG.set(lag)
+        LOOP_LAG_HISTOGRAM.observe(lag)
+
+
+# -----------------------------
+# HTTP endpoint
+# -----------------------------
+async def start_metrics_server(host: str, port: int):
+    """Serve GET /metrics on host:port. Returns the aiohttp AppRunner (call .cleanup() to stop)."""
+    from aiohttp import web
+
+    async def handle_metrics(request):
+        return web.Response(body=metrics.render().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    logger.info(f"Metrics endpoint listening on http://{host}:{port}/metrics")
+    return runner
@@ -0,0 +1,412 @@
+# steam_helper.py
+
+import asyncio
+import logging
+import os
+import re
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+
+import aiohttp
+
+from helpers.metrics import MetricFamily, cache_families, metrics
+from database import (
+    get_cached_steam_apps,
+    save_steam_apps,
+    prune_steam_app_cache,
+    get_steam_catalog,
+    save_steam_catalog_apps,
+)
+
+logger = logging.getLogger("steam")
+
+# -----------------------------
+# Configuration
+# -----------------------------
+APPDETAILS_URL = "https://store.steampowered.com/api/appdetails"
+STEAM_APP_CACHE_TTL = 3 * 24 * 3600  # seconds a stored appdetails payload is served without refetching
+APPDETAILS_TIMEOUT = 15
+
+# The store API has no published limit and starts answering 429 under bursts
+STORE_REQUESTS_PER_SECOND = 5.0
+STORE_BURST = 10
+STORE_CONCURRENCY = 6
+
+# Anchored to the repo root (not the working directory), like config.DB_PATH
+AVATAR_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "steam_avatars")
+AVATAR_CACHE_MAX_FILES = 2000  # oldest avatars are evicted beyond this
+AVATAR_TIMEOUT = 10
+
+
+class RateLimiter:
+    """Token bucket (`rate` requests/s, bursts of `burst`) plus a cap on requests in flight."""
+
+    def __init__(self, rate: float, burst: int, concurrency: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(concurrency)
+
+    async def _take_token(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    @asynccontextmanager
+    async def limit(self):
+        async with self._slots:
+            await self._take_token()
+            yield
+
+    @property
+    def available_tokens(self) -> float:
+        """Requests that could start right now without waiting (rate-limit headroom)."""
+        return min(self.burst, self._tokens + (time.monotonic() - self._updated) * self.rate)
+
+
+# Shared by every store.steampowered.com request the bot makes
+store_limiter = RateLimiter(STORE_REQUESTS_PER_SECOND, STORE_BURST, STORE_CONCURRENCY)
+
+
+async def store_json(session: aiohttp.ClientSession, url: str, params: dict = None) -> Optional[dict]:
+    """GET a store API endpoint through the shared rate limiter; None on any failure."""
+    try:
+        async with store_limiter.limit():
+            async with session.get(url, params=params, timeout=APPDETAILS_TIMEOUT) as resp:
+                if resp.status != 200:
+                    if resp.status == 429:
+                        logger.warning(f"Steam store rate limited {url}")
+                    else:
+                        logger.debug(f"{url} returned {resp.status}")
+                    return None
+                return await resp.json()
+    except Exception:
+        logger.exception(f"Steam store request to {url} failed")
+        return None
+
+
+async def fetch_app_details(session: aiohttp.ClientSession, appid: int) -> Optional[dict]:
+    """
+    One appdetails request. Returns the app's `data` dict, {} when Steam has no data
+    for the app (worth caching), or None on a network/HTTP failure (not cached).
+    """
+    payload = await store_json(session, APPDETAILS_URL, {"appids": appid, "cc": "us", "l": "en"})
+    if payload is None:
+        return None
+    entry = (payload or {}).get(str(appid)) or {}
+    if not entry.get("success"):
+        return {}
+    return entry.get("data") or {}
+
+
+# -----------------------------
+# Local catalog index
+# -----------------------------
+@dataclass(frozen=True)
+class CatalogApp:
+    appid: int
+    name: str
+    app_type: str
+    genres: Tuple[str, ...]
+    categories: Tuple[str, ...]
+    developers: Tuple[str, ...]
+    publishers: Tuple[str, ...]
+    metacritic: int
+
+    @classmethod
+    def from_details(cls, appid: int, details: dict) -> "CatalogApp":
+        return cls(
+            appid=int(appid),
+            name=details.get("name") or "",
+            app_type=details.get("type") or "",
+            genres=tuple(g["description"] for g in details.get("genres", []) if g.get("description")),
+            categories=tuple(c["description"] for c in details.get("categories", []) if c.get("description")),
+            developers=tuple(details.get("developers") or ()),
+            publishers=tuple(details.get("publishers") or ()),
+            metacritic=(details.get("metacritic") or {}).get("score") or 0,
+        )
+
+    @classmethod
+    def from_row(cls, row: dict) -> "CatalogApp":
+        return cls(
+            appid=int(row["appid"]),
+            name=row.get("name") or "",
+            app_type=row.get("app_type") or "",
+            genres=tuple(row.get("genres") or ()),
+            categories=tuple(row.get("categories") or ()),
+            developers=tuple(row.get("developers") or ()),
+            publishers=tuple(row.get("publishers") or ()),
+            metacritic=row.get("metacritic") or 0,
+        )
+
+    def to_row(self) -> dict:
+        return {
+            "appid": self.appid, "name": self.name, "app_type": self.app_type,
+            "genres": self.genres, "categories": self.categories,
+            "developers": self.developers, "publishers": self.publishers,
+            "metacritic": self.metacritic,
+        }
+
+
+class SteamCatalog:
+    """
+    Every app the bot has seen appdetails for, with inverted indexes by genre, developer
+    and publisher. Grows as SteamAppCache yields details; persisted in steam_catalog.
+    """
+
+    def __init__(self):
+        self.apps: Dict[int, CatalogApp] = {}
+        self.by_genre: Dict[str, Set[int]] = {}
+        self.by_developer: Dict[str, Set[int]] = {}
+        self.by_publisher: Dict[str, Set[int]] = {}
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self.apps)
+
+    def _index(self, app: CatalogApp):
+        old = self.apps.get(app.appid)
+        if old is not None:
+            for index, keys in ((self.by_genre, old.genres), (self.by_developer, old.developers),
+                                (self.by_publisher, old.publishers)):
+                for key in keys:
+                    index.get(key, set()).discard(app.appid)
+        self.apps[app.appid] = app
+        for index, keys in ((self.by_genre, app.genres), (self.by_developer, app.developers),
+                            (self.by_publisher, app.publishers)):
+            for key in keys:
+                index.setdefault(key, set()).add(app.appid)
+
+    async def load(self):
+        """Read the persisted catalog once per process."""
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if self._loaded:
+                return
+            try:
+                for row in await get_steam_catalog():
+                    self._index(CatalogApp.from_row(row))
+                logger.info(f"Steam catalog loaded: {len(self.apps)} apps")
+            except Exception:
+                logger.exception("Loading the Steam catalog failed")
+            self._loaded = True
+
+    async def add_many(self, details_by_appid: Dict[int, dict]):
+        """Index appdetails payloads; only new or changed apps are written back."""
+        changed = []
+        for appid, details in details_by_appid.items():
+            if not details:
+                continue
+            app = CatalogApp.from_details(appid, details)
+            if self.apps.get(app.appid) != app:
+                self._index(app)
+                changed.append(app.to_row())
+        if changed:
+            try:
+                await save_steam_catalog_apps(changed)
+            except Exception:
+                logger.exception("Writing the Steam catalog failed")
+
+    def candidates(self, genres: Iterable[str] = (), developers: Iterable[str] = (),
+                   publishers: Iterable[str] = ()) -> Set[int]:
+        """Union of the indexed apps sharing any of the given genres, developers or publishers."""
+        found: Set[int] = set()
+        for index, keys in ((self.by_genre, genres), (self.by_developer, developers),
+                            (self.by_publisher, publishers)):
+            for key in keys:
+                found |= index.get(key, set())
+        return found
+
+
+class SteamAppCache:
+    """
+    Read-through cache for store appdetails, backed by the steam_app_cache table.
+    Every Steam code path asks here first; hits/misses are counted per app.
+    """
+
+    def __init__(self, ttl: float = STEAM_APP_CACHE_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    async def iter_many(self, session: aiohttp.ClientSession,
+                        appids: Iterable[int]) -> AsyncIterator[Tuple[int, dict]]:
+        """
+        Yield (appid, details) for every appid with data: cached apps first (one DB read),
+        then uncached ones as their concurrent, rate-limited requests complete.
+        """
+        appids = list(dict.fromkeys(int(a) for a in appids))
+        try:
+            cached = await get_cached_steam_apps(appids, self.ttl)
+        except Exception:
+            logger.exception("Reading the Steam app cache failed")
+            cached = {}
+
+        missing = [a for a in appids if a not in cached]
+        self.hits += len(appids) - len(missing)
+        self.misses += len(missing)
+        logger.debug(f"appdetails: {len(appids) - len(missing)}/{len(appids)} cached, "
+                     f"overall hit rate {self.hit_rate:.0%}")
+
+        # Apps cached before the catalog existed are indexed as they are read
+        await steam_catalog.load()
+        await steam_catalog.add_many({a: d for a, d in cached.items() if a not in steam_catalog.apps})
+
+        for appid in appids:
+            if cached.get(appid):
+                yield appid, cached[appid]
+        if not missing:
+            return
+
+        async def fetch(appid):
+            return appid, await fetch_app_details(session, appid)
+
+        fetched = {}
+        tasks = [asyncio.create_task(fetch(a)) for a in missing]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                appid, details = await next_done
+                if details is None:
+                    continue
+                fetched[appid] = details
+                if details:
+                    yield appid, details
+        finally:
+            for task in tasks:
+                task.cancel()
+            if fetched:
+                try:
+                    await save_steam_apps(fetched)
+                except Exception:
+                    logger.exception("Writing the Steam app cache failed")
+                await steam_catalog.add_many(fetched)
+
+    async def get_many(self, session: aiohttp.ClientSession, appids: Iterable[int]) -> Dict[int, dict]:
+        """{appid: details} for every appid with data."""
+        return {appid: details async for appid, details in self.iter_many(session, appids)}
+
+    async def get(self, session: aiohttp.ClientSession, appid: int) -> Optional[dict]:
+        return (await self.get_many(session, [appid])).get(int(appid))
+
+    async def prune(self) -> int:
+        return await prune_steam_app_cache(self.ttl)
+
+
+# -----------------------------
+# Avatar disk cache
+# -----------------------------
+class AvatarCache:
+    """
+    Avatar images on disk, keyed by Steam's avatarhash (a new avatar means a new hash,
+    so entries never go stale). Bounded to `max_files`; the least recently written are evicted.
+    """
+
+    HASH_RE = re.compile(r"^[0-9a-f]{8,64}$")
+
+    def __init__(self, directory: str = AVATAR_CACHE_DIR, max_files: int = AVATAR_CACHE_MAX_FILES):
+        self.directory = directory
+        self.max_files = max_files
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._directory_ready = False  # created on the first write, not at import
+
+    def _path(self, avatar_hash: str) -> Optional[str]:
+        avatar_hash = (avatar_hash or "").lower()
+        if not self.HASH_RE.match(avatar_hash):
+            return None
+        return os.path.join(self.directory, f"{avatar_hash}.jpg")
+
+    def _read(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write(self, path: str, data: bytes):
+        if not self._directory_ready:
+            os.makedirs(self.directory, exist_ok=True)
+            self._directory_ready = True
+        with open(path, "wb") as f:
+            f.write(data)
+        self._writes += 1
+        # Checking the directory size on every write would cost a listdir per avatar
+        if self._writes % 50 == 0:
+            self._evict()
+
+    def _evict(self):
+        try:
+            entries = [os.path.join(self.directory, name) for name in os.listdir(self.directory)]
+            if len(entries) <= self.max_files:
+                return
+            entries.sort(key=os.path.getmtime)
+            for path in entries[:len(entries) - self.max_files]:
+                os.remove(path)
+        except OSError:
+            logger.exception("Avatar cache eviction failed")
+
+    async def get(self, session: aiohttp.ClientSession, url: Optional[str], avatar_hash: Optional[str]) -> Optional[bytes]:
+        if not url:
+            return None
+        path = self._path(avatar_hash)
+        if path:
+            data = await asyncio.to_thread(self._read, path)
+            if data:
+                self.hits += 1
+                return data
+        self.misses += 1
+        try:
+            async with session.get(url, timeout=AVATAR_TIMEOUT) as resp:
+                if resp.status != 200:
+                    return None
+                data = await resp.read()
+        except Exception:
+            logger.debug(f"Avatar download failed: {url}")
+            return None
+        if path and data:
+            try:
+                await asyncio.to_thread(self._write, path, data)
+            except OSError:
+                logger.exception("Writing avatar cache failed")
+        return data
+
+    async def get_many(self, session: aiohttp.ClientSession, players: List[dict]) -> List[Optional[bytes]]:
+        """Avatar bytes for each GetPlayerSummaries entry, fetched concurrently."""
+        return await asyncio.gather(*(
+            self.get(session, p.get("avatarfull") or p.get("avatar"), p.get("avatarhash")) for p in players
+        ))
+
+
+# Shared instances; live in a helper module so the counters and index survive cog reloads
+steam_catalog = SteamCatalog()
+steam_app_cache = SteamAppCache()
+avatar_cache = AvatarCache()
+
+
+def _collect_metrics():
+    headroom = MetricFamily("lemegeton_steam_store_tokens", "Steam store requests that can start without waiting", "gauge")
+    headroom.samples.append(("lemegeton_steam_store_tokens", {}, store_limiter.available_tokens))
+    catalog = MetricFamily("lemegeton_steam_catalog_apps", "Apps in the local Steam catalog", "gauge")
+    catalog.samples.append(("lemegeton_steam_catalog_apps", {}, len(steam_catalog)))
+    return cache_families({"steam_app": steam_app_cache, "steam_avatar": avatar_cache}) + [headroom, catalog]
+
+
+metrics.register_collector("steam", _collect_metrics)
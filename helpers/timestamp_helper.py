@@ -0,0 +1,187 @@
+# timestamp_helper.py
+
+import bisect
+import logging
+import re
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger("cogs.timestamp")
+
+# -----------------------------
+# Compiled patterns
+# -----------------------------
+# Every time the detector can convert contains a digit followed by am/pm or an H:MM time,
+# so messages without one are rejected by a single search
+QUICK_CHECK_RE = re.compile(r"\d\s*[ap]m|\d:\d\d", re.IGNORECASE)
+
+# Duration phrases ("in 2 hours", "3 mins ago") anywhere in the message: leave it alone
+DURATION_RE = re.compile(
+    r"\bin\s+\d+\s*(?:hours?|hrs?|minutes?|mins?|seconds?|secs?)\b"
+    r"|\b\d+\s*(?:hours?|hrs?|minutes?|mins?|seconds?|secs?)\s+(?:ago|from\s+now|later)\b",
+    re.IGNORECASE
+)
+
+# Checked against the lowercased text around each match
+CONTEXT_SKIP_RE = re.compile(r"\bin\s+\d+\s*(?:hours?|hrs?|minutes?|mins?)\b|\b(?:ago\b|from\s+now|later)\b")
+CONTEXT_CHARS = 15
+
+# Supported formats, most specific first. A format claims its matches across the whole message
+# before the next one is tried, so a rejected "23:59 pm" still leaves "23:59" to the 24-hour format
+# and "11:45am" in "12:11:45am" beats the 24-hour "12:11"
+TIME_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"\b(?P<rel>tomorrow|today)\s+at\s+(?P<rel_hour>\d{1,2}):(?P<rel_minute>\d{2})\s*(?P<rel_ampm>am|pm)\b",
+    r"\b(?P<rel>tomorrow|today)\s+at\s+(?P<rel_hour>\d{1,2})\s*(?P<rel_ampm>am|pm)\b",
+    r"\b(?P<date>\w{3,9}\s+\d{1,2})\s+at\s+\d{1,2}:\d{2}\s*(?:am|pm)\b",
+    r"\b(?P<date>\w{3,9}\s+\d{1,2})\s+at\s+\d{1,2}\s*(?:am|pm)\b",
+    r"\b(?P<hour>\d{1,2}):(?P<minute>\d{2})\s*(?P<ampm>am|pm)\b",
+    r"\b(?P<hour>\d{1,2})\s*(?P<ampm>am|pm)\b",
+    r"\b(?P<hour24>[01]?\d|2[0-3]):(?P<minute24>[0-5]\d)\b(?=\s|$|[^\d])",
+)]
+
+# Used by parse_time_string for free-form input
+TIME_PART_RE = re.compile(r"(\d{1,2}):?(\d{2})?\s*(am|pm)?")
+DATE_AT_RE = re.compile(r"\w{3,9}\s+\d{1,2}\s+at")
+
+FULL_FORMAT_WORDS = ('tomorrow', 'today', 'dec', 'jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov')
+
+
+# -----------------------------
+# Resolution
+# -----------------------------
+def resolve_time(hour: int, minute: int, am_pm: Optional[str], tomorrow: bool = False) -> Optional[datetime]:
+    """Turn a clock time (local) into a UTC datetime; ambiguous 12-hour times go to the next occurrence."""
+    try:
+        # Use local time for calculations - this will be the user's system timezone
+        now = datetime.now()
+        base_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        if tomorrow:
+            base_date = base_date.replace(day=base_date.day + 1)
+
+        # Handle AM/PM conversion
+        if am_pm:
+            if am_pm == 'pm' and hour != 12:
+                hour += 12
+            elif am_pm == 'am' and hour == 12:
+                hour = 0
+
+        # If no AM/PM specified and hour is 1-12, assume next occurrence
+        elif hour <= 12:
+            # If the time has already passed today, assume tomorrow
+            test_time = base_date.replace(hour=hour, minute=minute)
+            if test_time < now:
+                # Try PM version
+                if hour != 12:
+                    test_time = base_date.replace(hour=hour + 12, minute=minute)
+                    if test_time < now:
+                        # Still in the past, use tomorrow
+                        base_date = base_date.replace(day=base_date.day + 1)
+                else:
+                    # For 12:xx, try tomorrow
+                    base_date = base_date.replace(day=base_date.day + 1)
+
+        # Validate hour and minute
+        if hour > 23 or minute > 59:
+            return None
+
+        # Create the final datetime in local time, then convert to UTC for Discord timestamps
+        result = base_date.replace(hour=hour, minute=minute)
+        local_timestamp = time.mktime(result.timetuple())
+        return datetime.fromtimestamp(local_timestamp, tz=timezone.utc)
+
+    except Exception as e:
+        logger.error(f"Error resolving time {hour}:{minute} {am_pm or ''}: {e}")
+        return None
+
+
+def parse_time_string(time_str: str, date_str: Optional[str] = None) -> Optional[datetime]:
+    """Parse various time formats and return a datetime object."""
+    # Skip if this looks like a duration/future statement
+    if DURATION_RE.search(time_str):
+        return None
+
+    # Combine time and date strings if provided
+    full_str = f"{date_str} {time_str}" if date_str else time_str
+    full_str = full_str.strip().lower()
+
+    # "Dec 25 at X" phrases: the date is not used yet, the time resolves against today
+    time_part = TIME_PART_RE.search(full_str)
+    if not time_part:
+        return None
+
+    hour = int(time_part.group(1))
+    minute = int(time_part.group(2)) if time_part.group(2) else 0
+    return resolve_time(hour, minute, time_part.group(3), tomorrow="tomorrow" in full_str)
+
+
+def _timestamp_for(match: re.Match) -> Optional[datetime]:
+    """Resolve a TIME_PATTERNS match straight from its named groups."""
+    groups = match.groupdict()
+    if groups.get("rel"):
+        return resolve_time(
+            int(groups["rel_hour"]),
+            int(groups.get("rel_minute") or 0),
+            groups["rel_ampm"].lower(),
+            tomorrow=groups["rel"].lower() == "tomorrow"
+        )
+    if groups.get("date"):
+        # Rare; goes through the free-form parser exactly as before
+        return parse_time_string(match.group(0))
+    if groups.get("hour"):
+        return resolve_time(int(groups["hour"]), int(groups.get("minute") or 0), groups["ampm"].lower())
+    return resolve_time(int(groups["hour24"]), int(groups["minute24"]), None)
+
+
+# -----------------------------
+# Detection
+# -----------------------------
+def find_time_matches(content: str) -> List[Tuple[int, int, str, datetime]]:
+    """
+    [(start, end, text, utc datetime)] for every convertible time, in order and non-overlapping.
+    Formats are tried in priority order; a match is kept unless it overlaps one kept by a
+    higher-priority format, sits in a duration context, or does not resolve. A rejected match
+    leaves its span free for the lower-priority formats. Kept spans stay sorted and never
+    overlap, so a candidate only has to be checked against its two neighbours (bisect).
+    """
+    if not QUICK_CHECK_RE.search(content) or DURATION_RE.search(content):
+        return []
+
+    found = []
+    starts = []  # found[i][0], for bisect
+    length = len(content)
+    for pattern in TIME_PATTERNS:
+        for match in pattern.finditer(content):
+            start, end = match.span()
+            index = bisect.bisect_right(starts, start)
+            if index and found[index - 1][1] > start:
+                continue
+            if index < len(found) and found[index][0] < end:
+                continue
+
+            context = content[max(0, start - CONTEXT_CHARS):min(length, end + CONTEXT_CHARS)].lower()
+            if CONTEXT_SKIP_RE.search(context):
+                continue
+            timestamp = _timestamp_for(match)
+            if timestamp:
+                found.insert(index, (start, end, match.group(0), timestamp))
+                starts.insert(index, start)
+    return found
+
+
+def convert_times(content: str) -> str:
+    """Replace every detected time with a Discord timestamp (<t:...:f> with a date word, <t:...:t> otherwise)."""
+    matches = find_time_matches(content)
+    if not matches:
+        return content
+
+    parts = []
+    last = 0
+    for start, end, text, timestamp in matches:
+        lowered = text.lower()
+        style = "f" if any(word in lowered for word in FULL_FORMAT_WORDS) else "t"
+        parts.append(content[last:start])
+        parts.append(f"<t:{int(timestamp.timestamp())}:{style}>")
+        last = end
+    parts.append(content[last:])
+    return "".join(parts)